@@ -62,6 +62,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'context_processors.middleware.ContextUsageMiddleware',
 ]
 
 ROOT_URLCONF = 'PicoSchool.urls'
@@ -124,12 +125,39 @@ else:
 
 
 
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
-#         'LOCATION': '127.0.0.1:8002',
-#     },
-# }
+# Open quizzes, poll tallies and the page context live in the cache, so every
+# worker must share it: set REDIS_URL (docker-compose does). without it each
+# process keeps its own local memory cache, enough for a single runserver
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ.get("REDIS_URL"),
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        },
+    }
+
+# Header, sidebar and calendar data shared by every page (see context_processors/cache.py)
+CONTEXT_CACHE_TIMEOUT = 60 * 60
+
+# Days generate_attendance skips: weekdays (Monday is 0) and Jalali holidays,
+# either a full "1402-11-22" date or a yearly "01-01"
+ATTENDANCE_WEEKEND = (4,)
+ATTENDANCE_HOLIDAYS = (
+    '01-01', '01-02', '01-03', '01-04', '01-12', '01-13',
+    '03-14', '03-15', '11-22', '12-29',
+)
+
+# Open quiz attempts keep their answers in the cache and write them to the
+# database every QUIZ_FLUSH_EVERY answers or QUIZ_FLUSH_SECONDS seconds.
+# with several workers the cache above must be the shared one (REDIS_URL)
+QUIZ_FLUSH_EVERY = 5
+QUIZ_FLUSH_SECONDS = 30
+# Answers saved later than this many seconds after an attempt's deadline are rejected,
+# run "manage.py finish_expired_attempts" every minute to submit abandoned attempts
+QUIZ_DEADLINE_GRACE = 30
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.db.models import Count
 from manager.models import Grade, Major
+from main.counters import get_count
 from main.validators import is_valid_national_code
 
 from account.utils.validators import validate_phone_number
@@ -191,6 +192,11 @@ class User(AbstractUser):
     # Metadata
     class Meta:
         ordering = ('last_name',)
+        # Prefix indexes for the user autocomplete (national_code is already unique)
+        indexes = (
+            models.Index(fields=('first_name',), name='user_first_name_idx', opclasses=('varchar_pattern_ops',)),
+            models.Index(fields=('last_name',), name='user_last_name_idx', opclasses=('varchar_pattern_ops',)),
+        )
 
     # Methods
     def __str__(self):
@@ -198,15 +204,12 @@ class User(AbstractUser):
 
     @property
     def parent_count(self):
-        parents = User.objects.filter(is_parent=True, is_active=True).count()
-        return parents
+        return get_count('parents')
 
     @property
     def teacher_count(self):
-        teachers = User.objects.filter(is_teacher=True, is_active=True).count()
-        return teachers
+        return get_count('teachers')
 
     @property
     def student_count(self):
-        students = User.objects.filter(is_student=True, is_active=True).count()
-        return students
+        return get_count('students')
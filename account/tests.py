@@ -3,6 +3,7 @@ from .models import User, Grade, Major
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from account.models import User
+from account.utils.search import search_users
 
 
 # unit test for models:
@@ -347,3 +348,33 @@ class UrlsNonFunctionalTestCase(TestCase):
 
 
 
+
+
+# unit test for user autocomplete:
+class UserSearchTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', first_name='Ali', last_name='Ahmadi',
+                                           national_code='1111111111', is_teacher=True)
+        self.student = User.objects.create(username='student', first_name='Alireza', last_name='Karimi',
+                                           national_code='2222222222', is_student=True)
+        User.objects.create(username='inactive', first_name='Ali', last_name='Rezaei',
+                            national_code='3333333333', is_active=False)
+
+    def test_prefix_search_on_names(self):
+        ids = [user['id'] for user in search_users('Ali')]
+        self.assertCountEqual(ids, [self.teacher.id, self.student.id])
+        self.assertEqual([user['id'] for user in search_users('Kari')], [self.student.id])
+
+    def test_full_name_search(self):
+        self.assertEqual([user['id'] for user in search_users('Ali  Ahm')], [self.teacher.id])
+
+    def test_national_code_search(self):
+        self.assertEqual([user['id'] for user in search_users('2222')], [self.student.id])
+
+    def test_role_filter_and_limit(self):
+        self.assertEqual([user['id'] for user in search_users('Ali', role='teacher')], [self.teacher.id])
+        self.assertEqual(len(search_users('Ali', limit=1)), 1)
+
+    def test_empty_term_returns_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(search_users('  '), [])
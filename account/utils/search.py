@@ -0,0 +1,31 @@
+from django.db.models import Q
+
+from account.models import User
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 25
+ROLES = ('manager', 'teacher', 'parent', 'student')
+
+
+def search_users(term, role=None, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Prefix search over first name, last name and national code.
+    only prefix lookups are used so the query stays on the indexes,
+    "first last" terms are matched against both name columns
+    """
+    term = ' '.join((term or '').split())
+    if not term:
+        return []
+
+    query = Q(first_name__startswith=term) | Q(last_name__startswith=term)
+    if term.isdigit():
+        query = Q(national_code__startswith=term)
+    elif ' ' in term:
+        first, last = term.split(' ', 1)
+        query |= Q(first_name__startswith=first, last_name__startswith=last)
+
+    users = User.objects.filter(query, is_active=True)
+    if role in ROLES:
+        users = users.filter(**{f'is_{role}': True})
+    limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+    return list(users.values('id', 'first_name', 'last_name', 'national_code')[:limit])
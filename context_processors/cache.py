@@ -0,0 +1,61 @@
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+
+CONTEXT_CACHE_TIMEOUT = getattr(settings, 'CONTEXT_CACHE_TIMEOUT', 60 * 60)
+
+# Every bundle lists the models whose changes make it stale
+BUNDLE_MODELS = {
+    'site_setting': ('main.SiteSetting',),
+    'calendar': ('manager.EventCalendar', 'manager.ExternalEventCalendar'),
+    'notices': ('manager.NoticeBox', 'account.User'),
+    'manager': ('manager.EmploymentForm', 'poll.Poll'),
+}
+
+
+def _version_key(name):
+    return f'context:{name}:version'
+
+
+def get_version(name):
+    """
+    Current version of a bundle.
+    a missing version starts from the clock, so entries left over from an
+    evicted version can never be read again
+    """
+    return cache.get_or_set(_version_key(name), lambda: int(time.time()), None)
+
+
+def get_bundle(name, builder):
+    """
+    Return the cached bundle for the current version, building it on a miss
+    """
+    key = f'context:{name}:{get_version(name)}'
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = builder()
+        cache.set(key, bundle, CONTEXT_CACHE_TIMEOUT)
+    return bundle
+
+
+def invalidate(*names):
+    for name in names:
+        try:
+            cache.incr(_version_key(name))
+        except ValueError:
+            cache.set(_version_key(name), int(time.time()), None)
+
+
+def invalidate_for_model(model):
+    """
+    Bump every bundle that depends on the given model
+    """
+    label = model._meta.label
+    invalidate(*[name for name, labels in BUNDLE_MODELS.items() if label in labels])
+
+
+def bundle_models():
+    labels = {label for labels in BUNDLE_MODELS.values() for label in labels}
+    return [apps.get_model(label) for label in sorted(labels)]
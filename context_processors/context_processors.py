@@ -1,49 +1,62 @@
-from account.models import User
+from context_processors.cache import get_bundle
+from context_processors.lazy import lazy_bundle
+from main.counters import get_counts
 from main.models import SiteSetting
 from manager.models import (
     EventCalendar,
     ExternalEventCalendar,
     NoticeBox,
-    EmploymentForm,
 )
-from poll.models import Poll
 
 
-def user_context_processor(request):
-    users = User.objects.filter(is_active=True)
-    employment_form = EmploymentForm.objects.first()
-    poll = Poll.objects.first()
+def _manager_bundle():
+    counts = get_counts()
     return {
-        'employment_form': employment_form,
-        'poll': poll,
-        'users': users,
+        'employment_form_count': counts['employment_forms'],
+        'poll_count': counts['polls'],
     }
 
 
-def calendar_context_processor(request):
-    event = EventCalendar.objects.all()
-    dropdown_events = EventCalendar.objects.all().order_by('-publish')[:3]
-    ex_event = ExternalEventCalendar.objects.all().order_by('-publish')
-    event_count = EventCalendar.objects.first()
+def _calendar_bundle():
+    events = list(EventCalendar.objects.all())
     return {
-        'events': event,
-        'dropdown_events': dropdown_events,
-        'ex_events': ex_event,
-        'event_count': event_count,
+        'events': events,
+        'dropdown_events': sorted(events, key=lambda event: event.publish, reverse=True)[:3],
+        'ex_events': list(ExternalEventCalendar.objects.all().order_by('-publish')),
+        'event_count': len(events),
     }
 
 
-def site_setting_context_processor(request):
-    setting = SiteSetting.objects.first()
+def _site_setting_bundle():
     return {
-        'setting': setting,
+        'setting': SiteSetting.objects.first(),
     }
 
 
-def notices_context_processor(request):
-    notice_count = NoticeBox.objects.first()
-    notices = NoticeBox.objects.all()[:3]
+def _notices_bundle():
     return {
-        'count_notice_header': notice_count,
-        'notices_header': notices,
+        'count_notice_header': get_counts()['notices'],
+        'notices_header': list(NoticeBox.objects.select_related('writer')[:3]),
     }
+
+
+def user_context_processor(request):
+    # Sidebar counters are only shown to managers
+    if request.user.is_superuser or getattr(request.user, 'is_manager', False):
+        return lazy_bundle(request, ('employment_form_count', 'poll_count'),
+                           lambda: get_bundle('manager', _manager_bundle))
+    return {}
+
+
+def calendar_context_processor(request):
+    return lazy_bundle(request, ('events', 'dropdown_events', 'ex_events', 'event_count'),
+                       lambda: get_bundle('calendar', _calendar_bundle))
+
+
+def site_setting_context_processor(request):
+    return lazy_bundle(request, ('setting',), lambda: get_bundle('site_setting', _site_setting_bundle))
+
+
+def notices_context_processor(request):
+    return lazy_bundle(request, ('count_notice_header', 'notices_header'),
+                       lambda: get_bundle('notices', _notices_bundle))
@@ -0,0 +1,41 @@
+from django.utils.functional import SimpleLazyObject
+
+
+def get_usage(request):
+    """
+    Per request record of the lazy context keys that were provided and used
+    """
+    if not hasattr(request, 'context_usage'):
+        request.context_usage = {'provided': set(), 'used': set()}
+    return request.context_usage
+
+
+class LazyContextValue(SimpleLazyObject):
+    """
+    Context value that is only computed when a template reads it
+    """
+
+    def __init__(self, request, key, func):
+        self.__dict__['_request'] = request
+        self.__dict__['_key'] = key
+        super().__init__(func)
+
+    def _setup(self):
+        get_usage(self._request)['used'].add(self._key)
+        super()._setup()
+
+
+def lazy_bundle(request, keys, loader):
+    """
+    Wrap every key of a bundle in a lazy value.
+    the loader runs at most once per request, on the first key a template reads
+    """
+    loaded = {}
+
+    def value(key):
+        if not loaded:
+            loaded.update(loader())
+        return loaded[key]
+
+    get_usage(request)['provided'].update(keys)
+    return {key: LazyContextValue(request, key, lambda key=key: value(key)) for key in keys}
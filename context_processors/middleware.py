@@ -0,0 +1,28 @@
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ContextUsageMiddleware:
+    """
+    Report which lazy context keys each request actually used
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        usage = getattr(request, 'context_usage', None)
+        if usage is None:
+            return response
+
+        used = sorted(usage['used'])
+        unused = sorted(usage['provided'] - usage['used'])
+        logger.debug('%s used context keys %s, unused %s', request.path, used, unused)
+        if settings.DEBUG:
+            response['X-Context-Keys-Used'] = ','.join(used)
+            response['X-Context-Keys-Unused'] = ','.join(unused)
+        return response
@@ -0,0 +1,76 @@
+import base64
+import binascii
+import hashlib
+import re
+
+from ckeditor.fields import RichTextField
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# SVG stays inline, a script inside it would run on our own domain as a media file
+EXTENSIONS = {
+    'png': 'png',
+    'jpeg': 'jpg',
+    'jpg': 'jpg',
+    'gif': 'gif',
+    'webp': 'webp',
+    'bmp': 'bmp',
+}
+DATA_URI = re.compile(r'''(src\s*=\s*)(["'])data:image/([a-zA-Z0-9.+-]+);base64,([A-Za-z0-9+/=\s]+)\2''')
+INLINE_PATH = f'{getattr(settings, "CKEDITOR_UPLOAD_PATH", "uploads/")}inline/'
+
+
+def rich_text_fields(model):
+    return [field.attname for field in model._meta.concrete_fields if isinstance(field, RichTextField)]
+
+
+def rich_text_models():
+    return [model for model in apps.get_models() if rich_text_fields(model)]
+
+
+def store(data, extension):
+    """
+    URL of an image stored under the hash of its bytes, so the same image pasted
+    into many questions is one file and its URL never changes
+    """
+    name = f'{INLINE_PATH}{hashlib.sha256(data).hexdigest()}.{extension}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return default_storage.url(name)
+
+
+def extract(html):
+    """
+    HTML with every base64 image replaced by the URL of its stored file
+    """
+    if not html or 'data:image' not in html:
+        return html
+
+    def replace(match):
+        prefix, quote, image_type, payload = match.groups()
+        extension = EXTENSIONS.get(image_type.lower())
+        if extension is None:
+            return match.group(0)
+        try:
+            data = base64.b64decode(re.sub(r'\s', '', payload), validate=True)
+        except (binascii.Error, ValueError):
+            return match.group(0)
+        return f'{prefix}{quote}{store(data, extension)}{quote}'
+
+    return DATA_URI.sub(replace, html)
+
+
+def extract_fields(instance):
+    """
+    Extract the inline images of every rich text field, returns the fields that changed
+    """
+    changed = []
+    for name in rich_text_fields(type(instance)):
+        html = getattr(instance, name)
+        extracted = extract(html)
+        if extracted != html:
+            setattr(instance, name, extracted)
+            changed.append(name)
+    return changed
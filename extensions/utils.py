@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from . import jalali
 from django.utils import timezone
 
@@ -68,3 +70,69 @@ def change_month(date):
     for e, p in jmonth.items():
         month = month.replace(e, p)
     return f"{day} {month} {year}"
+
+
+def jalali_to_gregorian(value):
+    """
+    Gregorian date of a Jalali "1400-01-01" string, None when it is not a valid date
+    """
+    try:
+        return jalali.Persian(str(value).strip()).gregorian_datetime()
+    except Exception:
+        return None
+
+
+def gregorian_to_jalali(date):
+    """
+    Zero padded Jalali "1400-01-01" string of a Gregorian date
+    """
+    return "{:04d}-{:02d}-{:02d}".format(*jalali.Gregorian(date).persian_tuple())
+
+
+def _jalali_month_start(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return jalali.Persian(year, month, 1).gregorian_datetime()
+
+
+def jalali_day_range(day):
+    return day, day
+
+
+def jalali_week_range(day):
+    # Jalali weeks start on Saturday
+    start = day - timedelta(days=(day.weekday() - 5) % 7)
+    return start, start + timedelta(days=6)
+
+
+def jalali_month_range(day):
+    year, month, _ = jalali.Gregorian(day).persian_tuple()
+    return _jalali_month_start(year, month), _jalali_month_start(year, month + 1) - timedelta(days=1)
+
+
+# School terms as (first Jalali month, number of months): Mehr-Dey, Bahman-Khordad and summer
+TERMS = ((7, 4), (11, 5), (4, 3))
+
+
+def jalali_term_range(day):
+    year, month, _ = jalali.Gregorian(day).persian_tuple()
+    for first, length in TERMS:
+        if (month - first) % 12 < length:
+            start_year = year if month >= first else year - 1
+            return (_jalali_month_start(start_year, first),
+                    _jalali_month_start(start_year, first + length) - timedelta(days=1))
+
+
+JALALI_RANGES = {
+    'day': jalali_day_range,
+    'week': jalali_week_range,
+    'month': jalali_month_range,
+    'term': jalali_term_range,
+}
+
+
+def jalali_range(period, day=None):
+    """
+    Inclusive Gregorian (start, end) of the Jalali day, week, month or term
+    that contains the given Gregorian date (today by default)
+    """
+    return JALALI_RANGES[period](day or timezone.localdate())
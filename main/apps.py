@@ -5,3 +5,7 @@ class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main'
     verbose_name = '2. ماژول Main'
+
+    def ready(self):
+        from main.signals import connect_signals
+        connect_signals()
@@ -0,0 +1,92 @@
+from django.apps import apps
+from django.db.models import F
+
+# Counter name -> (model, filter the counted rows must match)
+COUNTERS = {
+    'notices': ('manager.NoticeBox', {}),
+    'events': ('manager.EventCalendar', {}),
+    'polls': ('poll.Poll', {}),
+    'employment_forms': ('manager.EmploymentForm', {}),
+    'parents': ('account.User', {'is_parent': True, 'is_active': True}),
+    'teachers': ('account.User', {'is_teacher': True, 'is_active': True}),
+    'students': ('account.User', {'is_student': True, 'is_active': True}),
+}
+
+
+def _counter_model():
+    return apps.get_model('main', 'Counter')
+
+
+def counted_models():
+    return [apps.get_model(label) for label in sorted({label for label, _ in COUNTERS.values()})]
+
+
+def counters_for(instance):
+    """
+    Names of the counters this instance is counted in,
+    None when a field they depend on was deferred
+    """
+    label = instance._meta.label
+    values = instance.__dict__
+    names = set()
+    for name, (model_label, filters) in COUNTERS.items():
+        if model_label != label:
+            continue
+        if any(field not in values for field in filters):
+            return None
+        if all(values[field] == value for field, value in filters.items()):
+            names.add(name)
+    return names
+
+
+def count_from_source(name):
+    label, filters = COUNTERS[name]
+    return apps.get_model(label).objects.filter(**filters).count()
+
+
+def increment(name, delta=1):
+    """
+    Atomically move a counter; a missing row is rebuilt from the source table
+    """
+    counter = _counter_model()
+    if not counter.objects.filter(name=name).update(value=F('value') + delta):
+        counter.objects.update_or_create(name=name, defaults={'value': count_from_source(name)})
+
+
+def get_counts():
+    """
+    Every counter in a single query
+    """
+    counts = dict.fromkeys(COUNTERS, 0)
+    counts.update(_counter_model().objects.filter(name__in=COUNTERS).values_list('name', 'value'))
+    return counts
+
+
+def get_count(name):
+    value = _counter_model().objects.filter(name=name).values_list('value', flat=True).first()
+    return value or 0
+
+
+def reconcile_model(model):
+    """
+    Recount the counters of a single model
+    """
+    counter = _counter_model()
+    for name, (label, _) in COUNTERS.items():
+        if label == model._meta.label:
+            counter.objects.update_or_create(name=name, defaults={'value': count_from_source(name)})
+
+
+def reconcile():
+    """
+    Recount every counter from its source table and return the ones that drifted
+    """
+    counter = _counter_model()
+    stored = dict(counter.objects.values_list('name', 'value'))
+    drifted = {}
+    for name in COUNTERS:
+        value = count_from_source(name)
+        if stored.get(name) != value:
+            counter.objects.update_or_create(name=name, defaults={'value': value})
+            drifted[name] = (stored.get(name), value)
+    return drifted
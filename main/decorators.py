@@ -22,7 +22,7 @@ def allow_user(user_permission_list):
             elif request.user.is_student:
                 user.append("is_student")
 
-            if user not in user_permission_list:
+            if not set(user) & set(user_permission_list):
                 return redirect(reverse_lazy('account:login'))
             else:
                 return view_func(request, *args, **kwargs)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from extensions import inline_images
+
+
+class Command(BaseCommand):
+    help = "Move base64 images already saved in rich text fields (quiz questions) into media files"
+
+    def handle(self, *args, **options):
+        count = 0
+        for model in inline_images.rich_text_models():
+            for name in inline_images.rich_text_fields(model):
+                rows = model._default_manager.filter(**{f'{name}__contains': 'data:image'}).order_by('pk')
+                for instance in rows.iterator():
+                    changed = inline_images.extract_fields(instance)
+                    if changed:
+                        # save() so the caches built from the row are refreshed as well
+                        instance.save(update_fields=changed)
+                        count += 1
+        self.stdout.write(self.style.SUCCESS(f"{count} row(s) rewritten"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from context_processors.cache import (
+    BUNDLE_MODELS,
+    invalidate,
+)
+from main.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recount the dashboard counters from their source tables (run it periodically, e.g. from cron)"
+
+    def handle(self, *args, **options):
+        drifted = reconcile()
+        for name, (stored, value) in drifted.items():
+            self.stdout.write(f"{name}: {stored} -> {value}")
+        if drifted:
+            invalidate(*BUNDLE_MODELS)
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted)} counter(s) reconciled"))
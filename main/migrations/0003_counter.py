@@ -0,0 +1,46 @@
+# Generated by Django 3.2 on 2026-10-17 19:45
+
+from django.db import migrations, models
+
+COUNTERS = {
+    'notices': ('manager', 'NoticeBox', {}),
+    'events': ('manager', 'EventCalendar', {}),
+    'polls': ('poll', 'Poll', {}),
+    'employment_forms': ('manager', 'EmploymentForm', {}),
+    'parents': ('account', 'User', {'is_parent': True, 'is_active': True}),
+    'teachers': ('account', 'User', {'is_teacher': True, 'is_active': True}),
+    'students': ('account', 'User', {'is_student': True, 'is_active': True}),
+}
+
+
+def seed_counters(apps, schema_editor):
+    Counter = apps.get_model('main', 'Counter')
+    Counter.objects.bulk_create([
+        Counter(name=name, value=apps.get_model(app_label, model_name).objects.filter(**filters).count())
+        for name, (app_label, model_name, filters) in COUNTERS.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_auto_20220219_0906'),
+        ('account', '0003_auto_20220219_0906'),
+        ('manager', '0006_alter_attendance_date'),
+        ('poll', '0002_auto_20220219_0906'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('name', models.CharField(max_length=30, primary_key=True, serialize=False, verbose_name='نام شمارنده')),
+                ('value', models.BigIntegerField(default=0, verbose_name='مقدار')),
+            ],
+            options={
+                'verbose_name': 'شمارنده',
+                'verbose_name_plural': '02. شمارنده ها',
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -48,3 +48,29 @@ class SiteSetting(models.Model):
     # Methods
     def __str__(self):
         return self.school_name
+
+
+class Counter(models.Model):
+    """
+    Model for denormalized dashboard counts, kept up to date by signals (main/counters.py)
+    """
+
+    # Fields
+    name = models.CharField(
+        max_length=30,
+        primary_key=True,
+        verbose_name="نام شمارنده",
+    )
+    value = models.BigIntegerField(
+        default=0,
+        verbose_name="مقدار",
+    )
+
+    # Metadata
+    class Meta:
+        verbose_name = 'شمارنده'
+        verbose_name_plural = '02. شمارنده ها'
+
+    # Methods
+    def __str__(self):
+        return f"{self.name}: {self.value}"
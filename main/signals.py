@@ -0,0 +1,143 @@
+from django.db import transaction
+from django.db.models.signals import (
+    post_init,
+    post_save,
+    post_delete,
+    pre_save,
+)
+from context_processors.cache import (
+    bundle_models,
+    invalidate_for_model,
+)
+from extensions import inline_images
+from main import counters
+from manager import summary
+from manager.models import Assign
+from poll import tallies
+from poll.models import PollOptions
+from quiz import analysis, paper
+from quiz.models import (
+    Quiz,
+    QuizDescAnswers,
+    QuizMultipleAnswers,
+    QuizQuestion,
+    QuizResult,
+)
+
+
+def invalidate_context_cache(sender, **kwargs):
+    # Logging in only touches last_login, which no bundle shows
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_for_model(sender)
+
+
+def snapshot_counters(sender, instance, **kwargs):
+    instance._counted_in = counters.counters_for(instance) if instance.pk else set()
+
+
+def update_counters(sender, instance, created, **kwargs):
+    before = set() if created else instance._counted_in
+    after = counters.counters_for(instance)
+    if before is None or after is None:
+        # A deferred instance does not know where it was counted
+        counters.reconcile_model(sender)
+    else:
+        for name in after - before:
+            counters.increment(name)
+        for name in before - after:
+            counters.increment(name, -1)
+    instance._counted_in = after
+
+
+def decrement_counters(sender, instance, **kwargs):
+    if instance._counted_in is None:
+        counters.reconcile_model(sender)
+        return
+    for name in instance._counted_in:
+        counters.increment(name, -1)
+
+
+def snapshot_summary(sender, instance, **kwargs):
+    instance._summary_key = summary.summary_key(instance) if instance.pk else None
+
+
+def update_summary(sender, instance, created, **kwargs):
+    before = None if created else instance._summary_key
+    after = summary.summary_key(instance)
+    if after is None or (before is None and not created):
+        # A deferred instance does not know what it was counted as
+        summary.rebuild([instance.student_id])
+    else:
+        summary.apply([(before, after)])
+    instance._summary_key = after
+
+
+def remove_from_summary(sender, instance, **kwargs):
+    if instance._summary_key is None:
+        summary.rebuild([instance.student_id])
+    else:
+        summary.apply([(instance._summary_key, None)])
+
+
+def extract_inline_images(sender, instance, **kwargs):
+    # Pasted images go to media files instead of every query of the row
+    inline_images.extract_fields(instance)
+
+
+def refresh_poll_tally(sender, instance, **kwargs):
+    transaction.on_commit(lambda: tallies.mark_dirty(instance.poll_id))
+
+
+def touch_quiz_paper(sender, instance, **kwargs):
+    if sender is QuizQuestion:
+        paper.touch_quiz(pk=instance.quiz_id)
+    else:
+        paper.touch_quiz(question_quiz=instance.question_id)
+
+
+def warm_quiz_paper(sender, instance, **kwargs):
+    # Compile once when the quiz goes live instead of when the whole class starts it
+    if instance.active:
+        transaction.on_commit(lambda: paper.get_paper(instance))
+
+
+def invalidate_quiz_analysis(sender, instance, created=True, **kwargs):
+    # Regrades only change existing rows and move quiz.updated instead.
+    # a result made inside finish_attempt is counted only once that commits
+    if created:
+        transaction.on_commit(lambda: analysis.invalidate(instance.quiz_id))
+
+
+def connect_signals():
+    # Counters go first, so a rebuilt context bundle never reads a stale count
+    for model in counters.counted_models():
+        label = model._meta.label
+        post_init.connect(snapshot_counters, sender=model, dispatch_uid=f'counters_init_{label}')
+        post_save.connect(update_counters, sender=model, dispatch_uid=f'counters_save_{label}')
+        post_delete.connect(decrement_counters, sender=model, dispatch_uid=f'counters_delete_{label}')
+
+    post_init.connect(snapshot_summary, sender=Assign, dispatch_uid='summary_init')
+    post_save.connect(update_summary, sender=Assign, dispatch_uid='summary_save')
+    post_delete.connect(remove_from_summary, sender=Assign, dispatch_uid='summary_delete')
+
+    for model in bundle_models():
+        label = model._meta.label
+        post_save.connect(invalidate_context_cache, sender=model, dispatch_uid=f'context_cache_save_{label}')
+        post_delete.connect(invalidate_context_cache, sender=model, dispatch_uid=f'context_cache_delete_{label}')
+
+    for model in inline_images.rich_text_models():
+        pre_save.connect(extract_inline_images, sender=model, dispatch_uid=f'inline_images_{model._meta.label}')
+
+    post_save.connect(refresh_poll_tally, sender=PollOptions, dispatch_uid='poll_tally_save')
+    post_delete.connect(refresh_poll_tally, sender=PollOptions, dispatch_uid='poll_tally_delete')
+
+    post_save.connect(warm_quiz_paper, sender=Quiz, dispatch_uid='quiz_paper_warm')
+    for model in (QuizQuestion, QuizMultipleAnswers, QuizDescAnswers):
+        label = model._meta.label
+        post_save.connect(touch_quiz_paper, sender=model, dispatch_uid=f'quiz_paper_save_{label}')
+        post_delete.connect(touch_quiz_paper, sender=model, dispatch_uid=f'quiz_paper_delete_{label}')
+
+    post_save.connect(invalidate_quiz_analysis, sender=QuizResult, dispatch_uid='quiz_analysis_save')
+    post_delete.connect(invalidate_quiz_analysis, sender=QuizResult, dispatch_uid='quiz_analysis_delete')
@@ -1,7 +1,32 @@
-from django.test import TestCase, Client
-from main.models import SiteSetting
+import base64
+import shutil
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, RequestFactory, override_settings
+from main.counters import (
+    get_counts,
+    reconcile,
+)
+from main.models import SiteSetting, Counter
 from django.urls import reverse
 from account.models import User
+from context_processors.context_processors import (
+    user_context_processor,
+    calendar_context_processor,
+    site_setting_context_processor,
+    notices_context_processor,
+)
+from context_processors.middleware import ContextUsageMiddleware
+from django.http import HttpResponse
+from extensions import inline_images
+from extensions.export import export_rows, stream_csv, yes_no
+from extensions.utils import gregorian_to_jalali, jalali_range, jalali_to_gregorian
+from manager.models import Books, Classes, NoticeBox
+from quiz.models import Quiz, QuizQuestion
 
 
 # unit test for models:
@@ -88,4 +113,248 @@ class TestUrls(TestCase):
         url = reverse('main:student_detail', args=[student_id])
         self.assertEqual(url, f'/student/{student_id}/detail/')
 
+    def test_class_attendance_url(self):
+        url = reverse('main:class_attendance', args=[1])
+        self.assertEqual(url, '/class/1/attendance/')
+
+    def test_class_attendance_export_url(self):
+        url = reverse('main:class_attendance_export', args=[1])
+        self.assertEqual(url, '/class/1/attendance/export/')
+
+    def test_employment_form_export_url(self):
+        url = reverse('main:employment_form_export')
+        self.assertEqual(url, '/employment-form/export/')
+
+
+
+
+# unit test for context processors cache:
+class ContextProcessorCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.manager = User.objects.create_user(username='manager', password='testpassword', national_code='1',
+                                                is_manager=True)
+        self.writer = User.objects.create_user(username='writer', password='testpassword', national_code='2')
+        NoticeBox.objects.create(writer=self.writer, title='Notice 1', description='Description')
+
+    def get_request(self, user):
+        request = self.factory.get('/')
+        request.user = user
+        return request
+
+    def render_context(self, user, request=None):
+        request = request or self.get_request(user)
+        context = {}
+        for processor in (user_context_processor, calendar_context_processor,
+                          site_setting_context_processor, notices_context_processor):
+            context.update(processor(request))
+        # Read every value, as a full page would
+        for value in context.values():
+            str(value)
+        return context
+
+    def test_second_call_is_served_from_cache(self):
+        self.render_context(self.manager)
+        with self.assertNumQueries(0):
+            context = self.render_context(self.manager)
+        self.assertEqual(context['count_notice_header'], 1)
+        self.assertEqual(context['notices_header'][0].writer, self.writer)
+
+    def test_manager_bundle_is_hidden_from_other_roles(self):
+        context = self.render_context(self.writer)
+        self.assertNotIn('poll_count', context)
+        self.assertIn('poll_count', self.render_context(self.manager))
+
+    def test_save_invalidates_bundle(self):
+        self.render_context(self.manager)
+        NoticeBox.objects.create(writer=self.writer, title='Notice 2', description='Description')
+        self.assertEqual(self.render_context(self.manager)['count_notice_header'], 2)
+
+    def test_delete_invalidates_bundle(self):
+        self.render_context(self.manager)
+        NoticeBox.objects.all().delete()
+        self.assertEqual(self.render_context(self.manager)['notices_header'], [])
+
+    def test_login_does_not_invalidate_bundle(self):
+        self.render_context(self.manager)
+        self.client.login(username='writer', password='testpassword')
+        with self.assertNumQueries(0):
+            self.render_context(self.manager)
+
+    def test_values_are_lazy(self):
+        request = self.get_request(self.manager)
+        with self.assertNumQueries(0):
+            context = notices_context_processor(request)
+        self.assertEqual(request.context_usage['used'], set())
+        self.assertEqual(context['count_notice_header'], 1)
+        self.assertEqual(request.context_usage['used'], {'count_notice_header'})
+        self.assertEqual(request.context_usage['provided'], {'count_notice_header', 'notices_header'})
+
+    def test_bundle_is_loaded_once_per_request(self):
+        cache.clear()
+        request = self.get_request(self.manager)
+        context = notices_context_processor(request)
+        with self.assertNumQueries(2):
+            str(context['count_notice_header'])
+            str(context['notices_header'])
+
+    def test_usage_middleware_reports_keys(self):
+        request = self.get_request(self.manager)
+        context = notices_context_processor(request)
+        str(context['notices_header'])
+        with self.settings(DEBUG=True):
+            response = ContextUsageMiddleware(lambda request: HttpResponse())(request)
+        self.assertEqual(response['X-Context-Keys-Used'], 'notices_header')
+        self.assertEqual(response['X-Context-Keys-Unused'], 'count_notice_header')
+
+
+# unit test for counters:
+class CounterTestCase(TestCase):
+
+    def setUp(self):
+        self.student = User.objects.create_user(username='student', password='testpassword', national_code='1',
+                                                is_student=True)
+
+    def test_create_increments(self):
+        User.objects.create_user(username='student2', password='testpassword', national_code='2', is_student=True)
+        self.assertEqual(get_counts()['students'], 2)
+
+    def test_role_change_moves_counts(self):
+        self.student.is_student = False
+        self.student.is_teacher = True
+        self.student.save()
+        counts = get_counts()
+        self.assertEqual(counts['students'], 0)
+        self.assertEqual(counts['teachers'], 1)
+
+    def test_delete_decrements(self):
+        User.objects.filter(pk=self.student.pk).first().delete()
+        self.assertEqual(get_counts()['students'], 0)
+
+    def test_deferred_instance_is_reconciled(self):
+        student = User.objects.only('id', 'first_name').get(pk=self.student.pk)
+        student.is_active = False
+        student.save()
+        self.assertEqual(get_counts()['students'], 0)
+
+    def test_counts_are_read_in_one_query(self):
+        with self.assertNumQueries(1):
+            get_counts()
+
+    def test_reconcile_fixes_drift(self):
+        Counter.objects.filter(name='students').update(value=10)
+        self.assertEqual(reconcile(), {'students': (10, 1)})
+        self.assertEqual(get_counts()['students'], 1)
+        self.assertEqual(reconcile(), {})
+
+
+# unit test for jalali date ranges:
+class JalaliRangeTestCase(TestCase):
+
+    def jalali_range(self, period, day):
+        return [gregorian_to_jalali(boundary) for boundary in jalali_range(period, day)]
+
+    def test_conversion(self):
+        self.assertEqual(jalali_to_gregorian('1400-01-01'), date(2021, 3, 21))
+        self.assertEqual(gregorian_to_jalali(date(2021, 3, 21)), '1400-01-01')
+        self.assertIsNone(jalali_to_gregorian('not a date'))
+
+    def test_week_starts_on_saturday(self):
+        self.assertEqual(self.jalali_range('week', date(2021, 3, 21)), ['1399-12-30', '1400-01-06'])
+
+    def test_month_includes_leap_day(self):
+        self.assertEqual(self.jalali_range('month', date(2021, 3, 1)), ['1399-12-01', '1399-12-30'])
+
+    def test_terms(self):
+        self.assertEqual(self.jalali_range('term', date(2023, 10, 1)), ['1402-07-01', '1402-10-30'])
+        self.assertEqual(self.jalali_range('term', date(2021, 3, 21)), ['1399-11-01', '1400-03-31'])
+
+
+# unit test for exports:
+class ExportTestCase(TestCase):
+    columns = (
+        ('نام', 'first_name'),
+        ('کد ملی', 'national_code'),
+        ('مدیر', 'is_manager', yes_no),
+    )
+
+    def setUp(self):
+        for index in range(5):
+            User.objects.create(username=f'user{index}', first_name=f'name, {index}', national_code=str(index),
+                                is_manager=index == 0)
+
+    def test_export_rows(self):
+        lines = list(export_rows(self.columns, User.objects.order_by('id'), chunk_size=2))
+        self.assertEqual(lines[0], '\ufeffنام,کد ملی,مدیر\r\n')
+        self.assertEqual(lines[1:3], ['"name, 0",0,بله\r\n', '"name, 1",1,خیر\r\n'])
+        self.assertEqual(len(lines), 6)
+
+    def test_formulas_are_escaped(self):
+        User.objects.filter(username='user1').update(first_name='=HYPERLINK("http://evil.example","x")')
+        User.objects.filter(username='user2').update(first_name='@SUM(1+1)')
+        lines = list(export_rows(self.columns, User.objects.order_by('id')))
+        self.assertEqual(lines[2], '"\'=HYPERLINK(""http://evil.example"",""x"")",1,خیر\r\n')
+        self.assertEqual(lines[3], "'@SUM(1+1),2,خیر\r\n")
+        self.assertEqual(lines[1], '"name, 0",0,بله\r\n')
+
+    def test_stream_csv(self):
+        response = stream_csv('users', self.columns, User.objects.order_by('id'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.csv"')
+        self.assertEqual(b''.join(response.streaming_content).decode().count('\r\n'), 6)
+
+    def test_export_views(self):
+        self.client.force_login(User.objects.get(username='user0'))
+        classes = Classes.objects.create(name='Class A')
+        for url in (reverse('main:class_attendance_export', args=[classes.pk]), reverse('main:employment_form_export')):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+
+
+# unit test for inline images:
+class InlineImagesTestCase(TestCase):
+    PNG = base64.b64encode(b'\x89PNG\r\n\x1a\n fake image').decode()
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        settings = override_settings(MEDIA_ROOT=self.media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.quiz = Quiz.objects.create(
+            name='Image Quiz',
+            quiz_class=Classes.objects.create(name='Test Class'),
+            quiz_book=Books.objects.create(name='Test Book', units=3),
+            time=30,
+        )
+
+    def html(self, image_type='png'):
+        return f'<p>Look <img alt="" src="data:image/{image_type};base64,{self.PNG}" /></p>'
+
+    def test_extract_is_content_addressed(self):
+        first, second = inline_images.extract(self.html()), inline_images.extract(self.html() * 2)
+        self.assertNotIn('data:image', first + second)
+        url = first.split('src="')[1].split('"')[0]
+        self.assertTrue(url.endswith('.png'))
+        self.assertEqual(second.count(url), 2)
+        # Unsupported or broken images stay inline
+        self.assertEqual(inline_images.extract(self.html('svg+xml')), self.html('svg+xml'))
+        broken = '<img src="data:image/png;base64,@@@">'
+        self.assertEqual(inline_images.extract(broken), broken)
+
+    def test_question_save_extracts_images(self):
+        question = QuizQuestion.objects.create(id=1, text=self.html(), quiz=self.quiz)
+        question.refresh_from_db()
+        self.assertNotIn('data:image', question.text)
+        self.assertIn('/uploads/inline/', question.text)
 
+    def test_extract_inline_images_command(self):
+        QuizQuestion.objects.create(id=1, text='<p>plain</p>', quiz=self.quiz)
+        QuizQuestion.objects.filter(pk=1).update(text=self.html())
+        out = StringIO()
+        call_command('extract_inline_images', stdout=out)
+        self.assertIn('1 row(s) rewritten', out.getvalue())
+        self.assertNotIn('data:image', QuizQuestion.objects.get(pk=1).text)
@@ -16,6 +16,8 @@ urlpatterns = (
     # Class Section
     path('class/list/', views.class_list, name="class_list"),
     path('class/<int:pk>/detail/', views.class_detail, name="class_detail"),
+    path('class/<int:pk>/attendance/', views.class_attendance, name="class_attendance"),
+    path('class/<int:pk>/attendance/export/', views.class_attendance_export, name="class_attendance_export"),
     # Attendance Section
     path('attendance/<int:pk>/<date>/detail/', views.attendance_detail, name="attendance_detail"),
     # Home Work Section
@@ -23,6 +25,7 @@ urlpatterns = (
     path('home-work/<int:pk>/detail/', views.home_work_detail, name="home_work_detail"),
     # Employment Form Section
     path('employment-form/list/', views.employment_form_list, name="employment_form_list"),
+    path('employment-form/export/', views.employment_form_export, name="employment_form_export"),
     path('employment-form/<int:pk>/detail/', views.employment_form_detail, name="employment_form_detail"),
     # News
     path('news/list/', views.news_list, name="news_list"),
@@ -1,15 +1,15 @@
 import jdatetime
 import feedparser
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from django.shortcuts import (
     render,
     get_object_or_404, redirect,
 )
 from django.urls import reverse_lazy
 from django.utils import timezone
-from extensions.utils import change_month
+from extensions.export import jalali_datetime, stream_csv
+from extensions.utils import JALALI_RANGES, change_month, gregorian_to_jalali, jalali_range, jalali_to_gregorian
 from account.models import User
 from main.decorators import (
     allow_user,
@@ -32,8 +32,9 @@ from manager.models import (
     Books,
     HomeWork,
     EmploymentForm,
-    Assign,
 )
+from manager.attendance import attendance_matrix, attendance_records
+from manager.summary import get_summary
 
 
 def index(request):
@@ -70,46 +71,15 @@ def notice_box(request):
 @parent_access()
 @allow_user(['is_superuser', 'is_manager', 'is_parent', 'is_student'])
 def student_detail(request, pk):
-    def all_status_func():
-        all_status = Assign.objects.filter(student=pk).aggregate(count=Count('id'))
-        count_all = 0
-        if all_status["count"] is not None:
-            count_all = int(all_status["count"])
-        return count_all
-
-    def present_percent():
-        present = Assign.objects.filter(student=pk, attendance_status='حاضر').aggregate(count=Count('id'))
-        count_present = 0
-        if present["count"] is not None:
-            count_present = int(present["count"])
-        result = round((count_present / all_status_func()) * 100, 0)
-        return result
-
-    def absent_percent():
-        absent = Assign.objects.filter(student=pk, attendance_status='غایب').aggregate(count=Count('id'))
-        count_present = 0
-        if absent["count"] is not None:
-            count_present = int(absent["count"])
-        result = round((count_present / all_status_func()) * 100, 0)
-        return result
-
-    def plate_percent():
-        plate = Assign.objects.filter(student=pk, attendance_status='حاضر (با تاخیر)').aggregate(
-            count=Count('id'))
-        count_present = 0
-        if plate["count"] is not None:
-            count_present = int(plate["count"])
-        result = round((count_present / all_status_func()) * 100, 0)
-        return result
-
+    summary = get_summary(pk)
     user = User.objects.filter(is_active=True, is_student=True)
     context = {
         'person': get_object_or_404(user, pk=pk),
         'page_title': 'جزئیات دانش آموز',
         'majors': Major.objects.all(),
-        'present': present_percent(),
-        'absent': absent_percent(),
-        'plate': plate_percent(),
+        'present': summary.present_percent,
+        'absent': summary.absent_percent,
+        'plate': summary.late_percent,
     }
     return render(request, "main/persons/person_detail.html", context)
 
@@ -158,18 +128,94 @@ def class_detail(request, pk):
     context = {
         "class": cls,
         "page_title": "جزئیات کلاس",
-        'atts': Classes.objects.filter(pk=pk, attendance_class__pk=pk),
+        'atts': cls.attendance_class.select_related('attendance_class', 'book'),
         'jalali_date': change_month(str(jdatetime.date.fromgregorian(date=timezone.now()))),
         'books': Books.objects.filter(grade__pk=cls.grade.pk, major__pk=cls.major.pk),
     }
     return render(request, "main/classes/class_detail.html", context)
 
 
+def attendance_filters(params):
+    """
+    Book and Gregorian date range from the attendance filter form,
+    Jalali dates and periods become Gregorian boundaries
+    """
+    input_value = {
+        'book': params.get('book') or None,
+        'period': params.get('period') or None,
+        'start': params.get('start') or None,
+        'end': params.get('end') or None,
+    }
+    if input_value['book'] and not input_value['book'].isdigit():
+        input_value['book'] = None
+    if input_value['period'] in JALALI_RANGES:
+        start, end = jalali_range(input_value['period'])
+    else:
+        start, end = jalali_to_gregorian(input_value['start']), jalali_to_gregorian(input_value['end'])
+    return input_value, start, end
+
+
+@allow_class_teacher()
+@allow_user(['is_superuser', 'is_manager', 'is_teacher'])
+def class_attendance(request, pk):
+    cls = get_object_or_404(Classes, pk=pk)
+    input_value, start, end = attendance_filters(request.GET)
+    matrix = attendance_matrix(cls.pk, input_value['book'], start, end)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(matrix)
+
+    labels = [None] + matrix['statuses']
+    context = {
+        "class": cls,
+        "page_title": "ماتریس حضور و غیاب",
+        "books": cls.books.all(),
+        "filters": input_value,
+        "sessions": matrix['sessions'],
+        "rows": [
+            (student, [labels[code] for code in cells])
+            for student, cells in zip(matrix['students'], matrix['matrix'])
+        ],
+    }
+    return render(request, "main/classes/class_attendance.html", context)
+
+
+ATTENDANCE_EXPORT_COLUMNS = (
+    ('تاریخ', 'attendance__date', gregorian_to_jalali),
+    ('درس', 'attendance__book__name'),
+    ('نام', 'student__first_name'),
+    ('نام خانوادگی', 'student__last_name'),
+    ('کد ملی', 'student__national_code'),
+    ('وضعیت', 'attendance_status'),
+    ('توضیحات', 'attendance_note'),
+)
+
+
+@allow_class_teacher()
+@allow_user(['is_superuser', 'is_manager', 'is_teacher'])
+def class_attendance_export(request, pk):
+    cls = get_object_or_404(Classes, pk=pk)
+    input_value, start, end = attendance_filters(request.GET)
+    assigns = attendance_records(cls.pk, input_value['book'], start, end)
+    return stream_csv(f'attendance-{cls.pk}', ATTENDANCE_EXPORT_COLUMNS, assigns)
+
+
 @allow_att_teacher()
 @allow_user(['is_superuser', 'is_manager', 'is_teacher'])
 def attendance_detail(request, pk, date):
+    date = jalali_to_gregorian(date)
+    if date is None:
+        raise Http404()
+    attendances = Attendance.objects.select_related(
+        'book', 'attendance_class', 'attendance_class__grade', 'attendance_class__major')
+    attendance = get_object_or_404(attendances, pk=pk, date=date)
+    # Latest record of each student, so the roster is built in one pass
+    assigns = {assign.student_id: assign for assign in attendance.att_assign.order_by('id')}
     context = {
-        "attendance": get_object_or_404(Attendance, pk=pk, date=date),
+        "attendance": attendance,
+        "roster": [
+            (student, assigns.get(student.pk))
+            for student in attendance.attendance_class.student_class.all()
+        ],
         "page_title": "جزئیات حضور و غیاب",
     }
     return render(request, "main/classes/class_detail.html", context)
@@ -212,6 +258,22 @@ def employment_form_list(request):
     return render(request, 'main/classes/class_list.html', context)
 
 
+EMPLOYMENT_FORM_EXPORT_COLUMNS = (
+    ('نام', 'student__first_name'),
+    ('نام خانوادگی', 'student__last_name'),
+    ('کد ملی', 'student__national_code'),
+    ('ارگان', 'organ'),
+    ('وضعیت', 'status'),
+    ('تاریخ ثبت', 'create', jalali_datetime),
+)
+
+
+@allow_user(['is_superuser', 'is_manager'])
+def employment_form_export(request):
+    forms = EMPFormFilter(request.GET, queryset=EmploymentForm.objects.order_by('id')).qs
+    return stream_csv('employment-forms', EMPLOYMENT_FORM_EXPORT_COLUMNS, forms)
+
+
 @allow_emp_form_student()
 @allow_user(['is_superuser', 'is_manager', 'is_student'])
 def employment_form_detail(request, pk):
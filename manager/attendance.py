@@ -0,0 +1,252 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from account.models import User
+from extensions.utils import gregorian_to_jalali
+from manager import summary
+from manager.models import Assign, Attendance, Books, Classes
+
+STATUSES = {status for status, _ in Assign.ATTENDANCE_STATUS}
+
+
+class RollCallError(ValueError):
+    pass
+
+
+def clean_records(records):
+    """
+    Validate a roll call payload.
+    every record is a dict with a "student" id and optional "status" and "note",
+    a key that is left out keeps the stored value
+    """
+    cleaned = {}
+    for record in records:
+        try:
+            student_id = int(record['student'])
+        except (KeyError, TypeError, ValueError):
+            raise RollCallError('شناسه دانش آموز معتبر نیست')
+        if 'status' in record and record['status'] not in STATUSES:
+            raise RollCallError('وضعیت حضور و غیاب معتبر نیست')
+        values = {}
+        if 'status' in record:
+            values['attendance_status'] = record['status']
+        if 'note' in record:
+            values['attendance_note'] = record['note'] or None
+        # Later records for the same student win, like repeated clicks
+        cleaned.setdefault(student_id, {}).update(values)
+    return cleaned
+
+
+def apply_roll_call(attendance_id, records):
+    """
+    Apply a whole class's statuses and notes to one attendance list.
+    rows are upserted per (attendance, student) with one bulk_create and one
+    bulk_update, so sending the same roll call twice changes nothing
+    """
+    records = clean_records(records)
+    with transaction.atomic():
+        # Lock the attendance so two teachers saving at once can't both create rows
+        attendance = Attendance.objects.select_for_update().get(pk=attendance_id)
+        existing = list(Assign.objects.filter(attendance=attendance, student_id__in=records))
+        missing = set(records) - {assign.student_id for assign in existing}
+        if missing:
+            students = set(User.objects.filter(
+                pk__in=missing,
+                student_class_id=attendance.attendance_class_id,
+                is_student=True,
+            ).order_by().values_list('pk', flat=True))
+            if missing - students:
+                raise RollCallError('دانش آموز در این کلاس نیست')
+
+        to_update = []
+        fields = set()
+        changes = []
+        for assign in existing:
+            before = summary.summary_key(assign)
+            changed = {
+                name: value for name, value in records[assign.student_id].items()
+                if getattr(assign, name) != value
+            }
+            if changed:
+                for name, value in changed.items():
+                    setattr(assign, name, value)
+                fields.update(changed)
+                to_update.append(assign)
+                changes.append((before, summary.summary_key(assign)))
+
+        to_create = [
+            Assign(attendance=attendance, student_id=student_id, **records[student_id])
+            for student_id in sorted(missing)
+        ]
+        Assign.objects.bulk_create(to_create)
+        if to_update:
+            Assign.objects.bulk_update(to_update, sorted(fields))
+        # Bulk writes send no signals, so the summaries are moved here
+        changes.extend((None, summary.summary_key(assign)) for assign in to_create)
+        summary.apply(changes)
+    return {'created': len(to_create), 'updated': len(to_update)}
+
+
+# Matrix cell codes, 0 means no record for that student and session
+STATUS_CODES = {status: code for code, (status, _) in enumerate(Assign.ATTENDANCE_STATUS, start=1)}
+
+
+def attendance_records(classes_id, book_id=None, start=None, end=None):
+    """
+    Assign rows of a class, optionally of one book and between Gregorian start and end
+    """
+    assigns = Assign.objects.filter(attendance__attendance_class_id=classes_id)
+    if book_id:
+        assigns = assigns.filter(attendance__book_id=book_id)
+    if start:
+        assigns = assigns.filter(attendance__date__gte=start)
+    if end:
+        assigns = assigns.filter(attendance__date__lte=end)
+    return assigns.order_by('attendance__date', 'attendance_id', 'id')
+
+
+def attendance_matrix(classes_id, book_id=None, start=None, end=None):
+    """
+    Students x sessions attendance of a class between Gregorian start and end.
+    all cells come from one Assign query pivoted in memory, the roster adds
+    students that have no record yet. "matrix" holds one list of status
+    codes per student, in the order of "students" and "sessions"
+    """
+    rows = attendance_records(classes_id, book_id, start, end).values_list(
+        'attendance_id', 'attendance__date', 'attendance__book__name',
+        'student_id', 'student__first_name', 'student__last_name',
+        'attendance_status',
+    )
+
+    sessions, session_index = [], {}
+    names, cells = {}, []
+    for attendance_id, date, book, student_id, first_name, last_name, status in rows:
+        if attendance_id not in session_index:
+            session_index[attendance_id] = len(sessions)
+            sessions.append({'id': attendance_id, 'date': gregorian_to_jalali(date), 'book': book})
+        names[student_id] = f'{first_name} {last_name}'.strip()
+        cells.append((student_id, session_index[attendance_id], STATUS_CODES.get(status, 0)))
+
+    roster = User.objects.filter(student_class_id=classes_id, is_student=True).values_list(
+        'id', 'first_name', 'last_name')
+    for student_id, first_name, last_name in roster:
+        names.setdefault(student_id, f'{first_name} {last_name}'.strip())
+
+    students = sorted(({'id': student_id, 'name': name} for student_id, name in names.items()),
+                      key=lambda student: (student['name'], student['id']))
+    student_index = {student['id']: index for index, student in enumerate(students)}
+    matrix = [[0] * len(sessions) for _ in students]
+    for student_id, session, code in cells:
+        # Rows are ordered by id, so the latest of duplicate records wins
+        matrix[student_index[student_id]][session] = code
+    return {
+        'statuses': [status for status, _ in Assign.ATTENDANCE_STATUS],
+        'sessions': sessions,
+        'students': students,
+        'matrix': matrix,
+    }
+
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def is_school_day(day, skip=()):
+    """
+    False for weekend days and for Jalali holidays in settings or in skip
+    """
+    if day.weekday() in getattr(settings, 'ATTENDANCE_WEEKEND', (4,)):
+        return False
+    jalali_day = gregorian_to_jalali(day)
+    holidays = set(getattr(settings, 'ATTENDANCE_HOLIDAYS', ())) | set(skip)
+    return jalali_day not in holidays and jalali_day[5:] not in holidays
+
+
+def class_book_pairs(day, timetable=None):
+    """
+    (class id, book id) pairs that meet on the given day.
+    a timetable maps lowercase weekday names to such pairs, without one
+    every book of every class is used
+    """
+    if timetable is not None:
+        return [tuple(pair) for pair in timetable.get(WEEKDAYS[day.weekday()], ())]
+    return list(Classes.books.through.objects.values_list('classes_id', 'books_id'))
+
+
+def sheet_teachers(pairs):
+    """
+    Teacher of every (class, book) pair: one who teaches both, else any class teacher
+    """
+    class_ids = {class_id for class_id, _ in pairs}
+    class_teachers = defaultdict(set)
+    for class_id, user_id in Classes.teacher.through.objects.filter(
+            classes_id__in=class_ids).values_list('classes_id', 'user_id'):
+        class_teachers[class_id].add(user_id)
+    book_teachers = defaultdict(set)
+    for book_id, user_id in Books.teacher.through.objects.filter(
+            books_id__in={book_id for _, book_id in pairs}).values_list('books_id', 'user_id'):
+        book_teachers[book_id].add(user_id)
+
+    teachers = {}
+    for class_id, book_id in pairs:
+        candidates = (class_teachers[class_id] & book_teachers[book_id]) or class_teachers[class_id]
+        if candidates:
+            teachers[class_id, book_id] = min(candidates)
+    return teachers
+
+
+def generate_attendance(day, timetable=None, skip=()):
+    """
+    Create the day's attendance sheets of the lessons in the timetable with every
+    enrolled student marked present, so teachers only change the exceptions.
+    without a timetable every book of every class gets a sheet, but nobody is
+    marked: most of those lessons do not meet that day and must not count.
+    sheets and records that already exist are kept, so it is safe to run again
+    (also at the same time, a sheet is unique per class, book and date);
+    returns None on days off
+    """
+    day = day or timezone.localdate()
+    if not is_school_day(day, skip):
+        return None
+    pairs = set(class_book_pairs(day, timetable))
+    teachers = sheet_teachers(pairs)
+    class_ids = {class_id for class_id, _ in pairs}
+
+    with transaction.atomic():
+        day_sheets = Attendance.objects.filter(date=day, attendance_class_id__in=class_ids).order_by()
+        existing = set(day_sheets.values_list('attendance_class_id', 'book_id'))
+        new_sheets = [
+            Attendance(attendance_class_id=class_id, book_id=book_id, teacher_id=teachers[class_id, book_id], date=day)
+            for class_id, book_id in sorted(pairs - existing)
+            if (class_id, book_id) in teachers
+        ]
+        Attendance.objects.bulk_create(new_sheets, ignore_conflicts=True)
+        # bulk_create does not return ids on every backend, so the sheets are read back.
+        # they are locked, so a second run waits here and then finds every record made
+        rows = list(day_sheets.select_for_update().values_list('id', 'attendance_class_id', 'book_id'))
+        sheets = [(attendance_id, class_id) for attendance_id, class_id, book_id in rows if (class_id, book_id) in pairs]
+
+        students = defaultdict(list)
+        for student_id, class_id in User.objects.filter(
+                student_class_id__in=class_ids, is_student=True, is_active=True,
+        ).order_by().values_list('id', 'student_class_id'):
+            students[class_id].append(student_id)
+        recorded = set(Assign.objects.filter(
+            attendance_id__in=[attendance_id for attendance_id, _ in sheets],
+        ).values_list('attendance_id', 'student_id'))
+        assigns = [
+            Assign(attendance_id=attendance_id, student_id=student_id, attendance_status='حاضر')
+            for attendance_id, class_id in sheets
+            for student_id in students[class_id]
+            if (attendance_id, student_id) not in recorded
+        ] if timetable is not None else []
+        Assign.objects.bulk_create(assigns, batch_size=1000)
+        summary.apply((None, summary.summary_key(assign)) for assign in assigns)
+
+    return {
+        'sheets': len({(class_id, book_id) for _, class_id, book_id in rows} & pairs - existing),
+        'assigns': len(assigns),
+        'without_teacher': sorted(pairs - set(teachers)),
+    }
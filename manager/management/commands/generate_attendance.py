@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from extensions.utils import jalali_to_gregorian
+from manager.attendance import generate_attendance
+
+
+class Command(BaseCommand):
+    help = ("Create the day's attendance sheets of the lessons in a timetable with every student marked present "
+            "(run it every morning, e.g. from cron)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Jalali date like 1402-07-01, today by default")
+        lessons = parser.add_mutually_exclusive_group(required=True)
+        lessons.add_argument('--timetable', help="JSON file mapping weekday names to [class id, book id] pairs")
+        lessons.add_argument('--all-lessons', action='store_true',
+                             help="a sheet for every book of every class, with nobody marked")
+        parser.add_argument('--skip', nargs='*', default=(), help="extra Jalali holidays to skip")
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            day = jalali_to_gregorian(options['date'])
+            if day is None:
+                raise CommandError(f"Invalid date {options['date']}")
+        timetable = None
+        if options['timetable']:
+            with open(options['timetable'], encoding='utf-8') as timetable_file:
+                timetable = json.load(timetable_file)
+
+        result = generate_attendance(day, timetable, options['skip'])
+        if result is None:
+            self.stdout.write("No school on this day, nothing to do")
+            return
+        for class_id, book_id in result['without_teacher']:
+            self.stderr.write(f"Class {class_id} has no teacher, book {book_id} skipped")
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['sheets']} sheet(s) and {result['assigns']} record(s) created"
+        ))
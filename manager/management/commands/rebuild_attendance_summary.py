@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from manager.summary import rebuild
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-student attendance summaries from Assign (for backfills and after raw data fixes)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('students', nargs='*', type=int, help="only rebuild these student ids")
+
+    def handle(self, *args, **options):
+        count = rebuild(options['students'] or None)
+        self.stdout.write(self.style.SUCCESS(f"{count} attendance summary(s) rebuilt"))
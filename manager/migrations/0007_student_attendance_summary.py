@@ -0,0 +1,52 @@
+# Generated by Django 3.2 on 2026-10-17 19:51
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def build_summaries(apps, schema_editor):
+    Assign = apps.get_model('manager', 'Assign')
+    StudentAttendanceSummary = apps.get_model('manager', 'StudentAttendanceSummary')
+    rows = Assign.objects.values('student').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(attendance_status='حاضر')),
+        absent=Count('id', filter=Q(attendance_status='غایب')),
+        late=Count('id', filter=Q(attendance_status='حاضر (با تاخیر)')),
+    ).order_by()
+    StudentAttendanceSummary.objects.bulk_create([
+        StudentAttendanceSummary(
+            student_id=row['student'],
+            total=row['total'],
+            present=row['present'],
+            absent=row['absent'],
+            late=row['late'],
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_user_name_indexes'),
+        ('manager', '0006_alter_attendance_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAttendanceSummary',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attendance_summary', serialize=False, to='account.user', verbose_name='دانش آموز')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='تعداد کل')),
+                ('present', models.PositiveIntegerField(default=0, verbose_name='حاضر')),
+                ('absent', models.PositiveIntegerField(default=0, verbose_name='غایب')),
+                ('late', models.PositiveIntegerField(default=0, verbose_name='حاضر (با تاخیر)')),
+            ],
+            options={
+                'verbose_name': 'خلاصه حضور و غیاب',
+                'verbose_name_plural': 'خلاصه های حضور و غیاب',
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-17 20:30
+
+from django.db import migrations, models
+from django.utils import timezone
+
+from extensions.utils import gregorian_to_jalali, jalali_to_gregorian
+
+
+def to_gregorian(apps, schema_editor):
+    Attendance = apps.get_model('manager', 'Attendance')
+    attendances = list(Attendance.objects.only('id', 'date', 'create'))
+    for attendance in attendances:
+        # Unreadable strings fall back to the day the list was made
+        attendance.gregorian_date = (jalali_to_gregorian(attendance.date)
+                                     or timezone.localdate(attendance.create))
+    Attendance.objects.bulk_update(attendances, ['gregorian_date'], batch_size=500)
+
+
+def to_jalali(apps, schema_editor):
+    Attendance = apps.get_model('manager', 'Attendance')
+    attendances = list(Attendance.objects.only('id', 'gregorian_date'))
+    for attendance in attendances:
+        attendance.date = gregorian_to_jalali(attendance.gregorian_date)
+    Attendance.objects.bulk_update(attendances, ['date'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0007_student_attendance_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='gregorian_date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(to_gregorian, to_jalali),
+    ]
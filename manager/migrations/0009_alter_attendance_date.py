@@ -0,0 +1,32 @@
+# Generated by Django 3.2 on 2026-10-17 20:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0008_attendance_gregorian_date'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='attendance',
+            name='date',
+        ),
+        migrations.RenameField(
+            model_name='attendance',
+            old_name='gregorian_date',
+            new_name='date',
+        ),
+        migrations.AlterField(
+            model_name='attendance',
+            name='date',
+            field=models.DateField(default=django.utils.timezone.localdate, verbose_name='تاریخ کلاس'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['attendance_class', 'date'], name='attendance_class_date_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2 on 2026-10-17 20:29
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+
+
+def rebuild_summaries(apps, student_ids):
+    Assign = apps.get_model('manager', 'Assign')
+    StudentAttendanceSummary = apps.get_model('manager', 'StudentAttendanceSummary')
+    rows = Assign.objects.filter(student_id__in=student_ids).values('student').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(attendance_status='حاضر')),
+        absent=Count('id', filter=Q(attendance_status='غایب')),
+        late=Count('id', filter=Q(attendance_status='حاضر (با تاخیر)')),
+    ).order_by()
+    StudentAttendanceSummary.objects.filter(student_id__in=student_ids).delete()
+    StudentAttendanceSummary.objects.bulk_create([
+        StudentAttendanceSummary(
+            student_id=row['student'],
+            total=row['total'],
+            present=row['present'],
+            absent=row['absent'],
+            late=row['late'],
+        )
+        for row in rows
+    ])
+
+
+def merge_duplicate_sheets(apps, schema_editor):
+    """
+    Keep the first sheet of every (class, book, date). the home works of the others
+    are moved to it, and so are their records unless the student is already on it;
+    the summaries of the students whose records were dropped are counted again
+    """
+    Attendance = apps.get_model('manager', 'Attendance')
+    Assign = apps.get_model('manager', 'Assign')
+    HomeWork = apps.get_model('manager', 'HomeWork')
+    duplicates = Attendance.objects.values('attendance_class', 'book', 'date').annotate(
+        first=Min('id'), sheets=Count('id')).filter(sheets__gt=1).order_by()
+    affected = set()
+    for group in duplicates:
+        others = Attendance.objects.filter(
+            attendance_class=group['attendance_class'], book=group['book'], date=group['date'],
+        ).exclude(pk=group['first'])
+        HomeWork.objects.filter(attendance__in=others).update(attendance_id=group['first'])
+        recorded = set(Assign.objects.filter(attendance_id=group['first']).values_list('student_id', flat=True))
+        for assign in Assign.objects.filter(attendance__in=others).order_by('id'):
+            if assign.student_id not in recorded:
+                Assign.objects.filter(pk=assign.pk).update(attendance_id=group['first'])
+                recorded.add(assign.student_id)
+            else:
+                affected.add(assign.student_id)
+        others.delete()
+    if affected:
+        rebuild_summaries(apps, affected)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manager', '0009_alter_attendance_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_sheets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(fields=('attendance_class', 'book', 'date'), name='one_sheet_per_lesson'),
+        ),
+    ]
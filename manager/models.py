@@ -5,7 +5,8 @@ from django.db.models import Count
 from django.urls import reverse_lazy
 from django.utils import timezone
 
-from extensions.utils import jalili_converter, change_month
+from extensions.utils import jalili_converter, change_month, gregorian_to_jalali
+from main.counters import get_count
 
 
 # Events (Calendar) Section
@@ -72,8 +73,7 @@ class EventCalendar(models.Model):
 
     @property
     def count(self):
-        events = EventCalendar.objects.all().count()
-        return events
+        return get_count('events')
 
 
 class ExternalEventCalendar(models.Model):
@@ -156,8 +156,7 @@ class NoticeBox(models.Model):
 
     @property
     def count(self):
-        notices = NoticeBox.objects.all().count()
-        return notices
+        return get_count('notices')
 
 
 # Grade Section
@@ -331,9 +330,8 @@ class Attendance(models.Model):
         related_name="attendance_book",
         verbose_name="کتاب",
     )
-    date = models.CharField(
-        max_length=50,
-        default=str(jdatetime.date.fromgregorian(date=timezone.now())),
+    date = models.DateField(
+        default=timezone.localdate,
         verbose_name="تاریخ کلاس",
     )
     create = models.DateTimeField(
@@ -353,21 +351,31 @@ class Attendance(models.Model):
         verbose_name = 'حضور و غیاب'
         verbose_name_plural = '07. حضور و غیاب ها'
         ordering = ('-create',)
+        indexes = (
+            models.Index(fields=('attendance_class', 'date'), name='attendance_class_date_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(fields=('attendance_class', 'book', 'date'), name='one_sheet_per_lesson'),
+        )
 
     # Methods
     def __str__(self):
         return f"{self.attendance_class.name} - {self.jdate()}"
 
+    def jalali_date(self):
+        return gregorian_to_jalali(self.date)
+
     def jdate(self):
         """
         Convert Gregorian date to Jalali
         """
-        return change_month(self.date)
+        return change_month(self.jalali_date())
 
     jdate.short_description = 'تاریخ کلاس'
 
     def get_absolute_url(self):
-        return reverse_lazy('main:attendance_detail', kwargs={'pk': self.pk, 'date': self.date})
+        # Links keep the Jalali date they always had
+        return reverse_lazy('main:attendance_detail', kwargs={'pk': self.pk, 'date': self.jalali_date()})
 
 
 class Assign(models.Model):
@@ -416,6 +424,64 @@ class Assign(models.Model):
         return f"{self.attendance} - {self.student} - {self.attendance_status}"
 
 
+class StudentAttendanceSummary(models.Model):
+    """
+    Attendance status counts of a student, kept up to date from Assign changes
+    so panels can show percentages without aggregating every Assign row
+    """
+
+    # Fields
+    student = models.OneToOneField(
+        to='account.User',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='attendance_summary',
+        verbose_name='دانش آموز',
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='تعداد کل',
+    )
+    present = models.PositiveIntegerField(
+        default=0,
+        verbose_name='حاضر',
+    )
+    absent = models.PositiveIntegerField(
+        default=0,
+        verbose_name='غایب',
+    )
+    late = models.PositiveIntegerField(
+        default=0,
+        verbose_name='حاضر (با تاخیر)',
+    )
+
+    # Metadata
+    class Meta:
+        verbose_name = "خلاصه حضور و غیاب"
+        verbose_name_plural = 'خلاصه های حضور و غیاب'
+
+    # Methods
+    def __str__(self):
+        return f"{self.student_id} - {self.present}/{self.total}"
+
+    def percent(self, count):
+        if not self.total:
+            return 0
+        return round((count / self.total) * 100, 0)
+
+    @property
+    def present_percent(self):
+        return self.percent(self.present)
+
+    @property
+    def absent_percent(self):
+        return self.percent(self.absent)
+
+    @property
+    def late_percent(self):
+        return self.percent(self.late)
+
+
 # Report card Section
 class ReportCard(models.Model):
     """
@@ -477,7 +543,7 @@ class HomeWork(models.Model):
 
     @property
     def date(self):
-        return change_month(self.attendance.date)
+        return self.attendance.jdate()
 
 
 FORM_STATUS = (
@@ -532,5 +598,4 @@ class EmploymentForm(models.Model):
 
     @property
     def all_count(self):
-        forms = EmploymentForm.objects.all().count()
-        return forms
+        return get_count('employment_forms')
@@ -0,0 +1,120 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+
+from manager.models import Assign, StudentAttendanceSummary
+
+# Assign status -> summary field
+STATUS_FIELDS = {
+    'حاضر': 'present',
+    'غایب': 'absent',
+    'حاضر (با تاخیر)': 'late',
+}
+SUMMARY_FIELDS = ('total', 'present', 'absent', 'late')
+
+
+def summary_key(assign):
+    """
+    (student, status) an Assign is counted under, None when either was deferred
+    """
+    values = assign.__dict__
+    if 'student_id' not in values or 'attendance_status' not in values:
+        return None
+    return values['student_id'], values['attendance_status']
+
+
+def count(deltas, key, step):
+    if key is None or key[0] is None:
+        return
+    student_id, status = key
+    deltas[student_id]['total'] += step
+    if status in STATUS_FIELDS:
+        deltas[student_id][STATUS_FIELDS[status]] += step
+
+
+def change_deltas(changes):
+    """
+    Turn (before, after) summary keys into per student field deltas,
+    a None before means the Assign is new and a None after means it was deleted
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for before, after in changes:
+        if before == after:
+            continue
+        count(deltas, before, -1)
+        count(deltas, after, 1)
+    return {
+        student_id: {field: delta for field, delta in fields.items() if delta}
+        for student_id, fields in deltas.items()
+        if any(fields.values())
+    }
+
+
+def apply(changes):
+    """
+    Move the summaries by the given Assign changes.
+    students that share the same deltas (a whole class marked present) are
+    moved with one UPDATE, missing summaries are rebuilt from Assign
+    """
+    groups = defaultdict(list)
+    for student_id, fields in change_deltas(changes).items():
+        groups[tuple(sorted(fields.items()))].append(student_id)
+
+    missing = []
+    with transaction.atomic():
+        for fields, student_ids in groups.items():
+            summaries = StudentAttendanceSummary.objects.filter(student_id__in=student_ids)
+            # Floored at zero, so drift never breaks the positive fields
+            updated = summaries.update(**{field: Greatest(F(field) + delta, Value(0)) for field, delta in fields})
+            if updated < len(student_ids):
+                found = set(summaries.values_list('student_id', flat=True))
+                missing.extend(set(student_ids) - found)
+        if missing:
+            rebuild(missing)
+
+
+def rebuild(student_ids=None):
+    """
+    Recompute summaries from Assign, for every student when no ids are given.
+    rows are upserted and locked before counting, so concurrent rebuilds of the
+    same student wait for each other instead of inserting the same primary key
+    """
+    assigns = Assign.objects.all()
+    summaries = StudentAttendanceSummary.objects.all()
+    if student_ids is not None:
+        assigns = assigns.filter(student_id__in=student_ids)
+        summaries = summaries.filter(student_id__in=student_ids)
+    with transaction.atomic():
+        if student_ids is None:
+            student_ids = set(assigns.values_list('student_id', flat=True).distinct())
+            summaries.exclude(student_id__in=student_ids).delete()
+        StudentAttendanceSummary.objects.bulk_create(
+            [StudentAttendanceSummary(student_id=student_id) for student_id in student_ids if student_id is not None],
+            ignore_conflicts=True,
+        )
+        locked = list(summaries.select_for_update())
+        rows = {
+            row['student']: row
+            for row in assigns.values('student').annotate(
+                total=Count('id'),
+                present=Count('id', filter=Q(attendance_status='حاضر')),
+                absent=Count('id', filter=Q(attendance_status='غایب')),
+                late=Count('id', filter=Q(attendance_status='حاضر (با تاخیر)')),
+            ).order_by()
+        }
+        for summary in locked:
+            row = rows.get(summary.student_id, {})
+            for field in SUMMARY_FIELDS:
+                setattr(summary, field, row.get(field, 0))
+        StudentAttendanceSummary.objects.bulk_update(locked, SUMMARY_FIELDS, batch_size=500)
+    return len(locked)
+
+
+def get_summary(student_id):
+    """
+    Summary of one student with a single primary key lookup
+    """
+    summary = StudentAttendanceSummary.objects.filter(pk=student_id).first()
+    return summary or StudentAttendanceSummary(student_id=student_id)
@@ -1,3 +1,9 @@
+import json
+from datetime import date
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.utils import timezone
 from .models import (
@@ -13,10 +19,13 @@ from .models import (
     ReportCard,
     HomeWork,
     EmploymentForm,
+    StudentAttendanceSummary,
 )
 from account.models import User
 from django.urls import reverse
 from quiz.models import Quiz
+from .attendance import RollCallError, apply_roll_call, attendance_matrix, generate_attendance
+from .summary import get_summary, rebuild
 from .filters import StudentFilter, ParentFilter, TeacherFilter, ClassFilter, EMPFormFilter, QuizListFilter
 
 
@@ -40,7 +49,7 @@ class ModelTests(TestCase):
         self.attendance = Attendance.objects.create(
             attendance_class=self.classes,
             book=self.book,
-            date='1400-01-01',
+            date='2021-03-21',
         )
         self.user = User.objects.create(username='testuser', password='testpassword')
         self.assign = Assign.objects.create(
@@ -69,6 +78,9 @@ class ModelTests(TestCase):
         )
         self.assertEqual(homework.date, '01 فروردین 1400')  # Test date property
 
+    def test_attendance_url_keeps_jalali_date(self):
+        self.assertEqual(self.attendance.get_absolute_url(), f'/attendance/{self.attendance.pk}/1400-01-01/detail/')
+
     def test_employment_form_model(self):
         form = EmploymentForm.objects.create(
             student=self.user,
@@ -101,7 +113,7 @@ class ModelIntegrationTests(TestCase):
         self.attendance = Attendance.objects.create(
             attendance_class=self.classes,
             book=self.book,
-            date='1400-01-01',
+            date='2021-03-21',
         )
         self.user = User.objects.create(username='testuser', password='testpassword')
         self.assign = Assign.objects.create(
@@ -179,7 +191,7 @@ class ModelSystemTests(TestCase):
         self.attendance = Attendance.objects.create(
             attendance_class=self.classes,
             book=self.book,
-            date='1400-01-01',
+            date='2021-03-21',
         )
         self.assign = Assign.objects.create(
             attendance=self.attendance,
@@ -232,7 +244,7 @@ class ModelRegressionTests(TestCase):
         self.attendance = Attendance.objects.create(
             attendance_class=self.classes,
             book=self.book,
-            date='1400-01-01',
+            date='2021-03-21',
         )
         self.assign = Assign.objects.create(
             attendance=self.attendance,
@@ -264,6 +276,10 @@ class ModelRegressionTests(TestCase):
 
 # unit test for urls:
 class ManagerUrlsTestCase(TestCase):
+    def test_student_export_url(self):
+        url = reverse('manager:student_export')
+        self.assertEqual(url, '/manager/student/export/')
+
     def test_manager_panel_url(self):
         url = reverse('manager:manager_panel')
         self.assertEqual(url, '/manager/')
@@ -296,6 +312,14 @@ class ManagerUrlsTestCase(TestCase):
         url = reverse('manager:delete_ex_event')
         self.assertEqual(url, '/manager/delete-ex-event/')
 
+    def test_roll_call_url(self):
+        url = reverse('manager:roll_call')
+        self.assertEqual(url, '/manager/roll-call/')
+
+    def test_user_autocomplete_url(self):
+        url = reverse('manager:user_autocomplete')
+        self.assertEqual(url, '/manager/users/autocomplete/')
+
     # Add more test methods for other URLs...
 
     def test_password_change_url(self):
@@ -303,6 +327,29 @@ class ManagerUrlsTestCase(TestCase):
         self.assertEqual(url, '/manager/user/1/password/')
 
 
+# unit test for manager views:
+class ManagerViewsTestCase(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create(username='manager', national_code='1', is_manager=True)
+        self.student = User.objects.create(username='student', first_name='Ali', national_code='2', is_student=True)
+
+    def test_user_autocomplete(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('manager:user_autocomplete'), {'q': 'Ali', 'role': 'student'})
+        self.assertEqual([user['id'] for user in response.json()['results']], [self.student.pk])
+
+    def test_student_export(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('manager:student_export'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content).decode().count('\r\n'), 2)
+
+    def test_other_roles_are_sent_to_login(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse('manager:user_autocomplete'), {'q': 'Ali'})
+        self.assertRedirects(response, reverse('account:login'), fetch_redirect_response=False)
+
+
 
 # unit test for filters:
 class FiltersTestCase(TestCase):
@@ -364,3 +411,233 @@ class FiltersTestCase(TestCase):
         filter_set = QuizListFilter(data, queryset=Quiz.objects.all())
         self.assertEqual(len(filter_set.qs), 1)
         self.assertEqual(filter_set.qs[0], self.quiz1)
+
+
+# unit test for roll call:
+class RollCallTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', national_code='1', is_teacher=True)
+        self.classes = Classes.objects.create(name='Class A')
+        self.book = Books.objects.create(name='Math Book', units=3)
+        self.attendance = Attendance.objects.create(
+            attendance_class=self.classes,
+            book=self.book,
+            teacher=self.teacher,
+            date='2021-03-21',
+        )
+        self.students = [
+            User.objects.create(username=f'student{i}', national_code=f'10{i}', is_student=True,
+                                student_class=self.classes)
+            for i in range(3)
+        ]
+        Assign.objects.create(attendance=self.attendance, student=self.students[0], attendance_status='غایب')
+
+    def records(self, status='حاضر'):
+        return [{'student': student.pk, 'status': status} for student in self.students]
+
+    def test_creates_and_updates_in_bulk(self):
+        result = apply_roll_call(self.attendance.pk, self.records())
+        self.assertEqual(result, {'created': 2, 'updated': 1})
+        # attendance, assigns, one UPDATE each for assigns and summaries, plus savepoints
+        with self.assertNumQueries(8):
+            result = apply_roll_call(self.attendance.pk, self.records(status='غایب'))
+        self.assertEqual(result, {'created': 0, 'updated': 3})
+        statuses = self.attendance.att_assign.values_list('attendance_status', flat=True)
+        self.assertEqual(list(statuses), ['غایب'] * 3)
+
+    def test_is_idempotent(self):
+        apply_roll_call(self.attendance.pk, self.records())
+        self.assertEqual(apply_roll_call(self.attendance.pk, self.records()), {'created': 0, 'updated': 0})
+        self.assertEqual(self.attendance.att_assign.count(), 3)
+
+    def test_note_keeps_status(self):
+        apply_roll_call(self.attendance.pk, [{'student': self.students[0].pk, 'note': 'sick'}])
+        assign = self.attendance.att_assign.get(student=self.students[0])
+        self.assertEqual((assign.attendance_status, assign.attendance_note), ('غایب', 'sick'))
+
+    def test_updates_summaries(self):
+        apply_roll_call(self.attendance.pk, self.records())
+        summary = get_summary(self.students[0].pk)
+        self.assertEqual((summary.total, summary.present, summary.absent), (1, 1, 0))
+        self.assertEqual(get_summary(self.students[1].pk).present_percent, 100)
+
+    def test_roll_call_view(self):
+        self.client.force_login(self.teacher)
+        response = self.client.post(reverse('manager:roll_call'), {
+            'att_id': self.attendance.pk,
+            'records': json.dumps(self.records()),
+        })
+        self.assertEqual(response.json(), {'error': False, 'created': 2, 'updated': 1})
+        response = self.client.post(reverse('manager:roll_call'), {'att_id': self.attendance.pk, 'records': '{'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_invalid_records(self):
+        other = User.objects.create(username='other', national_code='2', is_student=True)
+        with self.assertRaises(RollCallError):
+            apply_roll_call(self.attendance.pk, [{'student': other.pk, 'status': 'حاضر'}])
+        with self.assertRaises(RollCallError):
+            apply_roll_call(self.attendance.pk, self.records(status='unknown'))
+        self.assertEqual(self.attendance.att_assign.count(), 1)
+
+
+# unit test for attendance summary:
+class AttendanceSummaryTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', national_code='1', is_teacher=True)
+        self.student = User.objects.create(username='student', national_code='2', is_student=True)
+        self.classes = Classes.objects.create(name='Class A')
+        self.book = Books.objects.create(name='Math Book', units=3)
+        self.attendance = Attendance.objects.create(attendance_class=self.classes, book=self.book,
+                                                    teacher=self.teacher, date='2021-03-21')
+
+    def add_assign(self, status):
+        return Assign.objects.create(attendance=self.attendance, student=self.student, attendance_status=status)
+
+    def counts(self):
+        summary = get_summary(self.student.pk)
+        return summary.total, summary.present, summary.absent, summary.late
+
+    def test_create_and_status_change(self):
+        assign = self.add_assign('حاضر')
+        self.add_assign('غایب')
+        self.assertEqual(self.counts(), (2, 1, 1, 0))
+        assign.attendance_status = 'حاضر (با تاخیر)'
+        assign.save()
+        self.assertEqual(self.counts(), (2, 0, 1, 1))
+        self.assertEqual(get_summary(self.student.pk).late_percent, 50)
+
+    def test_delete(self):
+        self.add_assign('حاضر').delete()
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+
+    def test_deferred_instance_is_rebuilt(self):
+        self.add_assign('حاضر')
+        assign = Assign.objects.only('id', 'attendance_note').get()
+        assign.attendance_status = 'غایب'
+        assign.save()
+        self.assertEqual(self.counts(), (1, 0, 1, 0))
+
+    def test_rebuild_fixes_drift(self):
+        self.add_assign('حاضر')
+        Assign.objects.update(attendance_status='غایب')
+        self.assertEqual(self.counts(), (1, 1, 0, 0))
+        self.assertEqual(rebuild(), 1)
+        self.assertEqual(self.counts(), (1, 0, 1, 0))
+
+    def test_decrement_is_floored(self):
+        assign = self.add_assign('حاضر')
+        StudentAttendanceSummary.objects.filter(pk=self.student.pk).update(total=0, present=0)
+        assign.delete()
+        self.assertEqual(self.counts(), (0, 0, 0, 0))
+
+    def test_rebuild_of_existing_and_missing_rows(self):
+        self.add_assign('حاضر')
+        StudentAttendanceSummary.objects.all().delete()
+        # Both the missing row and the one just made are upserted, never inserted twice
+        self.assertEqual(rebuild([self.student.pk]), 1)
+        self.assertEqual(rebuild([self.student.pk]), 1)
+        self.assertEqual(self.counts(), (1, 1, 0, 0))
+
+    def test_read_with_one_query(self):
+        self.add_assign('حاضر')
+        with self.assertNumQueries(1):
+            self.assertEqual(get_summary(self.student.pk).present_percent, 100)
+
+
+# unit test for class attendance matrix:
+class AttendanceMatrixTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', national_code='1', is_teacher=True)
+        self.classes = Classes.objects.create(name='Class A')
+        self.math = Books.objects.create(name='Math', units=3)
+        self.art = Books.objects.create(name='Art', units=1)
+        self.ali = User.objects.create(username='ali', first_name='Ali', national_code='2', is_student=True,
+                                       student_class=self.classes)
+        self.sara = User.objects.create(username='sara', first_name='Sara', national_code='3', is_student=True,
+                                        student_class=self.classes)
+        self.first = self.add_attendance(self.math, date(2021, 3, 21))
+        self.second = self.add_attendance(self.art, date(2021, 3, 22))
+        Assign.objects.create(attendance=self.first, student=self.ali, attendance_status='حاضر')
+        Assign.objects.create(attendance=self.second, student=self.ali, attendance_status='غایب')
+
+    def add_attendance(self, book, date):
+        return Attendance.objects.create(attendance_class=self.classes, book=book, teacher=self.teacher, date=date)
+
+    def test_matrix_is_built_with_two_queries(self):
+        with self.assertNumQueries(2):
+            matrix = attendance_matrix(self.classes.pk)
+        self.assertEqual([session['id'] for session in matrix['sessions']], [self.first.pk, self.second.pk])
+        self.assertEqual([student['name'] for student in matrix['students']], ['Ali', 'Sara'])
+        present, absent = (matrix['statuses'].index(status) + 1 for status in ('حاضر', 'غایب'))
+        self.assertEqual(matrix['matrix'], [[present, absent], [0, 0]])
+
+    def test_book_and_date_filters(self):
+        self.assertEqual(len(attendance_matrix(self.classes.pk, book_id=self.art.pk)['sessions']), 1)
+        sessions = attendance_matrix(self.classes.pk, start=date(2021, 3, 22), end=date(2021, 4, 20))['sessions']
+        self.assertEqual(sessions, [{'id': self.second.pk, 'date': '1400-01-02', 'book': 'Art'}])
+
+
+# unit test for attendance generation:
+class GenerateAttendanceTestCase(TestCase):
+    # A Saturday
+    day = date(2023, 10, 7)
+
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', national_code='1', is_teacher=True)
+        self.classes = Classes.objects.create(name='Class A')
+        self.classes.teacher.add(self.teacher)
+        self.math = Books.objects.create(name='Math', units=3)
+        self.art = Books.objects.create(name='Art', units=1)
+        self.classes.books.add(self.math, self.art)
+        self.students = [
+            User.objects.create(username=f'student{i}', national_code=f'10{i}', is_student=True,
+                                student_class=self.classes)
+            for i in range(3)
+        ]
+        self.timetable = {'saturday': [[self.classes.pk, self.math.pk], [self.classes.pk, self.art.pk]]}
+
+    def test_creates_sheets_with_everyone_present(self):
+        result = generate_attendance(self.day, self.timetable)
+        self.assertEqual((result['sheets'], result['assigns']), (2, 6))
+        self.assertEqual(set(Assign.objects.values_list('attendance_status', flat=True)), {'حاضر'})
+        self.assertEqual(get_summary(self.students[0].pk).present, 2)
+
+    def test_is_idempotent(self):
+        generate_attendance(self.day, self.timetable)
+        User.objects.create(username='new', national_code='200', is_student=True, student_class=self.classes)
+        result = generate_attendance(self.day, self.timetable)
+        self.assertEqual((result['sheets'], result['assigns']), (0, 2))
+        self.assertEqual(Attendance.objects.count(), 2)
+
+    def test_skips_days_off(self):
+        self.assertIsNone(generate_attendance(date(2023, 10, 13), self.timetable))  # Friday
+        self.assertIsNone(generate_attendance(date(2024, 3, 20), self.timetable))  # 1403-01-01
+        self.assertIsNone(generate_attendance(self.day, self.timetable, skip=['1402-07-15']))
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_only_lessons_in_the_timetable(self):
+        timetable = {'saturday': [[self.classes.pk, self.art.pk]]}
+        self.assertEqual(generate_attendance(self.day, timetable)['sheets'], 1)
+        self.assertEqual(Attendance.objects.get().book, self.art)
+        # Nothing is scheduled on Sunday
+        self.assertEqual(generate_attendance(date(2023, 10, 8), timetable)['sheets'], 0)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_all_lessons_without_a_timetable(self):
+        result = generate_attendance(self.day)
+        self.assertEqual((result['sheets'], result['assigns']), (2, 0))
+        self.assertFalse(Assign.objects.exists())
+        # A later run with the timetable fills in the lessons that met
+        self.assertEqual(generate_attendance(self.day, self.timetable)['assigns'], 6)
+
+    def test_command_needs_a_mode(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_attendance', stdout=StringIO(), stderr=StringIO())
+        call_command('generate_attendance', '--all-lessons', '--date', '1402-07-15', stdout=StringIO())
+        self.assertEqual(Attendance.objects.count(), 2)
+
+    def test_one_sheet_per_lesson(self):
+        Attendance.objects.create(attendance_class=self.classes, book=self.math, teacher=self.teacher, date=self.day)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Attendance.objects.create(attendance_class=self.classes, book=self.math, teacher=self.teacher,
+                                      date=self.day)
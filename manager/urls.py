@@ -18,8 +18,10 @@ urlpatterns = (
     path('add-notice/', views.add_notice, name='add_notice'),
     path('edit-notice/', views.edit_notice, name='edit_notice'),
     path('delete-notice/', views.delete_notice, name='delete_notice'),
+    path('users/autocomplete/', views.user_autocomplete, name='user_autocomplete'),
     # Student section
     path('student/list/', views.student_list, name="student_list"),
+    path('student/export/', views.student_export, name="student_export"),
     path('student/create/', views.CreateStudent.as_view(), name="student_create"),
     path('student/<int:pk>/change', views.UpdateStudent.as_view(), name="student_update"),
     path('student/<int:pk>/delete', views.DeleteStudent.as_view(), name="student_delete"),
@@ -41,6 +43,7 @@ urlpatterns = (
     path('add-att-status/', views.add_att_status, name='add_att_status'),
     path('create-att/', views.create_att, name='create_att'),
     path('change-att-note/', views.change_att_note, name='change_att_note'),
+    path('roll-call/', views.roll_call, name='roll_call'),
     # Report Card Section
     path('report-card/', views.report_card, name='report_card'),
     # Home Work Section
@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth.hashers import make_password
 from django.http import (
     HttpResponse,
@@ -8,13 +10,19 @@ from django.shortcuts import (
     get_object_or_404,
 )
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from django.views import generic
 from account import forms
 from account.models import User
+from account.utils.search import AUTOCOMPLETE_LIMIT, search_users
+from context_processors.cache import invalidate_for_model
+from extensions.export import stream_csv
+from main.counters import get_counts
 from main.decorators import allow_user
 from main.mixins import AllowUserMixin
+from manager.attendance import RollCallError, apply_roll_call
 from manager.models import (
     EventCalendar,
     ExternalEventCalendar,
@@ -38,7 +46,7 @@ from manager.filters import (
 def manager_panel(request):
     context = {
         "notices": NoticeBox.objects.all().order_by('-publish')[:10],
-        "User_count": User.objects.first(),
+        "counts": get_counts(),
         "page_title": "پنل مدیریت",
     }
     return render(request, "manager/manager_panel.html", context)
@@ -98,6 +106,7 @@ def update_event(request):
         start=start,
         end=end,
     )
+    invalidate_for_model(EventCalendar)
     return HttpResponse(input_value)
 
 
@@ -114,6 +123,7 @@ def update_event_desc(request):
     EventCalendar.objects.filter(id=id).update(
         description=input_value['description'],
     )
+    invalidate_for_model(EventCalendar)
     return HttpResponse(input_value)
 
 
@@ -211,9 +221,32 @@ def edit_notice(request):
         title=input_value['title'],
         description=input_value['description'],
     )
+    invalidate_for_model(NoticeBox)
     return HttpResponse(input_value)
 
 
+@require_GET
+@allow_user(['is_superuser', 'is_manager'])
+def user_autocomplete(request):
+    input_value = {
+        'q': request.GET.get('q', ''),
+        'role': request.GET.get('role'),
+        'limit': request.GET.get('limit', ''),
+    }
+    limit = int(input_value['limit']) if input_value['limit'].isdigit() else AUTOCOMPLETE_LIMIT
+    users = search_users(input_value['q'], role=input_value['role'], limit=limit)
+    return JsonResponse({
+        'results': [
+            {
+                'id': user['id'],
+                'name': f"{user['first_name']} {user['last_name']}".strip(),
+                'national_code': user['national_code'],
+            }
+            for user in users
+        ],
+    })
+
+
 # Students Section
 @allow_user(['is_superuser', 'is_manager'])
 def student_list(request):
@@ -225,6 +258,24 @@ def student_list(request):
     return render(request, "manager/persons/person_list.html", context)
 
 
+STUDENT_EXPORT_COLUMNS = (
+    ('نام', 'first_name'),
+    ('نام خانوادگی', 'last_name'),
+    ('کد ملی', 'national_code'),
+    ('نام پدر', 'father_name'),
+    ('تلفن', 'phone'),
+    ('پایه', 'grade__name'),
+    ('رشته', 'major__name'),
+    ('کلاس', 'student_class__name'),
+)
+
+
+@allow_user(['is_superuser', 'is_manager'])
+def student_export(request):
+    students = StudentFilter(request.GET, queryset=User.objects.filter(is_active=True, is_student=True)).qs
+    return stream_csv('students', STUDENT_EXPORT_COLUMNS, students.order_by('last_name', 'first_name', 'id'))
+
+
 class CreateStudent(AllowUserMixin, generic.CreateView):
     model = User
     form_class = forms.CreateStudentUserForm
@@ -445,7 +496,11 @@ def change_att_status(request):
     }
 
     print(input_value)
-    Assign.objects.filter(id=input_value['ass_id']).update(attendance_status=input_value['status'])
+    # Saved through the model so the student's attendance summary follows
+    assign = Assign.objects.filter(id=input_value['ass_id']).first()
+    if assign is not None:
+        assign.attendance_status = input_value['status']
+        assign.save(update_fields=['attendance_status'])
     return HttpResponse(input_value)
 
 
@@ -482,6 +537,25 @@ def change_att_note(request):  # change attendance note for student
     return HttpResponse(input_value)
 
 
+@require_POST
+@allow_user(['is_superuser', 'is_manager', 'is_teacher'])
+def roll_call(request):  # set status and note for a whole class at once
+    input_value = {
+        'att_id': request.POST.get('att_id'),
+        'records': request.POST.get('records'),
+    }
+
+    try:
+        records = json.loads(input_value['records'] or '[]')
+        result = apply_roll_call(input_value['att_id'], records)
+    except (ValueError, TypeError) as error:
+        message = str(error) if isinstance(error, RollCallError) else 'اطلاعات ارسال شده معتبر نیست'
+        return JsonResponse({"error": True, "message": message}, status=400)
+    except Attendance.DoesNotExist:
+        return JsonResponse({"error": True, "message": "لیست حضور و غیاب پیدا نشد"}, status=404)
+    return JsonResponse({"error": False, **result})
+
+
 @require_POST
 @allow_user(['is_superuser', 'is_manager'])
 def create_att(request):  # create attendance for a class
@@ -491,11 +565,12 @@ def create_att(request):  # create attendance for a class
     }
 
     print(input_value)
-    attendance_obj = Attendance(
+    # A lesson has one sheet a day, creating it again opens the existing one
+    Attendance.objects.get_or_create(
         attendance_class=Classes.objects.get(id=input_value['class_id']),
-        book=Books.objects.get(id=input_value['book_id'])
+        book=Books.objects.get(id=input_value['book_id']),
+        date=timezone.localdate(),
     )
-    attendance_obj.save()
     return HttpResponse(input_value)
 
 
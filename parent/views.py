@@ -1,4 +1,5 @@
 from django.shortcuts import render
+from main.counters import get_count
 from main.decorators import allow_user
 from manager.models import NoticeBox
 
@@ -7,7 +8,7 @@ from manager.models import NoticeBox
 def parent_view(request):
     context = {
         "notices": NoticeBox.objects.all().order_by('-publish')[:10],
-        "notice_count": NoticeBox.objects.first(),
+        "notice_count": get_count('notices'),
         "page_title": "پنل والدین",
     }
     return render(request, "parent/parent_panel.html", context)
@@ -2,6 +2,7 @@ from django.contrib import admin
 from poll.models import (
     Poll,
     PollOptions,
+    PollVote,
 )
 
 
@@ -21,3 +22,11 @@ class PollOptionsAdmin(admin.ModelAdmin):
 
 
 admin.site.register(PollOptions, PollOptionsAdmin)
+
+
+class PollVoteAdmin(admin.ModelAdmin):
+    list_display = ('poll', 'option', 'user', 'create')
+    raw_id_fields = ('user',)
+
+
+admin.site.register(PollVote, PollVoteAdmin)
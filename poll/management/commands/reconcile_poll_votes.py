@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from poll.models import Poll
+from poll.votes import reconcile
+
+
+class Command(BaseCommand):
+    help = "Rebuild poll option counters from the vote ledger (run it periodically, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('polls', nargs='*', type=int, help="only reconcile these poll ids")
+
+    def handle(self, *args, **options):
+        polls = Poll.objects.all()
+        if options['polls']:
+            polls = polls.filter(pk__in=options['polls'])
+        drifted, skipped = reconcile(polls)
+        for option_id, (stored, counted) in drifted.items():
+            self.stdout.write(f"option {option_id}: {stored} -> {counted}")
+        for poll in skipped:
+            self.stdout.write(self.style.WARNING(f"poll {poll.pk} skipped, it has votes from before the ledger"))
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted)} option counter(s) reconciled"))
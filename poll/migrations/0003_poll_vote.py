@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-17 20:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('poll', '0002_auto_20220219_0906'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('create', models.DateTimeField(default=django.utils.timezone.now, verbose_name='زمان رای')),
+                ('option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_option', to='poll.polloptions', verbose_name='گزینه')),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_poll', to='poll.poll', verbose_name='نظرسنجی')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vote_user', to=settings.AUTH_USER_MODEL, verbose_name='کاربر')),
+            ],
+            options={
+                'verbose_name': 'رای',
+                'verbose_name_plural': '3. آرا',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pollvote',
+            constraint=models.UniqueConstraint(fields=('poll', 'user'), name='one_vote_per_user'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-17 20:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('poll', '0003_poll_vote'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(fields=['for_user', '-create'], name='poll_for_user_create_idx'),
+        ),
+    ]
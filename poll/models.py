@@ -2,6 +2,7 @@ from django.db import models
 from django.db.models import Count
 from django.utils import timezone
 from account.models import User
+from main.counters import get_count
 
 
 class Poll(models.Model):
@@ -46,6 +47,10 @@ class Poll(models.Model):
         verbose_name = 'نظرسنجی'
         verbose_name_plural = '1. نظرسنجی ها'
         ordering = ('-create',)
+        indexes = (
+            # Role filter and newest first of poll_list
+            models.Index(fields=('for_user', '-create'), name='poll_for_user_create_idx'),
+        )
 
     # Methods
     def __str__(self):
@@ -53,8 +58,7 @@ class Poll(models.Model):
 
     @property
     def all_count(self):
-        polls = Poll.objects.all().count()
-        return polls
+        return get_count('polls')
 
 
 class PollOptions(models.Model):
@@ -86,3 +90,45 @@ class PollOptions(models.Model):
     # Methods
     def __str__(self):
         return self.option
+
+
+class PollVote(models.Model):
+    """
+    Model for one vote of a user, the ledger option_count is rebuilt from
+    """
+
+    # Fields
+    poll = models.ForeignKey(
+        Poll,
+        on_delete=models.CASCADE,
+        related_name='vote_poll',
+        verbose_name='نظرسنجی',
+    )
+    option = models.ForeignKey(
+        PollOptions,
+        on_delete=models.CASCADE,
+        related_name='vote_option',
+        verbose_name='گزینه',
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='vote_user',
+        verbose_name='کاربر',
+    )
+    create = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='زمان رای',
+    )
+
+    # Metadata
+    class Meta:
+        verbose_name = 'رای'
+        verbose_name_plural = '3. آرا'
+        constraints = (
+            models.UniqueConstraint(fields=('poll', 'user'), name='one_vote_per_user'),
+        )
+
+    # Methods
+    def __str__(self):
+        return f"{self.user} - {self.option}"
@@ -0,0 +1,40 @@
+// Live poll results: the page asks for the tally every few seconds, the server
+// answers 304 while its version (the ETag) did not change
+
+const tally = document.getElementById('poll-tally');
+
+function setCount(id, count) {
+    $('.option-count[data-id="' + id + '"]').text(count);
+    $('.option-bar[data-id="' + id + '"]').css('width', count + 'cm').attr('aria-valuenow', count);
+}
+
+function showTally(data) {
+    if (data.options.some(option => !$('.option-count[data-id="' + option.id + '"]').length)) {
+        // Options changed since the page was rendered
+        window.location.reload();
+        return;
+    }
+    data.options.forEach(option => setCount(option.id, option.count));
+    tally.dataset.version = data.version;
+}
+
+function refresh() {
+    $.ajax({
+        type: "get",
+        url: tally.dataset.url,
+        headers: {'If-None-Match': '"' + tally.dataset.version + '"'},
+        success: function (data, status) {
+            if (status !== "notmodified" && data) {
+                showTally(data);
+            }
+        },
+        complete: function () {
+            // Hidden tabs ask less often
+            setTimeout(refresh, document.hidden ? tally.dataset.refresh * 5 : Number(tally.dataset.refresh));
+        }
+    });
+}
+
+if (tally) {
+    setTimeout(refresh, Number(tally.dataset.refresh));
+}
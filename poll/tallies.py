@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from poll.models import PollOptions
+
+TALLY_TIMEOUT = 24 * 60 * 60
+# A burst of votes is read back from the database at most once per interval
+REBUILD_INTERVAL = getattr(settings, 'POLL_REBUILD_INTERVAL', 0.5)
+# An open results page asks for the tally this often, a request that ends
+# at once with 304 while nothing changed, so no worker is ever held
+REFRESH_SECONDS = getattr(settings, 'POLL_REFRESH_SECONDS', 3)
+
+
+def tally_key(poll_id):
+    return f'poll:tally:{poll_id}'
+
+
+def dirty_key(poll_id):
+    return f'poll:tally:dirty:{poll_id}'
+
+
+def mark_dirty(poll_id):
+    cache.set(dirty_key(poll_id), True, TALLY_TIMEOUT)
+
+
+def build(poll_id):
+    # The flag is dropped before reading, so a vote committed meanwhile marks it again
+    cache.delete(dirty_key(poll_id))
+    options = [
+        {'id': option_id, 'option': option, 'count': count}
+        for option_id, option, count in PollOptions.objects.filter(
+            poll_id=poll_id).order_by('id').values_list('id', 'option', 'option_count')
+    ]
+    tally = {
+        'version': int(time.time() * 1000),
+        'total': sum(option['count'] for option in options),
+        'options': options,
+    }
+    cache.set(tally_key(poll_id), tally, TALLY_TIMEOUT)
+    return tally
+
+
+def get_tally(poll_id):
+    """
+    Option counts of a poll from the cache. after a vote the tally is read again,
+    but not more often than once per REBUILD_INTERVAL
+    """
+    tally = cache.get(tally_key(poll_id))
+    if tally is None:
+        return build(poll_id)
+    if cache.get(dirty_key(poll_id)) and time.time() * 1000 - tally['version'] >= REBUILD_INTERVAL * 1000:
+        return build(poll_id)
+    return tally
@@ -1,7 +1,13 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.utils import timezone
 from account.models import User
-from .models import Poll, PollOptions
+from .models import Poll, PollOptions, PollVote
+from poll import tallies, views, votes
 from django.urls import reverse
 from .forms import CreatePollForm
 from django.http import JsonResponse
@@ -244,6 +250,10 @@ class PollURLsTestCase(TestCase):
         response = self.client.get(reverse('poll:poll_result', args=[self.poll.id]))
         self.assertIn(response.status_code, [200, 302])
 
+    def test_poll_result_data_url(self):
+        response = self.client.get(reverse('poll:poll_result_data', args=[self.poll.id]))
+        self.assertIn(response.status_code, [200, 302])
+
     # Add more test cases as needed
 
 
@@ -480,3 +490,142 @@ class PollSystemEndToEndTestCase(TestCase):
         poll_result_url = reverse('poll:poll_result', args=[1])  # Assuming poll ID is 1
         response = client.get(poll_result_url)
         self.assertEqual(response.status_code, 200)  # Check if the result page is accessible
+
+
+# unit test for the vote ledger:
+class PollVoteTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='voter', password='testpassword', national_code='1')
+        self.poll = Poll.objects.create(question='Test Poll', active=True, for_user='all')
+        self.options = [PollOptions.objects.create(poll=self.poll, option=f'Option {i}') for i in range(2)]
+        self.client.login(username='voter', password='testpassword')
+
+    def vote(self, option):
+        return self.client.post(reverse('poll:poll_vote', args=[self.poll.pk]), data={'option': option.pk},
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+    def counts(self):
+        return list(PollOptions.objects.filter(poll=self.poll).order_by('id').values_list('option_count', flat=True))
+
+    def test_repeat_vote_is_rejected(self):
+        self.assertEqual(self.vote(self.options[0]).status_code, 200)
+        response = self.vote(self.options[1])
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['error'])
+        self.assertEqual(self.counts(), [1, 0])
+        self.assertEqual(PollVote.objects.count(), 1)
+
+    def test_option_of_another_poll(self):
+        other = Poll.objects.create(question='Other', active=True)
+        option = PollOptions.objects.create(poll=other, option='Other')
+        self.assertEqual(self.vote(option).status_code, 404)
+
+    def test_reset_votes(self):
+        self.vote(self.options[0])
+        votes.reset_votes(self.poll)
+        self.assertEqual(self.counts(), [0, 0])
+        self.assertFalse(self.poll.users.exists())
+        self.assertEqual(self.vote(self.options[1]).status_code, 200)
+
+    def test_reconcile(self):
+        self.vote(self.options[0])
+        PollOptions.objects.filter(pk=self.options[1].pk).update(option_count=7)
+        legacy = Poll.objects.create(question='Legacy', active=True)
+        legacy_option = PollOptions.objects.create(poll=legacy, option='Old', option_count=3)
+        legacy.users.add(self.user)
+        cache.delete(tallies.dirty_key(self.poll.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            drifted, skipped = votes.reconcile()
+        self.assertEqual(drifted, {self.options[1].pk: (7, 0)})
+        # Cached results are read again
+        self.assertTrue(cache.get(tallies.dirty_key(self.poll.pk)))
+        self.assertEqual(skipped, [legacy])
+        self.assertEqual(self.counts(), [1, 0])
+        legacy_option.refresh_from_db()
+        self.assertEqual(legacy_option.option_count, 3)
+
+
+# unit test for live poll results:
+class PollTallyTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='viewer', password='testpassword', national_code='1')
+        self.poll = Poll.objects.create(question='Test Poll', active=True, for_user='all')
+        self.options = [PollOptions.objects.create(poll=self.poll, option=f'Option {i}') for i in range(2)]
+
+    def test_tally_is_cached(self):
+        tally = tallies.get_tally(self.poll.pk)
+        self.assertEqual([(option['option'], option['count']) for option in tally['options']],
+                         [('Option 0', 0), ('Option 1', 0)])
+        with self.assertNumQueries(0):
+            self.assertEqual(tallies.get_tally(self.poll.pk), tally)
+
+    def test_votes_refresh_the_tally_once_per_interval(self):
+        before = tallies.get_tally(self.poll.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            votes.cast_vote(self.poll, self.options[1], self.user)
+        # Inside the interval the cached tally is kept
+        self.assertEqual(tallies.get_tally(self.poll.pk), before)
+        with mock.patch.object(tallies, 'REBUILD_INTERVAL', 0):
+            after = tallies.get_tally(self.poll.pk)
+            with self.assertNumQueries(0):
+                tallies.get_tally(self.poll.pk)
+        self.assertEqual(after['total'], 1)
+        self.assertEqual([option['count'] for option in after['options']], [0, 1])
+
+    def test_result_views(self):
+        self.client.login(username='viewer', password='testpassword')
+        response = self.client.get(reverse('poll:poll_result', args=[self.poll.pk]))
+        self.assertContains(response, 'data-url=')
+        url = reverse('poll:poll_result_data', args=[self.poll.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['total'], 0)
+        etag = response['ETag']
+        # Nothing changed, the page keeps what it has
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            votes.cast_vote(self.poll, self.options[0], self.user)
+        with mock.patch.object(tallies, 'REBUILD_INTERVAL', 0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 1)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+# unit test for the poll list:
+class PollListTestCase(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(username='student', password='testpassword', national_code='1',
+                                                is_student=True)
+        self.polls = {
+            for_user: Poll.objects.create(question=for_user, active=True, for_user=for_user)
+            for for_user in ('all', 'student', 'teacher')
+        }
+        self.polls['all'].users.add(self.student)
+
+    def test_has_voted_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = sorted((poll.question, poll.has_voted) for poll in views.visible_polls(self.student))
+        self.assertEqual(rows, [('all', True), ('student', False)])
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('poll:poll_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_queries_do_not_grow_with_voters(self):
+        self.client.login(username='student', password='testpassword')
+        before = self.list_queries()
+        voters = [User.objects.create(username=f'voter{i}', national_code=f'9{i}') for i in range(30)]
+        self.polls['student'].users.add(*voters)
+        self.assertEqual(self.list_queries(), before)
+
+    def test_pagination(self):
+        Poll.objects.bulk_create([Poll(question=f'Poll {i}', for_user='all') for i in range(views.POLLS_PER_PAGE)])
+        self.client.login(username='student', password='testpassword')
+        response = self.client.get(reverse('poll:poll_list'))
+        self.assertEqual(len(response.context['polls']), views.POLLS_PER_PAGE)
+        response = self.client.get(reverse('poll:poll_list'), {'page': 2})
+        self.assertEqual(len(response.context['polls']), 2)
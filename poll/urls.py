@@ -10,4 +10,5 @@ urlpatterns = (
     path('update/<int:pk>/', views.PollUpdate.as_view(), name='poll_update'),
     path('vote/<int:pk>/', views.poll_vote, name='poll_vote'),
     path('result/<int:pk>/', views.poll_result, name='poll_result'),
+    path('result/<int:pk>/data/', views.poll_result_data, name='poll_result_data'),
 )
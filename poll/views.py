@@ -1,6 +1,7 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef
 from django.http import (
     Http404,
     JsonResponse,
@@ -10,7 +11,11 @@ from django.shortcuts import (
     get_object_or_404,
 )
 from django.urls import reverse_lazy
+from django.utils.http import quote_etag
 from django.views import generic
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from poll import tallies, votes
 from poll.forms import CreatePollForm
 from poll.models import (
     Poll,
@@ -18,19 +23,33 @@ from poll.models import (
 )
 
 
+POLLS_PER_PAGE = 20
+
+
+def visible_polls(user):
+    """
+    Polls a user may list, with "has_voted" read per row with EXISTS instead of
+    loading every poll's voters
+    """
+    polls = Poll.objects.annotate(has_voted=Exists(
+        Poll.users.through.objects.filter(poll_id=OuterRef('pk'), user_id=user.pk)))
+    if user.is_superuser or user.is_manager:
+        return polls
+    elif user.is_student:
+        return polls.filter(for_user__in=('student', 'all'))
+    elif user.is_parent:
+        return polls.filter(for_user__in=('parent', 'all'))
+    elif user.is_teacher:
+        return polls.filter(for_user__in=('teacher', 'all'))
+    return polls.none()
+
+
 @login_required()
 def poll_list(request):
     context = {
         'page_title': 'لیست نظرسنجی ها',
+        'polls': Paginator(visible_polls(request.user), POLLS_PER_PAGE).get_page(request.GET.get('page')),
     }
-    if request.user.is_superuser or request.user.is_manager:
-        context['polls'] = Poll.objects.all()
-    elif request.user.is_student:
-        context['polls'] = Poll.objects.filter(Q(for_user='student') | Q(for_user='all'))
-    elif request.user.is_parent:
-        context['polls'] = Poll.objects.filter(Q(for_user='parent') | Q(for_user='all'))
-    elif request.user.is_teacher:
-        context['polls'] = Poll.objects.filter(Q(for_user='teacher') | Q(for_user='all'))
     return render(request, "poll/poll_list.html", context)
 
 
@@ -44,7 +63,8 @@ def poll_options_list(request, pk):
             'poll': request.POST['poll'],
             'option': request.POST['option'],
         }
-        poll.users.clear()
+        # New options start the poll over
+        votes.reset_votes(poll)
         PollOptions(poll=Poll.objects.get(pk=input_value['poll']), option=input_value['option']).save()
     context = {
         'page_title': 'لیست گزینه ها',
@@ -73,10 +93,7 @@ class PollUpdate(LoginRequiredMixin, generic.UpdateView):
 
     def form_valid(self, form):
         self.obj = form.save(commit=False)
-        self.obj.users.clear()
-        for option in self.obj.poll_option.all():
-            option.option_count = 0
-            option.save()
+        votes.reset_votes(self.obj)
         return super().form_valid(form)
 
     def get_context_data(self, **kwargs):
@@ -92,11 +109,14 @@ def poll_vote(request, pk):
     """
     poll = get_object_or_404(Poll, pk=pk)
     if request.method == "POST" and request.is_ajax:
+        if not poll.active:
+            raise Http404()
         option_id = request.POST['option']
-        poll.users.add(request.user)
-        option = get_object_or_404(PollOptions, pk=option_id)
-        option.option_count += 1
-        option.save()
+        option = get_object_or_404(PollOptions, pk=option_id, poll=poll)
+        try:
+            votes.cast_vote(poll, option, request.user)
+        except votes.AlreadyVoted:
+            return JsonResponse({"error": True, "message": "شما قبلا در این نظرسنجی شرکت کرده اید"}, status=400)
         return JsonResponse({'pk': pk})
     context = {
         'page_title': 'رای به نظرسنجی',
@@ -112,6 +132,27 @@ def poll_vote(request, pk):
 def poll_result(request, pk):
     context = {
         'page_title': 'نتایج نظرسنجی',
-        'poll': get_object_or_404(Poll, pk=pk)
+        'poll': get_object_or_404(Poll, pk=pk),
+        'tally': tallies.get_tally(pk),
+        'refresh': tallies.REFRESH_SECONDS * 1000,
     }
     return render(request, "poll/poll_result.html", context)
+
+
+def tally_etag(request, pk):
+    return str(tallies.get_tally(pk)['version'])
+
+
+@login_required()
+@cache_control(no_cache=True)
+@condition(etag_func=tally_etag)
+def poll_result_data(request, pk):
+    """
+    Results of a poll for the open results page, asked for every REFRESH_SECONDS.
+    answers 304 without a body while If-None-Match still holds the current version
+    """
+    poll = get_object_or_404(Poll, pk=pk)
+    tally = tallies.get_tally(poll.pk)
+    response = JsonResponse(tally)
+    response['ETag'] = quote_etag(str(tally['version']))
+    return response
@@ -0,0 +1,66 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from poll import tallies
+from poll.models import Poll, PollOptions, PollVote
+
+
+class AlreadyVoted(Exception):
+    pass
+
+
+def cast_vote(poll, option, user):
+    """
+    Record the vote in the ledger and move the option's counter in the same
+    transaction. the counter is moved in the database, so concurrent votes are
+    never lost, and the unique (poll, user) row turns a repeat vote into AlreadyVoted
+    """
+    try:
+        with transaction.atomic():
+            PollVote.objects.create(poll=poll, option=option, user=user)
+            PollOptions.objects.filter(pk=option.pk).update(option_count=F('option_count') + 1)
+            poll.users.add(user)
+            transaction.on_commit(lambda: tallies.mark_dirty(poll.pk))
+    except IntegrityError:
+        raise AlreadyVoted()
+
+
+def reset_votes(poll):
+    """
+    Start the poll over, every user may vote again
+    """
+    with transaction.atomic():
+        PollVote.objects.filter(poll=poll).delete()
+        PollOptions.objects.filter(poll=poll).update(option_count=0)
+        poll.users.clear()
+        transaction.on_commit(lambda: tallies.mark_dirty(poll.pk))
+
+
+def reconcile(polls=None):
+    """
+    Rebuild option_count from the ledger. polls with voters the ledger does not
+    know (votes cast before it existed) are skipped, their counters are all there is.
+    returns {option id: (stored, counted)} of the options that drifted and the skipped polls
+    """
+    polls = Poll.objects.all() if polls is None else polls
+    ledger = Count('vote_poll', distinct=True)
+    voters = Count('users', distinct=True)
+    skipped = list(polls.annotate(ledger=ledger, voters=voters).filter(voters__gt=F('ledger')))
+    options = PollOptions.objects.filter(poll__in=polls).exclude(poll__in=skipped)
+    drifted = {}
+    with transaction.atomic():
+        # Lock the counters first so no vote lands between counting and writing
+        options = list(options.select_for_update().only('id', 'poll_id', 'option_count'))
+        counted = dict(PollVote.objects.filter(option__in=options).values('option').annotate(
+            votes=Count('id')).values_list('option', 'votes'))
+        changed = []
+        for option in options:
+            votes = counted.get(option.pk, 0)
+            if option.option_count != votes:
+                drifted[option.pk] = (option.option_count, votes)
+                option.option_count = votes
+                changed.append(option)
+        PollOptions.objects.bulk_update(changed, ('option_count',), batch_size=500)
+        for poll_id in {option.poll_id for option in changed}:
+            transaction.on_commit(lambda poll_id=poll_id: tallies.mark_dirty(poll_id))
+    return drifted, skipped
@@ -35,8 +35,24 @@ admin.site.register(models.QuizQuestion, QuizQuestionAdmin)
 
 
 class QuizResultAdmin(admin.ModelAdmin):
-    list_display = ('user', 'quiz',)
+    list_display = ('user', 'quiz', 'score', 'percent', 'passed')
     # readonly_fields = ('score',)
 
 
 admin.site.register(models.QuizResult, QuizResultAdmin)
+
+
+class QuizAttemptAdmin(admin.ModelAdmin):
+    list_display = ('user', 'quiz', 'started', 'saved', 'finished')
+
+
+admin.site.register(models.QuizAttempt, QuizAttemptAdmin)
+
+
+class QuizAnswerAdmin(admin.ModelAdmin):
+    list_display = ('result', 'question', 'chosen', 'correct')
+    list_filter = ('correct',)
+    raw_id_fields = ('result', 'question', 'chosen')
+
+
+admin.site.register(models.QuizAnswer, QuizAnswerAdmin)
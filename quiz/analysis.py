@@ -0,0 +1,106 @@
+import statistics
+from collections import Counter
+
+from django.core.cache import cache
+from django.utils.html import strip_tags
+
+from quiz import grading
+from quiz.models import QuizMultipleAnswers, QuizQuestion, QuizResult
+
+ANALYSIS_TIMEOUT = 24 * 60 * 60
+# Share of students in the upper and lower groups of the discrimination index
+GROUP_SHARE = 0.27
+BUCKETS = 10
+
+
+def analysis_key(quiz_id):
+    return f'quiz:analysis:{quiz_id}'
+
+
+def invalidate(quiz_id):
+    cache.delete(analysis_key(quiz_id))
+
+
+def analyze(quiz):
+    """
+    Statistics of every result of a quiz, from one pass over (data, drawn) rows:
+    score distribution, mean/median/stddev of the percent, and per graded question
+    the difficulty index (share answered right), the discrimination index (upper
+    minus lower group share) and how often each option was chosen
+    """
+    key = grading.answer_key(quiz.pk)
+    questions = dict(QuizQuestion.objects.filter(pk__in=key).values_list('id', 'text'))
+    options = {}
+    for answer_id, question_id, text, correct in QuizMultipleAnswers.objects.filter(
+            question_id__in=key).order_by('id').values_list('id', 'question_id', 'text', 'correct'):
+        options.setdefault(question_id, []).append((answer_id, text, correct))
+
+    # (percent, {question id: answer id}, question ids given) per result
+    rows = []
+    for data, drawn in grading.with_draw(QuizResult.objects.filter(quiz=quiz)).values_list('data', 'drawn'):
+        chosen = grading.choices(data)
+        score = sum(1 for question_id, answer_id in chosen.items() if answer_id in key.get(question_id, ()))
+        total = grading.graded_total(key, drawn)
+        rows.append((score * 100 / total if total else 0.0, chosen, set(drawn) if drawn else None))
+    rows.sort(key=lambda row: row[0])
+
+    percents = [row[0] for row in rows]
+    group = max(1, int(len(rows) * GROUP_SHARE)) if rows else 0
+    lower, upper = rows[:group], rows[len(rows) - group:]
+
+    def share_right(group_rows, question_id):
+        given = [chosen for _, chosen, drawn in group_rows if drawn is None or question_id in drawn]
+        if not given:
+            return None
+        return sum(1 for chosen in given if chosen.get(question_id) in key[question_id]) / len(given)
+
+    items = []
+    for question_id in sorted(key):
+        picks = Counter(
+            chosen.get(question_id) for _, chosen, drawn in rows if drawn is None or question_id in drawn)
+        given = sum(picks.values())
+        difficulty = share_right(rows, question_id)
+        upper_share, lower_share = share_right(upper, question_id), share_right(lower, question_id)
+        items.append({
+            'id': question_id,
+            'text': strip_tags(questions.get(question_id, '')),
+            'given': given,
+            'unanswered': picks.get(None, 0),
+            'difficulty': round(difficulty, 3) if difficulty is not None else None,
+            'discrimination': (
+                round(upper_share - lower_share, 3)
+                if upper_share is not None and lower_share is not None else None
+            ),
+            'options': [
+                {'id': answer_id, 'text': text, 'correct': correct, 'count': picks.get(answer_id, 0)}
+                for answer_id, text, correct in options.get(question_id, ())
+            ],
+        })
+
+    distribution = [0] * BUCKETS
+    for percent in percents:
+        distribution[min(int(percent * BUCKETS / 100), BUCKETS - 1)] += 1
+    return {
+        'count': len(rows),
+        'mean': round(statistics.mean(percents), 2) if percents else None,
+        'median': round(statistics.median(percents), 2) if percents else None,
+        'stddev': round(statistics.pstdev(percents), 2) if percents else None,
+        'distribution': [
+            {'start': index * 100 // BUCKETS, 'end': (index + 1) * 100 // BUCKETS, 'count': count}
+            for index, count in enumerate(distribution)
+        ],
+        'questions': items,
+    }
+
+
+def get_analysis(quiz):
+    """
+    Cached analysis of a quiz, dropped when a result arrives or the quiz is edited
+    """
+    cached = cache.get(analysis_key(quiz.pk))
+    version = quiz.updated.timestamp()
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    data = analyze(quiz)
+    cache.set(analysis_key(quiz.pk), (version, data), ANALYSIS_TIMEOUT)
+    return data
@@ -0,0 +1,292 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from quiz import grading, paper
+from quiz.models import Quiz, QuizAttempt, QuizQuestion, QuizResult
+
+# Answers must live in a cache every worker shares (CACHES in settings)
+ATTEMPT_CACHE_TIMEOUT = getattr(settings, 'QUIZ_ATTEMPT_CACHE_TIMEOUT', 6 * 60 * 60)
+FLUSH_EVERY = getattr(settings, 'QUIZ_FLUSH_EVERY', 5)
+FLUSH_SECONDS = getattr(settings, 'QUIZ_FLUSH_SECONDS', 30)
+# Seconds a save may arrive after the deadline, for requests already on their way
+DEADLINE_GRACE = getattr(settings, 'QUIZ_DEADLINE_GRACE', 30)
+SWEEP_BATCH_SIZE = 200
+CLOSE_FIELDS = ('answers', 'result', 'saved', 'finished')
+
+
+def _attempt_key(quiz_id, user_id):
+    return f'quiz:attempt:{quiz_id}:{user_id}'
+
+
+def _answer_key(attempt_id, question_id):
+    return f'quiz:attempt:{attempt_id}:q:{question_id}'
+
+
+def _pending_key(attempt_id):
+    return f'quiz:attempt:{attempt_id}:pending'
+
+
+def _flushed_key(attempt_id):
+    return f'quiz:attempt:{attempt_id}:flushed'
+
+
+class AttemptExpired(Exception):
+    pass
+
+
+class AttemptFinished(AttemptExpired):
+    """
+    The user already submitted the quiz, a new attempt is never opened
+    """
+
+
+def _question_ids(quiz_id, questions):
+    """
+    Question ids an attempt can answer, as strings: its draw, or the whole quiz
+    for attempts made before draws were kept
+    """
+    if not questions:
+        questions = QuizQuestion.objects.filter(quiz_id=quiz_id).values_list('pk', flat=True)
+    return [str(question_id) for question_id in questions]
+
+
+def _cache_attempt(quiz_id, user_id, attempt):
+    cached = {
+        'id': attempt.pk,
+        'deadline': attempt.deadline.timestamp() if attempt.deadline else None,
+        'questions': _question_ids(quiz_id, attempt.questions),
+    }
+    cache.set(_attempt_key(quiz_id, user_id), cached, ATTEMPT_CACHE_TIMEOUT)
+    return cached
+
+
+def _cached_attempt(quiz_id, user_id):
+    """
+    Id and deadline of the user's open attempt on a quiz, started on first use
+    """
+    cached = cache.get(_attempt_key(quiz_id, user_id))
+    if cached is None:
+        cached = _cache_attempt(quiz_id, user_id, _open_attempt(quiz_id, user_id)[0])
+    return cached
+
+
+def start_attempt(quiz_id, user_id):
+    """
+    Make sure the user has an open attempt on the quiz, True when it was just started
+    """
+    if cache.get(_attempt_key(quiz_id, user_id)) is not None:
+        return False
+    attempt, created = _open_attempt(quiz_id, user_id)
+    _cache_attempt(quiz_id, user_id, attempt)
+    return created
+
+
+def get_attempt_id(quiz_id, user_id):
+    """
+    Id of the user's open attempt on a quiz, started on first use
+    """
+    return _cached_attempt(quiz_id, user_id)['id']
+
+
+def remaining_seconds(quiz_id, user_id):
+    """
+    Seconds left until the attempt's deadline, None for an untimed attempt
+    """
+    deadline = _cached_attempt(quiz_id, user_id)['deadline']
+    if deadline is None:
+        return None
+    return max(0, int(deadline - time.time()))
+
+
+def _open_attempt(quiz_id, user_id):
+    attempt = QuizAttempt.objects.filter(quiz_id=quiz_id, user_id=user_id, finished__isnull=True).first()
+    if attempt is not None:
+        return attempt, False
+    # A reload after submitting or after the sweep must not start the clock again
+    if (QuizAttempt.objects.filter(quiz_id=quiz_id, user_id=user_id, finished__isnull=False).exists()
+            or QuizResult.objects.filter(quiz_id=quiz_id, user_id=user_id).exists()):
+        raise AttemptFinished()
+    try:
+        with transaction.atomic():
+            attempt = QuizAttempt.objects.create(quiz_id=quiz_id, user_id=user_id)
+            # Keep the draw, so grading and review see what the student was given
+            quiz = Quiz.objects.get(pk=quiz_id)
+            attempt.questions = [question['id'] for question in draw_questions(quiz, attempt.pk, user_id)]
+            if quiz.time:
+                attempt.deadline = attempt.started + timedelta(minutes=quiz.time)
+            attempt.save(update_fields=['questions', 'deadline'])
+            return attempt, True
+    except IntegrityError:
+        # Another worker started it first
+        return QuizAttempt.objects.get(quiz_id=quiz_id, user_id=user_id, finished__isnull=True), False
+
+
+def draw_questions(quiz, attempt_id, user_id):
+    """
+    The attempt's questions, drawn from the quiz and shuffled with a per (attempt, student) seed
+    """
+    return paper.draw(paper.get_paper(quiz), quiz.number_of_question, seed=f'{attempt_id}:{user_id}')
+
+
+def attempt_questions(quiz, user_id):
+    """
+    Questions of the user's open attempt in the order they were drawn, even when
+    the quiz's questions changed since
+    """
+    cached = _cached_attempt(quiz.pk, user_id)
+    return paper.pick(paper.get_paper(quiz), cached['questions'], seed=f"{cached['id']}:{user_id}")
+
+
+def _answer_keys(attempt_id, question_ids):
+    return [_answer_key(attempt_id, question_id) for question_id in question_ids]
+
+
+def _merge(flushed, attempt_id, question_ids, cached=None):
+    """
+    Answers of an attempt: the last flush, overwritten by the answers still in the cache
+    """
+    if cached is None:
+        cached = cache.get_many(_answer_keys(attempt_id, question_ids))
+    answers = dict(flushed or {})
+    for question_id in question_ids:
+        answer = cached.get(_answer_key(attempt_id, question_id))
+        if answer is not None:
+            answers[question_id] = answer
+    return answers
+
+
+def _answers(attempt_id, question_ids):
+    # Evicted keys fall back to the last flush
+    flushed = QuizAttempt.objects.filter(pk=attempt_id).values_list('answers', flat=True).first()
+    return _merge(flushed, attempt_id, question_ids)
+
+
+def flush(attempt_id, question_ids):
+    answers = _answers(attempt_id, question_ids)
+    QuizAttempt.objects.filter(pk=attempt_id, finished__isnull=True).update(answers=answers, saved=timezone.now())
+
+
+def _clear(attempt_id, question_ids):
+    cache.delete_many(_answer_keys(attempt_id, question_ids) + [_pending_key(attempt_id), _flushed_key(attempt_id)])
+
+
+def record_answer(quiz_id, user_id, answer):
+    """
+    Store one answer in the cache, under its own key so concurrent saves of
+    different questions never overwrite each other; the latest answer to a
+    question wins. answers are written to the database every FLUSH_EVERY answers
+    or FLUSH_SECONDS seconds, AttemptExpired is raised once the deadline has passed
+    """
+    cached = _cached_attempt(quiz_id, user_id)
+    # Checked against the cached deadline, late saves never reach the database
+    if cached['deadline'] is not None and time.time() > cached['deadline'] + DEADLINE_GRACE:
+        raise AttemptExpired()
+    attempt_id, question_id = cached['id'], str(answer['id'])
+    if question_id not in cached['questions']:
+        # Not a question of this attempt, it would never be graded
+        return
+    cache.set(_answer_key(attempt_id, question_id), answer, ATTEMPT_CACHE_TIMEOUT)
+    cache.add(_pending_key(attempt_id), 0, ATTEMPT_CACHE_TIMEOUT)
+    cache.add(_flushed_key(attempt_id), time.time(), ATTEMPT_CACHE_TIMEOUT)
+    try:
+        pending = cache.incr(_pending_key(attempt_id))
+    except ValueError:
+        # Evicted between add and incr
+        pending = FLUSH_EVERY
+    flushed = cache.get(_flushed_key(attempt_id)) or 0
+    if pending >= FLUSH_EVERY or time.time() - flushed >= FLUSH_SECONDS:
+        # Two saves may both flush, each writes every answer cached so far
+        cache.set_many({_pending_key(attempt_id): 0, _flushed_key(attempt_id): time.time()}, ATTEMPT_CACHE_TIMEOUT)
+        flush(attempt_id, cached['questions'])
+
+
+def _cached_or_open(quiz_id, user_id):
+    """
+    The cached attempt or the open one in the database, without starting an attempt
+    """
+    cached = cache.get(_attempt_key(quiz_id, user_id))
+    if cached is not None:
+        return cached
+    attempt = QuizAttempt.objects.filter(
+        quiz_id=quiz_id, user_id=user_id, finished__isnull=True).only('id', 'questions').first()
+    if attempt is None:
+        return None
+    return {'id': attempt.pk, 'questions': _question_ids(quiz_id, attempt.questions)}
+
+
+def get_answers(quiz_id, user_id):
+    """
+    Answers given so far, without starting an attempt
+    """
+    cached = _cached_or_open(quiz_id, user_id)
+    if cached is None:
+        return []
+    return list(_answers(cached['id'], cached['questions']).values())
+
+
+def finish_attempt(quiz, user_id):
+    """
+    Commit the working set and create the quiz result.
+    finishing again (a double click on the end button) returns the last result
+    """
+    cached = _cached_or_open(quiz.pk, user_id)
+    if cached is None:
+        result = QuizResult.objects.filter(quiz=quiz, user_id=user_id).order_by('id').last()
+        if result is not None:
+            return result
+        cached = _cached_attempt(quiz.pk, user_id)
+    attempt_id = cached['id']
+    answers = _answers(attempt_id, cached['questions'])
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.select_for_update().get(pk=attempt_id)
+        if attempt.finished is None:
+            _close(attempt, quiz, answers, timezone.now())
+            grading.grade_quiz(quiz, [attempt.result])
+            grading.store_answers(quiz.pk, [attempt.result])
+            attempt.save(update_fields=CLOSE_FIELDS)
+    cache.delete(_attempt_key(quiz.pk, user_id))
+    _clear(attempt_id, cached['questions'])
+    return attempt.result
+
+
+def _close(attempt, quiz, answers, now):
+    attempt.answers = answers
+    attempt.result = QuizResult.objects.create(quiz=quiz, user_id=attempt.user_id, data=list(answers.values()))
+    attempt.result.drawn = attempt.questions
+    attempt.saved = attempt.finished = now
+
+
+def finish_expired(batch_size=SWEEP_BATCH_SIZE):
+    """
+    Finish one batch of attempts whose deadline passed without a submission (a closed
+    browser), oldest first. results are graded with one bulk_update per quiz and the
+    attempts are closed with one more; returns how many were finished
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Locked rows belong to a student submitting right now or to another sweeper
+        expired = list(QuizAttempt.objects.select_for_update(skip_locked=True, of=('self',)).filter(
+            finished__isnull=True, deadline__lt=now - timedelta(seconds=DEADLINE_GRACE),
+        ).select_related('quiz').order_by('deadline')[:batch_size])
+        question_ids = {attempt.pk: _question_ids(attempt.quiz_id, attempt.questions) for attempt in expired}
+        cached = cache.get_many([
+            key for attempt in expired for key in _answer_keys(attempt.pk, question_ids[attempt.pk])])
+        results = defaultdict(list)
+        for attempt in expired:
+            answers = _merge(attempt.answers, attempt.pk, question_ids[attempt.pk], cached)
+            _close(attempt, attempt.quiz, answers, now)
+            results[attempt.quiz].append(attempt.result)
+        for quiz, quiz_results in results.items():
+            grading.grade_quiz(quiz, quiz_results)
+            grading.store_answers(quiz.pk, quiz_results)
+        QuizAttempt.objects.bulk_update(expired, CLOSE_FIELDS)
+    cache.delete_many([_attempt_key(attempt.quiz_id, attempt.user_id) for attempt in expired])
+    for attempt in expired:
+        _clear(attempt.pk, question_ids[attempt.pk])
+    return len(expired)
@@ -0,0 +1,166 @@
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from quiz.models import Quiz, QuizAnswer, QuizMultipleAnswers, QuizQuestion, QuizResult
+
+# Only multiple choice questions are graded, descriptive ones need a teacher
+GRADED_TYPE = 'چهار گزینه ای'
+GRADE_FIELDS = ('score', 'percent', 'passed')
+
+
+def answer_key(quiz_id):
+    """
+    Question id -> ids of its correct answers, for every graded question of a quiz
+    """
+    key = {
+        question_id: set()
+        for question_id in QuizQuestion.objects.filter(
+            quiz_id=quiz_id, question_type=GRADED_TYPE).values_list('id', flat=True)
+    }
+    for question_id, answer_id in QuizMultipleAnswers.objects.filter(
+            question__quiz_id=quiz_id, question__question_type=GRADED_TYPE, correct=True,
+    ).values_list('question_id', 'id'):
+        key[question_id].add(answer_id)
+    return key
+
+
+def correct_answers(question_id):
+    return set(QuizMultipleAnswers.objects.filter(
+        question_id=question_id, correct=True).values_list('id', flat=True))
+
+
+def choices(data):
+    """
+    Question id -> chosen answer id from the answers stored in QuizResult.data
+    """
+    if not isinstance(data, list):
+        return {}
+    chosen = {}
+    for answer in data:
+        try:
+            chosen[int(answer['id'])] = int(answer['correct'])
+        except (KeyError, TypeError, ValueError):
+            # Descriptive or unanswered
+            continue
+    return chosen
+
+
+def set_grade(result, score, total, required):
+    result.score = score
+    result.percent = round(score * 100 / total, 2) if total else 0.0
+    result.passed = required is None or result.percent >= required
+
+
+def graded_total(key, drawn):
+    """
+    Number of graded questions a student was given, drawn holds the question ids
+    of a pooled attempt and is empty when the student got the whole quiz
+    """
+    if not drawn:
+        return len(key)
+    return sum(1 for question_id in drawn if question_id in key)
+
+
+def with_draw(results):
+    # Question ids each result's attempt was given, read in the same query
+    return results.annotate(drawn=F('attempt_result__questions'))
+
+
+def grade_quiz(quiz, results=None):
+    """
+    Grade the given results of a quiz, or all of them, against one load of its key.
+    results are read as (id, data) rows and written back with one bulk_update
+    """
+    if not isinstance(quiz, Quiz):
+        quiz = Quiz.objects.get(pk=quiz)
+    key = answer_key(quiz.pk)
+    if results is None:
+        results = with_draw(QuizResult.objects.filter(quiz=quiz).only('id', 'data'))
+    graded = []
+    for result in results:
+        chosen = choices(result.data)
+        score = sum(1 for question_id, answer_id in chosen.items() if answer_id in key.get(question_id, ()))
+        set_grade(result, score, graded_total(key, getattr(result, 'drawn', None)), quiz.required_score_to_pass)
+        graded.append(result)
+    QuizResult.objects.bulk_update(graded, GRADE_FIELDS, batch_size=500)
+    return len(graded)
+
+
+def regrade_question(question_id, old_correct):
+    """
+    Move the grades of a question's quiz after its correct answers changed from old_correct.
+    only the edited question is compared and only results whose score moves are written
+    """
+    question = QuizQuestion.objects.select_related('quiz').get(pk=question_id)
+    quiz = question.quiz
+    new_correct = correct_answers(question_id)
+    if question.question_type != GRADED_TYPE or new_correct == set(old_correct):
+        return 0
+    key = answer_key(quiz.pk)
+
+    with transaction.atomic():
+        results = with_draw(QuizResult.objects.select_for_update(of=('self',)).filter(quiz=quiz).only('id', 'data', 'score'))
+        changed, ungraded = [], []
+        for result in results:
+            if result.score is None:
+                ungraded.append(result)
+                continue
+            answer_id = choices(result.data).get(question.pk)
+            delta = (answer_id in new_correct) - (answer_id in old_correct)
+            if delta:
+                set_grade(result, result.score + delta, graded_total(key, result.drawn), quiz.required_score_to_pass)
+                changed.append(result)
+        QuizResult.objects.bulk_update(changed, GRADE_FIELDS, batch_size=500)
+        QuizAnswer.objects.filter(question_id=question_id).update(correct=Case(
+            When(chosen_id__in=new_correct, then=Value(True)), default=Value(False)))
+        if ungraded:
+            grade_quiz(quiz, ungraded)
+    return len(changed) + len(ungraded)
+
+
+def answer_rows(quiz_id, results):
+    """
+    QuizAnswer rows of the given results, one per answered question.
+    answers of deleted questions are skipped and options that no longer belong
+    to their question are kept as an answer without a choice
+    """
+    questions = dict(QuizQuestion.objects.filter(quiz_id=quiz_id).values_list('id', 'question_type'))
+    options, key = {}, {}
+    for answer_id, question_id, correct in QuizMultipleAnswers.objects.filter(
+            question__quiz_id=quiz_id).values_list('id', 'question_id', 'correct'):
+        options[answer_id] = question_id
+        if correct:
+            key.setdefault(question_id, set()).add(answer_id)
+    for result in results:
+        rows = {}
+        for answer in result.data if isinstance(result.data, list) else ():
+            try:
+                question_id = int(answer['id'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if question_id not in questions:
+                continue
+            if 'answer_text' in answer:
+                rows[question_id] = QuizAnswer(result=result, question_id=question_id, text=answer['answer_text'])
+                continue
+            try:
+                chosen = int(answer['correct'])
+            except (KeyError, TypeError, ValueError):
+                chosen = None
+            if options.get(chosen) != question_id:
+                chosen = None
+            rows[question_id] = QuizAnswer(
+                result=result, question_id=question_id, chosen_id=chosen,
+                correct=chosen in key.get(question_id, ()) if questions[question_id] == GRADED_TYPE else None,
+            )
+        yield from rows.values()
+
+
+def store_answers(quiz_id, results):
+    """
+    Copy the answers of submitted results into QuizAnswer, results that already
+    have their rows are left as they are so a store can be repeated
+    """
+    rows = list(answer_rows(quiz_id, results))
+    QuizAnswer.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+    return len(rows)
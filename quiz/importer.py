@@ -0,0 +1,165 @@
+import codecs
+import csv
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+
+from extensions import inline_images
+from quiz import paper
+from quiz.models import Quiz, QuizDescAnswers, QuizMultipleAnswers, QuizQuestion
+
+DESC_TYPE = 'تشریحی'
+MULTIPLE_TYPE = 'چهار گزینه ای'
+TYPE_ALIASES = {
+    '': MULTIPLE_TYPE,
+    'multiple': MULTIPLE_TYPE,
+    MULTIPLE_TYPE: MULTIPLE_TYPE,
+    'descriptive': DESC_TYPE,
+    DESC_TYPE: DESC_TYPE,
+}
+OPTION_MAX_LENGTH = QuizMultipleAnswers._meta.get_field('text').max_length
+BATCH_SIZE = 500
+# Questions made on the page take Date.now() as their id, imported ones are
+# numbered from here on so the two never meet (timestamps reach it in year 33658)
+IMPORTED_ID_START = 10 ** 15
+
+
+class BankError(Exception):
+    """
+    The question bank could not be imported, errors holds (row, message) pairs
+    """
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid row(s)")
+        self.errors = errors
+
+
+def csv_rows(lines):
+    """
+    Questions of a CSV bank, one per row: text, type, option_1 ... option_n and
+    correct (the numbers of the right options, separated by commas)
+    """
+    reader = csv.DictReader(lines)
+    option_fields = sorted(
+        (name for name in reader.fieldnames or () if name and name.startswith('option_')),
+        key=lambda name: int(name[7:]) if name[7:].isdigit() else 0,
+    )
+    for row in reader:
+        options = [(row[name] or '').strip() for name in option_fields]
+        correct = {part.strip() for part in (row.get('correct') or '').split(',') if part.strip()}
+        yield reader.line_num, {
+            'text': row.get('text'),
+            'type': row.get('type'),
+            'options': [
+                {'text': text, 'correct': str(number) in correct}
+                for number, text in enumerate(options, 1) if text
+            ],
+        }
+
+
+def json_rows(file):
+    """
+    Questions of a JSON bank: a list of {"text", "type", "options": [{"text", "correct"}]}
+    """
+    data = json.load(file)
+    if not isinstance(data, list):
+        raise BankError([(0, "فایل باید فهرستی از سوال ها باشد")])
+    for number, row in enumerate(data, 1):
+        yield number, row if isinstance(row, dict) else {}
+
+
+def read_bank(file, name):
+    """
+    (row number, question) pairs of an uploaded or opened bank, by its file extension
+    """
+    if name.lower().endswith('.json'):
+        return json_rows(codecs.getreader('utf-8-sig')(file))
+    if name.lower().endswith('.csv'):
+        return csv_rows(codecs.iterdecode(file, 'utf-8-sig'))
+    raise BankError([(0, "فقط فایل های csv و json پشتیبانی می شوند")])
+
+
+def clean(row):
+    """
+    (question type, text, [(option text, correct)]) of a row or the reason it is invalid
+    """
+    text = (row.get('text') or '').strip()
+    if not text:
+        raise ValueError("متن سوال خالی است")
+    question_type = TYPE_ALIASES.get((row.get('type') or '').strip())
+    if question_type is None:
+        raise ValueError(f"نوع سوال {row.get('type')} نامعتبر است")
+    options = row.get('options') or []
+    if not isinstance(options, list) or not all(isinstance(option, dict) for option in options):
+        raise ValueError("گزینه ها نامعتبر هستند")
+    options = [(str(option.get('text') or '').strip(), bool(option.get('correct'))) for option in options]
+    if question_type == DESC_TYPE:
+        if options:
+            raise ValueError("سوال تشریحی گزینه ندارد")
+        return question_type, text, options
+    if len(options) < 2 or not all(option_text for option_text, _ in options):
+        raise ValueError("سوال چهار گزینه ای حداقل دو گزینه می خواهد")
+    if any(len(option_text) > OPTION_MAX_LENGTH for option_text, _ in options):
+        raise ValueError(f"متن گزینه بیشتر از {OPTION_MAX_LENGTH} حرف است")
+    if not any(correct for _, correct in options):
+        raise ValueError("هیچ گزینه درستی مشخص نشده است")
+    return question_type, text, options
+
+
+def next_question_id():
+    """
+    First free id of the imported questions
+    """
+    largest = QuizQuestion.objects.filter(id__gte=IMPORTED_ID_START).aggregate(largest=Max('id'))['largest']
+    return IMPORTED_ID_START if largest is None else largest + 1
+
+
+def import_questions(quiz, rows):
+    """
+    Validate every row, then create the questions and their answers with bulk_create
+    in one transaction. nothing is created when a row is invalid; returns the
+    number of questions created
+    """
+    questions, errors = [], []
+    try:
+        for number, row in rows:
+            try:
+                questions.append(clean(row))
+            except ValueError as error:
+                errors.append((number, str(error)))
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error):
+        raise BankError([(0, "فایل خوانده نشد")])
+    if errors:
+        raise BankError(errors)
+    if not questions:
+        raise BankError([(0, "فایل سوالی ندارد")])
+
+    try:
+        with transaction.atomic():
+            _create(quiz, questions)
+    except IntegrityError:
+        # An import into another quiz took the same ids first
+        raise BankError([(0, "ورود همزمان سوالات دیگری در جریان است، دوباره تلاش کنید")])
+    return len(questions)
+
+
+def _create(quiz, questions):
+    # A second import into the same quiz (a double submit) waits for this one
+    Quiz.objects.select_for_update().only('id').get(pk=quiz.pk)
+    first_id = next_question_id()
+    QuizQuestion.objects.bulk_create([
+        QuizQuestion(id=first_id + number, text=inline_images.extract(text), quiz=quiz, question_type=question_type)
+        for number, (question_type, text, _) in enumerate(questions)
+    ], batch_size=BATCH_SIZE)
+    QuizMultipleAnswers.objects.bulk_create([
+        QuizMultipleAnswers(text=option_text, correct=correct, question_id=first_id + number)
+        for number, (_, _, options) in enumerate(questions)
+        for option_text, correct in options
+    ], batch_size=BATCH_SIZE)
+    # Descriptive questions get their empty answer, like the ones made on the page
+    QuizDescAnswers.objects.bulk_create([
+        QuizDescAnswers(text='', question_id=first_id + number)
+        for number, (question_type, _, _) in enumerate(questions) if question_type == DESC_TYPE
+    ], batch_size=BATCH_SIZE)
+    paper.touch_quiz(pk=quiz.pk)
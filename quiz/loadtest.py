@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from account.models import User
+from manager.models import Books, Classes
+from quiz import grading
+from quiz.models import Quiz, QuizMultipleAnswers, QuizQuestion, QuizResult
+
+STEPS = ('quiz_start', 'get_questions', 'create_result')
+OPTIONS_PER_QUESTION = 4
+
+
+class Seed:
+    """
+    Class, quiz and students a load test runs against, removed again by delete()
+    """
+
+    def __init__(self, students, questions):
+        run = f'{random.randrange(10 ** 5):05d}'
+        self.classes = Classes.objects.create(name=f'loadtest-{run}')
+        self.book = Books.objects.create(name=f'loadtest-{run}', units=1)
+        self.quiz = Quiz.objects.create(
+            name=f'loadtest-{run}',
+            quiz_class=self.classes,
+            quiz_book=self.book,
+            time=60,
+            required_score_to_pass=50,
+            difficulty='ساده',
+            active=True,
+        )
+        # Question id -> (right answer id, wrong answer ids)
+        self.key = {}
+        # Question ids come from the page as a millisecond timestamp
+        first_id = int(time.time() * 1000)
+        for number in range(questions):
+            question = QuizQuestion.objects.create(id=first_id + number, text=f'Question {number}', quiz=self.quiz)
+            QuizMultipleAnswers.objects.bulk_create([
+                QuizMultipleAnswers(text=f'Option {option}', correct=option == 0, question=question)
+                for option in range(OPTIONS_PER_QUESTION)
+            ])
+            ids = list(QuizMultipleAnswers.objects.filter(question=question).order_by('id').values_list('id', flat=True))
+            self.key[question.pk] = (ids[0], ids[1:])
+        self.students = [
+            User.objects.create(
+                username=f'loadtest-{run}-{number}',
+                national_code=f'{run}{number:05d}',
+                is_student=True,
+                student_class=self.classes,
+            )
+            for number in range(students)
+        ]
+
+    def delete(self):
+        User.objects.filter(pk__in=[student.pk for student in self.students]).delete()
+        self.quiz.delete()
+        self.book.delete()
+        self.classes.delete()
+
+
+def take_quiz(seed, student, rng):
+    """
+    One student through quiz_start -> get_questions -> create_result.
+    returns (step, seconds, status, queries) per request and the score the student earned
+    """
+    client = Client(raise_request_exception=False)
+    client.force_login(student)
+    quiz = seed.quiz
+    samples = []
+
+    def request(step, url, data=None, **extra):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            if data is None:
+                response = client.get(url, **extra)
+            else:
+                response = client.post(url, data, HTTP_X_REQUESTED_WITH='XMLHttpRequest', **extra)
+            seconds = time.perf_counter() - started
+        samples.append((step, seconds, response.status_code, len(queries)))
+
+    answers, expected = [], 0
+    for question_id, (right, wrong) in seed.key.items():
+        chosen = right if rng.random() < 0.5 else rng.choice(wrong)
+        expected += chosen == right
+        answers.append({'id': question_id, 'type': grading.GRADED_TYPE, 'correct': chosen})
+
+    try:
+        request('quiz_start', reverse('quiz:quiz_start', args=(quiz.pk, quiz.uuid)),
+                HTTP_REFERER=reverse('quiz:quiz_list'))
+        for answer in answers[:-1]:
+            request('get_questions', reverse('quiz:get_questions'), dict(answer, pk=quiz.pk))
+        last = answers[-1] if answers else {'type': ''}
+        request('create_result', reverse('quiz:create_result'), dict(last, pk=quiz.pk, uuid=quiz.uuid))
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            # Every worker thread opened its own connection
+            connection.close()
+    return samples, expected
+
+
+def percentile(values, share):
+    """
+    Nearest rank percentile of sorted values
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(share * len(values)) - 1))]
+
+
+def summarize(samples, seconds):
+    """
+    Latency percentiles (ms), throughput, error rate and queries per request
+    for every step and for all requests together
+    """
+    report = {}
+    for step in STEPS + (None,):
+        rows = [sample for sample in samples if step is None or sample[0] == step]
+        latencies = sorted(row[1] * 1000 for row in rows)
+        errors = sum(1 for row in rows if row[2] != 200)
+        report[step or 'total'] = {
+            'requests': len(rows),
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'throughput': len(rows) / seconds if seconds else 0.0,
+            'error_rate': errors / len(rows) if rows else 0.0,
+            'queries': sum(row[3] for row in rows) / len(rows) if rows else 0.0,
+        }
+    return report
+
+
+def run(students=50, workers=10, questions=10, seed=None, keep=False):
+    """
+    Seed a quiz and take it with concurrent simulated students.
+    one worker runs the students in the calling thread. returns the summary and
+    the number of results whose grade differs from the answers the students gave
+    """
+    rng = random.Random(seed)
+    data = Seed(students, questions)
+    try:
+        rngs = [random.Random(rng.random()) for _ in data.students]
+        started = time.perf_counter()
+        if workers == 1:
+            outcomes = [take_quiz(data, student, student_rng) for student, student_rng in zip(data.students, rngs)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(take_quiz, [data] * students, data.students, rngs))
+        seconds = time.perf_counter() - started
+
+        scores = dict(QuizResult.objects.filter(quiz=data.quiz).values_list('user_id', 'score'))
+        mismatches = sum(
+            1 for student, (_, expected) in zip(data.students, outcomes)
+            if scores.get(student.pk) != expected
+        )
+        report = summarize([sample for samples, _ in outcomes for sample in samples], seconds)
+        report['total']['students'] = students
+        report['total']['seconds'] = seconds
+        return report, mismatches
+    finally:
+        if not keep:
+            data.delete()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from quiz.grading import store_answers
+from quiz.models import Quiz, QuizResult
+
+
+class Command(BaseCommand):
+    help = "Copy the answers of quiz results submitted before QuizAnswer existed into it"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quizzes', nargs='*', type=int, help="only backfill these quiz ids")
+        parser.add_argument('--batch-size', type=int, default=500, help="results read per batch")
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.all()
+        if options['quizzes']:
+            quizzes = quizzes.filter(pk__in=options['quizzes'])
+        count = 0
+        for quiz in quizzes:
+            results = QuizResult.objects.filter(quiz=quiz, answer_result__isnull=True).only('id', 'data').order_by('id')
+            batch = []
+            for result in results.iterator(chunk_size=options['batch_size']):
+                batch.append(result)
+                if len(batch) == options['batch_size']:
+                    count += store_answers(quiz.pk, batch)
+                    batch = []
+            count += store_answers(quiz.pk, batch)
+        self.stdout.write(self.style.SUCCESS(f"{count} quiz answer(s) stored"))
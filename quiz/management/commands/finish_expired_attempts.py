@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from quiz.attempts import SWEEP_BATCH_SIZE, finish_expired
+
+
+class Command(BaseCommand):
+    help = "Submit quiz attempts whose deadline passed without a submission (run it every minute from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE,
+                            help="attempts finished per transaction")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            count = finish_expired(options['batch_size'])
+            total += count
+            if count < options['batch_size']:
+                break
+        self.stdout.write(self.style.SUCCESS(f"{total} expired attempt(s) finished"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from quiz.grading import grade_quiz
+from quiz.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Grade quiz results against the current answer keys (for backfills and after key edits outside the site)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quizzes', nargs='*', type=int, help="only grade these quiz ids")
+
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.all()
+        if options['quizzes']:
+            quizzes = quizzes.filter(pk__in=options['quizzes'])
+        count = sum(grade_quiz(quiz) for quiz in quizzes)
+        self.stdout.write(self.style.SUCCESS(f"{count} quiz result(s) graded"))
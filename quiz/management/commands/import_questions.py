@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz import importer
+from quiz.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Import a CSV or JSON question bank into a quiz"
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz', type=int, help="id of the quiz the questions are added to")
+        parser.add_argument('path', help="path of the .csv or .json bank")
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(pk=options['quiz'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f"quiz {options['quiz']} does not exist")
+        with open(options['path'], 'rb') as bank:
+            try:
+                count = importer.import_questions(quiz, importer.read_bank(bank, options['path']))
+            except importer.BankError as error:
+                for row, message in error.errors:
+                    self.stderr.write(f"row {row}: {message}")
+                raise CommandError("nothing was imported")
+        self.stdout.write(self.style.SUCCESS(f"{count} question(s) imported"))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from quiz import loadtest
+
+
+class Command(BaseCommand):
+    help = ("Seed a class and quiz and take it with concurrent simulated students through "
+            "quiz_start -> get_questions -> create_result (never run it against the production database)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50, help="simulated students")
+        parser.add_argument('--workers', type=int, default=10, help="students taking the quiz at the same time")
+        parser.add_argument('--questions', type=int, default=10, help="questions in the seeded quiz")
+        parser.add_argument('--seed', type=int, help="random seed of the students' answers")
+        parser.add_argument('--keep', action='store_true', help="keep the seeded class, quiz and students")
+
+    def handle(self, *args, **options):
+        report, mismatches = loadtest.run(
+            options['students'], options['workers'], options['questions'], options['seed'], options['keep'])
+        total = report['total']
+        self.stdout.write(
+            f"{total['students']} students, {total['requests']} requests in {total['seconds']:.2f}s "
+            f"({total['throughput']:.1f} req/s)")
+        self.stdout.write(f"{'step':<15}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                          f"{'errors':>9}{'queries':>9}")
+        for step in loadtest.STEPS + ('total',):
+            row = report[step]
+            if not row['requests']:
+                continue
+            self.stdout.write(
+                f"{step:<15}{row['requests']:>9}{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}"
+                f"{row['error_rate']:>9.1%}{row['queries']:>9.1f}")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"{mismatches} result(s) graded differently from the answers given"))
+        else:
+            self.stdout.write(self.style.SUCCESS("every result graded as answered"))
+        if total['error_rate']:
+            self.stdout.write(self.style.WARNING(f"{total['error_rate']:.1%} of the requests did not answer 200"))
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-17 19:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quiz', '0002_auto_20220219_0906'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers', models.JSONField(default=dict, verbose_name='پاسخ ها')),
+                ('started', models.DateTimeField(default=django.utils.timezone.now, verbose_name='زمان شروع')),
+                ('saved', models.DateTimeField(blank=True, null=True, verbose_name='آخرین ذخیره پاسخ ها')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='زمان پایان')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_quiz', to='quiz.quiz', verbose_name='آزمون')),
+                ('result', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempt_result', to='quiz.quizresult', verbose_name='نتیجه')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_user', to=settings.AUTH_USER_MODEL, verbose_name='دانش آموز')),
+            ],
+            options={
+                'verbose_name': 'شرکت در آزمون',
+                'verbose_name_plural': '5. شرکت در آزمون ها',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='quizattempt',
+            constraint=models.UniqueConstraint(condition=models.Q(finished__isnull=True), fields=('quiz', 'user'), name='one_open_attempt_per_user'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-17 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0003_quiz_attempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizresult',
+            name='passed',
+            field=models.BooleanField(blank=True, db_index=True, null=True, verbose_name='قبول شده'),
+        ),
+        migrations.AddField(
+            model_name='quizresult',
+            name='percent',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='درصد'),
+        ),
+        migrations.AddField(
+            model_name='quizresult',
+            name='score',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='تعداد پاسخ های درست سوال های چهار گزینه ای', null=True, verbose_name='نمره'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-17 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0004_quiz_result_grade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='questions',
+            field=models.JSONField(blank=True, default=list, help_text='سوال هایی که از بانک سوال برای این دانش آموز انتخاب شد', verbose_name='سوال های آزمون'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-17 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0005_quiz_attempt_questions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='deadline',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='مهلت پایان'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-17 20:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0006_quiz_attempt_deadline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(blank=True, null=True, verbose_name='متن پاسخ')),
+                ('correct', models.BooleanField(blank=True, null=True, verbose_name='پاسخ درست')),
+                ('chosen', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answer_chosen', to='quiz.quizmultipleanswers', verbose_name='گزینه انتخاب شده')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_quiz_question', to='quiz.quizquestion', verbose_name='سوال')),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_result', to='quiz.quizresult', verbose_name='نتیجه')),
+            ],
+            options={
+                'verbose_name': 'پاسخ دانش آموز',
+                'verbose_name_plural': '6. پاسخ های دانش آموزان',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='quizanswer',
+            index=models.Index(fields=['question', 'chosen'], name='quiz_answer_chosen_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='quizanswer',
+            constraint=models.UniqueConstraint(fields=('result', 'question'), name='one_answer_per_question'),
+        ),
+    ]
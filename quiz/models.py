@@ -246,6 +246,25 @@ class QuizResult(models.Model):
     data = models.JSONField(
         verbose_name='اطلاعات'
     )
+    score = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        db_index=True,
+        help_text='تعداد پاسخ های درست سوال های چهار گزینه ای',
+        verbose_name='نمره',
+    )
+    percent = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='درصد',
+    )
+    passed = models.BooleanField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='قبول شده',
+    )
 
     # Metadata
     class Meta:
@@ -255,3 +274,130 @@ class QuizResult(models.Model):
     # Methods
     def __str__(self):
         return "str(self.pk)"
+
+
+class QuizAttempt(models.Model):
+    """
+    Model for a student's run of a quiz
+    answers live in the cache while the quiz is open and are flushed here
+    in batches, the attempt is finished when its result is created
+    """
+
+    # Fields
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='attempt_quiz',
+        verbose_name='آزمون',
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='attempt_user',
+        verbose_name='دانش آموز',
+    )
+    questions = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='سوال هایی که از بانک سوال برای این دانش آموز انتخاب شد',
+        verbose_name='سوال های آزمون',
+    )
+    answers = models.JSONField(
+        default=dict,
+        verbose_name='پاسخ ها',
+    )
+    started = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='زمان شروع',
+    )
+    saved = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='آخرین ذخیره پاسخ ها',
+    )
+    deadline = models.DateTimeField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='مهلت پایان',
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='زمان پایان',
+    )
+    result = models.OneToOneField(
+        QuizResult,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='attempt_result',
+        verbose_name='نتیجه',
+    )
+
+    # Metadata
+    class Meta:
+        verbose_name = "شرکت در آزمون"
+        verbose_name_plural = '5. شرکت در آزمون ها'
+        constraints = (
+            models.UniqueConstraint(fields=('quiz', 'user'), condition=models.Q(finished__isnull=True),
+                                    name='one_open_attempt_per_user'),
+        )
+
+    # Methods
+    def __str__(self):
+        return f"{self.quiz} - {self.user}"
+
+
+class QuizAnswer(models.Model):
+    """
+    Model for one submitted answer of a quiz result
+    a normalized copy of QuizResult.data for question level queries
+    """
+
+    # Fields
+    result = models.ForeignKey(
+        QuizResult,
+        on_delete=models.CASCADE,
+        related_name='answer_result',
+        verbose_name='نتیجه',
+    )
+    question = models.ForeignKey(
+        QuizQuestion,
+        on_delete=models.CASCADE,
+        related_name='answer_quiz_question',
+        verbose_name='سوال',
+    )
+    chosen = models.ForeignKey(
+        QuizMultipleAnswers,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='answer_chosen',
+        verbose_name='گزینه انتخاب شده',
+    )
+    text = models.TextField(
+        null=True,
+        blank=True,
+        verbose_name='متن پاسخ',
+    )
+    correct = models.BooleanField(
+        null=True,
+        blank=True,
+        verbose_name='پاسخ درست',
+    )
+
+    # Metadata
+    class Meta:
+        verbose_name = "پاسخ دانش آموز"
+        verbose_name_plural = '6. پاسخ های دانش آموزان'
+        indexes = (
+            models.Index(fields=('question', 'chosen'), name='quiz_answer_chosen_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(fields=('result', 'question'), name='one_answer_per_question'),
+        )
+
+    # Methods
+    def __str__(self):
+        return f"{self.result_id} - {self.question_id}"
@@ -0,0 +1,98 @@
+import random
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from quiz.models import Quiz, QuizMultipleAnswers, QuizQuestion
+
+PAPER_TIMEOUT = 24 * 60 * 60
+
+
+def paper_key(quiz):
+    # Any edit moves quiz.updated, so a stale paper is never read again
+    return f'quiz:paper:{quiz.pk}:{quiz.updated.timestamp()}'
+
+
+def compile_paper(quiz):
+    """
+    Questions of a quiz with their answers in two queries, as plain tuples:
+    (id, text, type, ((answer id, answer text), ...), (descriptive answer id, ...))
+    """
+    questions = QuizQuestion.objects.filter(quiz_id=quiz.pk).order_by('id').prefetch_related(
+        Prefetch('answer_multi_question', queryset=QuizMultipleAnswers.objects.order_by('id').only(
+            'id', 'text', 'question_id')),
+        'answer_desc_question',
+    ).only('id', 'text', 'question_type')
+    return tuple(
+        (
+            question.id,
+            question.text,
+            question.question_type,
+            tuple((answer.id, answer.text) for answer in question.answer_multi_question.all()),
+            tuple(answer.id for answer in question.answer_desc_question.all()),
+        )
+        for question in questions
+    )
+
+
+def get_paper(quiz):
+    """
+    Compiled paper of a quiz, built at most once per quiz version
+    """
+    key = paper_key(quiz)
+    paper = cache.get(key)
+    if paper is None:
+        paper = compile_paper(quiz)
+        cache.set(key, paper, PAPER_TIMEOUT)
+    return paper
+
+
+def touch_quiz(**filters):
+    """
+    Move updated of the matching quizzes after their questions or answers changed
+    """
+    Quiz.objects.filter(**filters).update(updated=timezone.now())
+
+
+def _questions(paper, rng):
+    questions = []
+    for question_id, text, question_type, answers, desc_answers in paper:
+        answers = [{'id': answer_id, 'text': answer_text} for answer_id, answer_text in answers]
+        rng.shuffle(answers)
+        questions.append({
+            'id': question_id,
+            'text': text,
+            'question_type': question_type,
+            'answers': answers,
+            'desc_answers': desc_answers,
+        })
+    return questions
+
+
+def draw(paper, count=None, seed=None):
+    """
+    Questions of a paper as dicts for the template.
+    count questions are drawn from the paper (all of them when count is empty or
+    larger), then questions and answer options are shuffled; the same seed always
+    gives the same paper
+    """
+    rng = random.Random(seed)
+    if count and count < len(paper):
+        paper = rng.sample(paper, count)
+    else:
+        paper = rng.sample(paper, len(paper))
+    return _questions(paper, rng)
+
+
+def pick(paper, question_ids, seed=None):
+    """
+    Questions of a paper drawn earlier, in the order of question_ids with their
+    answer options shuffled by seed. each question has its own seed, so a question
+    deleted since is left out without moving the options of the others
+    """
+    by_id = {str(question[0]): question for question in paper}
+    return [
+        _questions([by_id[str(question_id)]], random.Random(f'{seed}:{question_id}'))[0]
+        for question_id in question_ids if str(question_id) in by_id
+    ]
@@ -343,6 +343,7 @@ $(".text-answer").change(function () {
             id: id,
             type: type,
             answer_text: answer_text,
+            pk: $("#quiz_pk").val(),
             csrfmiddlewaretoken: csrf,
         },
         success: function () {},
@@ -362,6 +363,7 @@ $(".multi-answer").change(function () {
             id: id,
             type: type,
             correct: correct,
+            pk: $("#quiz_pk").val(),
             csrfmiddlewaretoken: csrf,
         },
         success: function () {},
@@ -393,6 +395,9 @@ $(".end-quiz-2").click(function () {
 $.ajax({
     type: "GET",
     url: "/quiz/answers/",
+    data: {
+        pk: $("#quiz_pk").val(),
+    },
     success: function (response) {
         var data = response;
         let id, answer_text, correct, type, qus_id_;
@@ -452,21 +457,14 @@ let quiz_uuid = document.getElementById("quiz_uuid").value;
 //}
 
 time = time * 60;
+// Seconds left until the deadline the server keeps for this attempt
+let remaining = document.getElementById("remaining").value;
 document.addEventListener("DOMContentLoaded", function (event) {
-    if (sessionStorage.getItem("counter")) {
-        if (sessionStorage.getItem("counter") <= 0) {
-            var value = time;
-        } else {
-            var value = sessionStorage.getItem("counter");
-        }
-    } else {
-        var value = time;
-    }
+    var value = remaining !== "" ? parseInt(remaining) : time;
 
     var counter = function () {
         if (value <= 0) {
-            sessionStorage.removeItem("counter");
-            value = time;
+            clearInterval(interval);
             $.ajax({
                 type: "post",
                 url: "/quiz/create-result-2/",
@@ -484,8 +482,7 @@ document.addEventListener("DOMContentLoaded", function (event) {
                 },
             });
         } else {
-            value = parseInt(value) - 1;
-            sessionStorage.setItem("counter", value);
+            value = value - 1;
         }
         if (value <= 60) {
             timer_box.style.color = "#dc3545";
@@ -1,11 +1,20 @@
+import json
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from account.models import User
 from manager.models import Classes, Books
-from .models import Quiz, QuizQuestion, QuizMultipleAnswers, QuizDescAnswers, QuizResult
+from .models import Quiz, QuizQuestion, QuizMultipleAnswers, QuizDescAnswers, QuizResult, QuizAttempt, QuizAnswer
 from django.test import SimpleTestCase
 from django.urls import reverse, resolve
-from quiz import views
+from quiz import analysis, attempts, grading, importer, loadtest, paper, views
 
 # unit tests for models:
 class QuizModelTestCase(TestCase):
@@ -70,6 +79,585 @@ class QuizModelTestCase(TestCase):
         self.assertEqual(str(result), 'str(self.pk)')
 
 
+# unit test for quiz attempts:
+class QuizAttemptTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        quiz_class = Classes.objects.create(name='Test Class')
+        self.student = User.objects.create(username='student', password='testpassword', national_code='1',
+                                           is_student=True, student_class=quiz_class)
+        self.other = User.objects.create(username='other', password='testpassword', national_code='2',
+                                         is_student=True, student_class=quiz_class)
+        self.quiz = Quiz.objects.create(
+            name='Attempt Quiz',
+            topic='Test Topic',
+            quiz_class=quiz_class,
+            quiz_book=Books.objects.create(name='Test Book', units=3),
+            time=30,
+        )
+        for qus_id in range(1, attempts.FLUSH_EVERY + 2):
+            QuizQuestion.objects.create(id=qus_id, text=f'Question {qus_id}', quiz=self.quiz)
+
+    def answer(self, qus_id, correct):
+        return {'id': str(qus_id), 'type': 'چهار گزینه ای', 'correct': str(correct)}
+
+    def test_attempts_are_per_user(self):
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(1, 10))
+        attempts.record_answer(self.quiz.pk, self.other.pk, self.answer(1, 11))
+        self.assertEqual(attempts.get_answers(self.quiz.pk, self.student.pk), [self.answer(1, 10)])
+        self.assertEqual(attempts.get_answers(self.quiz.pk, self.other.pk), [self.answer(1, 11)])
+        self.assertEqual(QuizAttempt.objects.filter(quiz=self.quiz).count(), 2)
+
+    def test_latest_answer_wins(self):
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(1, 10))
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(1, 12))
+        self.assertEqual(attempts.get_answers(self.quiz.pk, self.student.pk), [self.answer(1, 12)])
+
+    def test_answers_are_flushed_in_batches(self):
+        for qus_id in range(1, attempts.FLUSH_EVERY):
+            attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(qus_id, 1))
+        attempt = QuizAttempt.objects.get(user=self.student)
+        self.assertEqual(attempt.answers, {})
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(attempts.FLUSH_EVERY, 1))
+        attempt.refresh_from_db()
+        self.assertEqual(len(attempt.answers), attempts.FLUSH_EVERY)
+        self.assertIsNotNone(attempt.saved)
+
+    def test_answers_of_other_questions_are_ignored(self):
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(99, 10))
+        self.assertEqual(attempts.get_answers(self.quiz.pk, self.student.pk), [])
+
+    def test_answers_are_kept_per_question(self):
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(1, 10))
+        attempt_id = attempts.get_attempt_id(self.quiz.pk, self.student.pk)
+        # A save of another question in another worker does not touch this one
+        cache.set(attempts._answer_key(attempt_id, '2'), self.answer(2, 11))
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(3, 12))
+        self.assertCountEqual(attempts.get_answers(self.quiz.pk, self.student.pk),
+                              [self.answer(1, 10), self.answer(2, 11), self.answer(3, 12)])
+
+    def test_working_set_survives_cache_loss(self):
+        for qus_id in range(1, attempts.FLUSH_EVERY + 1):
+            attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(qus_id, 1))
+        cache.clear()
+        self.assertEqual(len(attempts.get_answers(self.quiz.pk, self.student.pk)), attempts.FLUSH_EVERY)
+
+    def test_finish_attempt(self):
+        self.assertTrue(attempts.start_attempt(self.quiz.pk, self.student.pk))
+        self.assertFalse(attempts.start_attempt(self.quiz.pk, self.student.pk))
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(1, 10))
+        result = attempts.finish_attempt(self.quiz, self.student.pk)
+        self.assertEqual(result.data, [self.answer(1, 10)])
+        attempt = QuizAttempt.objects.get(user=self.student)
+        self.assertEqual(attempt.result, result)
+        self.assertIsNotNone(attempt.finished)
+        self.assertEqual(attempt.answers, {'1': self.answer(1, 10)})
+        self.assertEqual(attempts.get_answers(self.quiz.pk, self.student.pk), [])
+        # The next visit does not start the quiz again
+        with self.assertRaises(attempts.AttemptFinished):
+            attempts.start_attempt(self.quiz.pk, self.student.pk)
+        self.assertEqual(attempts.finish_attempt(self.quiz, self.student.pk), result)
+
+    def test_deadline_is_set_from_quiz_time(self):
+        attempts.start_attempt(self.quiz.pk, self.student.pk)
+        attempt = QuizAttempt.objects.get(user=self.student)
+        self.assertEqual(attempt.deadline - attempt.started, timedelta(minutes=30))
+        self.assertTrue(29 * 60 < attempts.remaining_seconds(self.quiz.pk, self.student.pk) <= 30 * 60)
+
+    def expire(self):
+        attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(1, 10))
+        deadline = timezone.now() - timedelta(seconds=attempts.DEADLINE_GRACE + 1)
+        QuizAttempt.objects.filter(user=self.student).update(deadline=deadline)
+        cache.delete(attempts._attempt_key(self.quiz.pk, self.student.pk))
+
+    def test_late_answers_are_rejected(self):
+        self.expire()
+        attempts.get_attempt_id(self.quiz.pk, self.student.pk)
+        with self.assertNumQueries(0):
+            with self.assertRaises(attempts.AttemptExpired):
+                attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(2, 10))
+        self.assertEqual(attempts.get_answers(self.quiz.pk, self.student.pk), [self.answer(1, 10)])
+
+    def test_finish_expired(self):
+        self.expire()
+        attempts.record_answer(self.quiz.pk, self.other.pk, self.answer(1, 11))
+        self.assertEqual(attempts.finish_expired(), 1)
+        attempt = QuizAttempt.objects.get(user=self.student)
+        self.assertIsNotNone(attempt.finished)
+        # Answers still in the cache are submitted
+        self.assertEqual(attempt.result.data, [self.answer(1, 10)])
+        self.assertEqual(attempt.result.score, 0)
+        self.assertIsNone(QuizAttempt.objects.get(user=self.other).finished)
+        self.assertEqual(attempts.finish_expired(), 0)
+
+    def test_expired_then_reload(self):
+        self.expire()
+        attempts.finish_expired()
+        with self.assertRaises(attempts.AttemptFinished):
+            attempts.start_attempt(self.quiz.pk, self.student.pk)
+        with self.assertRaises(attempts.AttemptExpired):
+            attempts.record_answer(self.quiz.pk, self.student.pk, self.answer(2, 10))
+        attempts.finish_attempt(self.quiz, self.student.pk)
+        self.assertEqual(QuizAttempt.objects.filter(user=self.student).count(), 1)
+        self.assertEqual(QuizResult.objects.filter(user=self.student).count(), 1)
+
+    def test_result_views_use_the_attempt(self):
+        self.client.force_login(self.student)
+        data = {'pk': self.quiz.pk, 'uuid': self.quiz.uuid}
+        self.client.post(reverse('quiz:get_questions'), {**data, **self.answer(1, 10)})
+        response = self.client.get(reverse('quiz:answers_data'), {'pk': self.quiz.pk})
+        self.assertEqual(response.json(), [self.answer(1, 10)])
+        self.client.post(reverse('quiz:create_result_2'), data)
+        self.client.post(reverse('quiz:create_result_2'), data)
+        self.assertEqual(QuizResult.objects.get(user=self.student).data, [self.answer(1, 10)])
+        self.assertEqual(self.client.get(reverse('quiz:answers_data'), {'pk': self.quiz.pk}).json(), {})
+
+    def test_quiz_start_after_the_sweep(self):
+        self.client.force_login(self.student)
+        url = reverse('quiz:quiz_start', args=[self.quiz.pk, self.quiz.uuid])
+        referer = reverse('quiz:quiz_list')
+        self.assertEqual(self.client.get(url, HTTP_REFERER=referer).status_code, 200)
+        self.expire()
+        attempts.finish_expired()
+        result = QuizResult.objects.get(user=self.student)
+        response = self.client.get(url, HTTP_REFERER=referer)
+        self.assertRedirects(response, reverse('quiz:result_detail', args=[result.pk, self.student.pk]),
+                             fetch_redirect_response=False)
+        response = self.client.post(url, {'pk': self.quiz.pk, **self.answer(2, 10)}, HTTP_REFERER=referer,
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(QuizAttempt.objects.filter(user=self.student).count(), 1)
+        self.assertEqual(QuizResult.objects.filter(user=self.student).count(), 1)
+
+    def test_answers_data_checks_the_quiz(self):
+        self.client.force_login(self.student)
+        url = reverse('quiz:answers_data')
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'pk': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'pk': self.quiz.pk + 1}).status_code, 404)
+        self.assertEqual(self.client.get(url, {'pk': self.quiz.pk}).json(), {})
+
+    def test_get_questions_checks_the_quiz(self):
+        self.client.force_login(self.student)
+        url = reverse('quiz:get_questions')
+        self.assertEqual(self.client.post(url, self.answer(1, 10)).status_code, 400)
+        self.assertEqual(self.client.post(url, {'pk': 'abc', **self.answer(1, 10)}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'pk': self.quiz.pk + 1, **self.answer(1, 10)}).status_code, 404)
+        # A quiz of another class
+        User.objects.filter(pk=self.student.pk).update(student_class=Classes.objects.create(name='Other Class'))
+        self.assertEqual(self.client.post(url, {'pk': self.quiz.pk, **self.answer(1, 10)}).status_code, 404)
+        self.assertFalse(QuizAttempt.objects.exists())
+        User.objects.filter(pk=self.student.pk).update(student_class=self.quiz.quiz_class)
+        self.client.post(url, {'pk': self.quiz.pk, **self.answer(1, 10)})
+        # Once the attempt is open: one query for the quiz, none to list the visible ones
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, {'pk': self.quiz.pk, **self.answer(1, 10)})
+        self.assertEqual(sum('FROM "quiz_quiz"' in query['sql'] for query in queries.captured_queries), 1)
+        self.assertEqual(self.client.post(url, {'pk': self.quiz.pk, **self.answer(1, 10)}).status_code, 200)
+        self.assertEqual(attempts.get_answers(self.quiz.pk, self.student.pk), [self.answer(1, 10)])
+
+
+# unit test for grading:
+class GradingTestCase(TestCase):
+    def setUp(self):
+        self.quiz = Quiz.objects.create(
+            name='Graded Quiz',
+            quiz_class=Classes.objects.create(name='Test Class'),
+            quiz_book=Books.objects.create(name='Test Book', units=3),
+            time=30,
+            required_score_to_pass=50,
+        )
+        self.questions = [
+            QuizQuestion.objects.create(id=qus_id, text=f'Question {qus_id}', quiz=self.quiz)
+            for qus_id in (11, 12)
+        ]
+        QuizQuestion.objects.create(id=13, text='Describe', quiz=self.quiz, question_type='تشریحی')
+        self.right = [QuizMultipleAnswers.objects.create(text='Right', correct=True, question=qus)
+                      for qus in self.questions]
+        self.wrong = [QuizMultipleAnswers.objects.create(text='Wrong', question=qus) for qus in self.questions]
+        self.users = [User.objects.create(username=f'user{i}', national_code=str(i), is_student=True)
+                      for i in range(3)]
+
+    def result(self, user, *chosen):
+        data = [{'id': str(ans.question_id), 'type': 'چهار گزینه ای', 'correct': str(ans.pk)} for ans in chosen]
+        data.append({'id': '13', 'type': 'تشریحی', 'answer_text': 'text'})
+        return QuizResult.objects.create(quiz=self.quiz, user=user, data=data)
+
+    def grades(self):
+        return list(QuizResult.objects.order_by('user__username').values_list(*grading.GRADE_FIELDS))
+
+    def test_answer_key(self):
+        self.assertEqual(grading.answer_key(self.quiz.pk), {11: {self.right[0].pk}, 12: {self.right[1].pk}})
+
+    def test_grade_quiz(self):
+        self.result(self.users[0], *self.right)
+        self.result(self.users[1], self.right[0], self.wrong[1])
+        self.result(self.users[2], self.wrong[0])
+        QuizResult.objects.create(quiz=self.quiz, user=self.users[2], data={'score': 80})
+        with self.assertNumQueries(5):
+            self.assertEqual(grading.grade_quiz(self.quiz.pk), 4)
+        self.assertEqual(self.grades(), [(2, 100.0, True), (1, 50.0, True), (0, 0.0, False), (0, 0.0, False)])
+
+    def test_regrade_question(self):
+        self.result(self.users[0], *self.right)
+        self.result(self.users[1], self.right[0], self.wrong[1])
+        self.result(self.users[2], self.wrong[0])
+        grading.grade_quiz(self.quiz)
+        old_correct = grading.correct_answers(self.questions[0].pk)
+        QuizMultipleAnswers.objects.filter(pk=self.wrong[0].pk).update(correct=True)
+        QuizMultipleAnswers.objects.filter(pk=self.right[0].pk).update(correct=False)
+        self.assertEqual(grading.regrade_question(self.questions[0].pk, old_correct), 3)
+        self.assertEqual(self.grades(), [(1, 50.0, True), (0, 0.0, False), (1, 50.0, True)])
+        # Nothing moves when the key did not change
+        self.assertEqual(grading.regrade_question(self.questions[0].pk, {self.wrong[0].pk}), 0)
+
+    def test_regrade_grades_ungraded_results(self):
+        self.result(self.users[0], *self.right)
+        self.assertEqual(grading.regrade_question(self.questions[1].pk, set()), 1)
+        self.assertEqual(self.grades(), [(2, 100.0, True)])
+
+    def test_pooled_results_are_graded_on_their_draw(self):
+        QuizQuestion.objects.filter(question_type='تشریحی').delete()
+        Quiz.objects.filter(pk=self.quiz.pk).update(number_of_question=1)
+        self.quiz.refresh_from_db()
+        cache.clear()
+        attempts.start_attempt(self.quiz.pk, self.users[0].pk)
+        drawn = QuizAttempt.objects.get(user=self.users[0]).questions
+        right = next(ans for ans in self.right if ans.question_id in drawn)
+        attempts.record_answer(self.quiz.pk, self.users[0].pk,
+                               {'id': str(right.question_id), 'type': 'چهار گزینه ای', 'correct': str(right.pk)})
+        result = attempts.finish_attempt(self.quiz, self.users[0].pk)
+        self.assertEqual((result.score, result.percent), (1, 100.0))
+        grading.grade_quiz(self.quiz)
+        result.refresh_from_db()
+        self.assertEqual((result.score, result.percent), (1, 100.0))
+
+    def test_finished_attempt_is_graded(self):
+        cache.clear()
+        attempts.record_answer(self.quiz.pk, self.users[0].pk,
+                               {'id': '11', 'type': 'چهار گزینه ای', 'correct': str(self.right[0].pk)})
+        result = attempts.finish_attempt(self.quiz, self.users[0].pk)
+        self.assertEqual((result.score, result.percent, result.passed), (1, 50.0, True))
+        self.assertEqual(list(result.answer_result.values_list('question_id', 'chosen_id', 'correct')),
+                         [(11, self.right[0].pk, True)])
+
+    def test_store_answers(self):
+        result = self.result(self.users[0], self.right[0], self.wrong[1])
+        result.data.append({'id': '99', 'type': 'چهار گزینه ای', 'correct': '1'})
+        self.assertEqual(grading.store_answers(self.quiz.pk, [result]), 3)
+        self.assertEqual(
+            list(QuizAnswer.objects.order_by('question_id').values_list('question_id', 'chosen_id', 'text', 'correct')),
+            [(11, self.right[0].pk, None, True), (12, self.wrong[1].pk, None, False), (13, None, 'text', None)])
+        # Storing again leaves the rows as they are
+        grading.store_answers(self.quiz.pk, [result])
+        self.assertEqual(QuizAnswer.objects.count(), 3)
+
+    def test_regrade_moves_answer_rows(self):
+        result = self.result(self.users[0], *self.right)
+        grading.store_answers(self.quiz.pk, [result])
+        old_correct = grading.correct_answers(self.questions[0].pk)
+        QuizMultipleAnswers.objects.filter(pk=self.wrong[0].pk).update(correct=True)
+        QuizMultipleAnswers.objects.filter(pk=self.right[0].pk).update(correct=False)
+        grading.regrade_question(self.questions[0].pk, old_correct)
+        self.assertFalse(QuizAnswer.objects.get(question_id=11).correct)
+
+    def test_backfill_quiz_answers(self):
+        self.result(self.users[0], *self.right)
+        self.result(self.users[1], self.wrong[0])
+        out = StringIO()
+        call_command('backfill_quiz_answers', stdout=out)
+        self.assertIn('5 quiz answer(s) stored', out.getvalue())
+        self.assertEqual(QuizAnswer.objects.count(), 5)
+        self.assertEqual(QuizAnswer.objects.filter(question_id=11, chosen=self.wrong[0]).count(), 1)
+
+
+
+# unit test for the load test harness:
+class LoadTestTestCase(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual([loadtest.percentile(values, share) for share in (0.5, 0.95, 0.99)], [50, 95, 99])
+        self.assertIsNone(loadtest.percentile([], 0.5))
+
+    def test_run(self):
+        cache.clear()
+        report, mismatches = loadtest.run(students=3, workers=1, questions=3, seed=1)
+        self.assertEqual(mismatches, 0)
+        self.assertEqual([report[step]['requests'] for step in loadtest.STEPS + ('total',)], [3, 6, 3, 12])
+        self.assertEqual([report[step]['error_rate'] for step in loadtest.STEPS], [0.0, 0.0, 0.0])
+        # The seeded class, quiz and students are removed again
+        self.assertFalse(Quiz.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+# unit test for compiled papers:
+class QuizPaperTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.quiz = Quiz.objects.create(
+            name='Paper Quiz',
+            quiz_class=Classes.objects.create(name='Test Class'),
+            quiz_book=Books.objects.create(name='Test Book', units=3),
+            time=30,
+        )
+        self.question = QuizQuestion.objects.create(id=21, text='Multi', quiz=self.quiz)
+        self.answer = QuizMultipleAnswers.objects.create(text='Right', correct=True, question=self.question)
+        desc = QuizQuestion.objects.create(id=22, text='Describe', quiz=self.quiz, question_type='تشریحی')
+        self.desc_answer = QuizDescAnswers.objects.create(text='', question=desc)
+        self.quiz.refresh_from_db()
+
+    def test_compile_paper(self):
+        with self.assertNumQueries(3):
+            compiled = paper.compile_paper(self.quiz)
+        self.assertEqual(compiled, (
+            (21, 'Multi', 'چهار گزینه ای', ((self.answer.pk, 'Right'),), ()),
+            (22, 'Describe', 'تشریحی', (), (self.desc_answer.pk,)),
+        ))
+
+    def test_paper_is_compiled_once_per_version(self):
+        paper.get_paper(self.quiz)
+        with self.assertNumQueries(0):
+            paper.get_paper(self.quiz)
+        QuizMultipleAnswers.objects.create(text='Wrong', question=self.question)
+        self.quiz.refresh_from_db()
+        self.assertEqual(len(paper.get_paper(self.quiz)[0][3]), 2)
+
+    def test_activation_warms_the_paper(self):
+        self.quiz.active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiz.save()
+        with self.assertNumQueries(0):
+            paper.get_paper(self.quiz)
+
+    def test_seeded_draw_is_repeatable(self):
+        for qus_id in range(23, 30):
+            QuizQuestion.objects.create(id=qus_id, text=f'Question {qus_id}', quiz=self.quiz)
+        self.quiz.refresh_from_db()
+        compiled = paper.get_paper(self.quiz)
+        first = paper.draw(compiled, seed='1:2')
+        self.assertEqual(first, paper.draw(compiled, seed='1:2'))
+        self.assertEqual(sorted(question['id'] for question in first), list(range(21, 30)))
+
+    def test_draw_from_pool(self):
+        for qus_id in range(23, 30):
+            question = QuizQuestion.objects.create(id=qus_id, text=f'Question {qus_id}', quiz=self.quiz)
+            for text in 'abcd':
+                QuizMultipleAnswers.objects.create(text=text, question=question)
+        self.quiz.refresh_from_db()
+        compiled = paper.get_paper(self.quiz)
+        drawn = paper.draw(compiled, count=4, seed='1:2')
+        self.assertEqual(len(drawn), 4)
+        self.assertEqual(len({question['id'] for question in drawn}), 4)
+        self.assertEqual(drawn, paper.draw(compiled, count=4, seed='1:2'))
+        orders = {
+            tuple(answer['text'] for answer in question['answers'])
+            for seed in range(10)
+            for question in paper.draw(compiled, seed=seed) if question['id'] == 23
+        }
+        self.assertGreater(len(orders), 1)
+
+    def test_attempt_keeps_its_draw(self):
+        for qus_id in range(23, 30):
+            QuizQuestion.objects.create(id=qus_id, text=f'Question {qus_id}', quiz=self.quiz)
+        Quiz.objects.filter(pk=self.quiz.pk).update(number_of_question=3)
+        self.quiz.refresh_from_db()
+        student = User.objects.create(username='student', national_code='1', is_student=True)
+        self.assertTrue(attempts.start_attempt(self.quiz.pk, student.pk))
+        attempt = QuizAttempt.objects.get(user=student)
+        self.assertEqual(len(attempt.questions), 3)
+        drawn = attempts.draw_questions(self.quiz, attempt.pk, student.pk)
+        self.assertEqual([question['id'] for question in drawn], attempt.questions)
+
+    def test_attempt_questions_survive_an_edit(self):
+        for qus_id in range(23, 30):
+            question = QuizQuestion.objects.create(id=qus_id, text=f'Question {qus_id}', quiz=self.quiz)
+            QuizMultipleAnswers.objects.bulk_create(
+                [QuizMultipleAnswers(text=f'Option {option}', question=question) for option in range(4)])
+        Quiz.objects.filter(pk=self.quiz.pk).update(number_of_question=3)
+        self.quiz.refresh_from_db()
+        student = User.objects.create(username='student', national_code='1', is_student=True)
+        first = attempts.attempt_questions(self.quiz, student.pk)
+        drawn = QuizAttempt.objects.get(user=student).questions
+        self.assertEqual([question['id'] for question in first], drawn)
+        QuizQuestion.objects.create(id=30, text='Question 30', quiz=self.quiz)
+        QuizQuestion.objects.filter(pk=drawn[0]).delete()
+        paper.touch_quiz(pk=self.quiz.pk)
+        self.quiz.refresh_from_db()
+        self.assertEqual(attempts.attempt_questions(self.quiz, student.pk), first[1:])
+
+
+# unit test for item analysis:
+class QuizAnalysisTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.quiz = Quiz.objects.create(
+            name='Analysis Quiz',
+            quiz_class=Classes.objects.create(name='Test Class'),
+            quiz_book=Books.objects.create(name='Test Book', units=3),
+            time=30,
+        )
+        self.questions = [
+            QuizQuestion.objects.create(id=qus_id, text=f'<p>Question {qus_id}</p>', quiz=self.quiz)
+            for qus_id in (31, 32)
+        ]
+        self.right = [QuizMultipleAnswers.objects.create(text='Right', correct=True, question=qus)
+                      for qus in self.questions]
+        self.wrong = [QuizMultipleAnswers.objects.create(text='Wrong', question=qus) for qus in self.questions]
+        self.users = [User.objects.create(username=f'user{i}', national_code=str(i), is_student=True)
+                      for i in range(4)]
+        # Scores 100, 50, 50 and 0 percent
+        for user, chosen in zip(self.users, (
+                self.right, (self.right[0], self.wrong[1]), (self.wrong[0], self.right[1]), (self.wrong[0],))):
+            data = [{'id': str(ans.question_id), 'type': 'چهار گزینه ای', 'correct': str(ans.pk)} for ans in chosen]
+            QuizResult.objects.create(quiz=self.quiz, user=user, data=data)
+        self.quiz.refresh_from_db()
+
+    def test_analyze(self):
+        with self.assertNumQueries(5):
+            data = analysis.analyze(self.quiz)
+        self.assertEqual((data['count'], data['mean'], data['median'], data['stddev']), (4, 50.0, 50.0, 35.36))
+        self.assertEqual([bucket['count'] for bucket in data['distribution']], [1, 0, 0, 0, 0, 2, 0, 0, 0, 1])
+        first, second = data['questions']
+        self.assertEqual(first['text'], 'Question 31')
+        self.assertEqual((first['difficulty'], first['discrimination'], first['unanswered']), (0.5, 1.0, 0))
+        self.assertEqual([(option['text'], option['count']) for option in first['options']],
+                         [('Right', 2), ('Wrong', 2)])
+        self.assertEqual((second['difficulty'], second['unanswered']), (0.5, 1))
+
+    def test_analysis_is_cached_until_a_result_arrives(self):
+        analysis.get_analysis(self.quiz)
+        with self.assertNumQueries(0):
+            analysis.get_analysis(self.quiz)
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizResult.objects.create(quiz=self.quiz, user=self.users[0], data=[])
+        self.assertEqual(analysis.get_analysis(self.quiz)['count'], 5)
+
+    def test_analysis_view(self):
+        self.client.force_login(User.objects.create(username='manager', national_code='9', is_manager=True))
+        response = self.client.get(reverse('quiz:quiz_analysis', args=[self.quiz.pk]), {'format': 'json'})
+        self.assertEqual(response.json()['count'], 4)
+        response = self.client.get(reverse('quiz:result_export'))
+        self.assertEqual(b''.join(response.streaming_content).decode().count('\r\n'), 5)
+
+    def test_analysis_is_invalidated_after_commit(self):
+        analysis.get_analysis(self.quiz)
+        with self.captureOnCommitCallbacks() as callbacks:
+            QuizResult.objects.create(quiz=self.quiz, user=self.users[0], data=[])
+            # A read inside the transaction still gets the cached analysis
+            self.assertEqual(analysis.get_analysis(self.quiz)['count'], 4)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(analysis.get_analysis(self.quiz)['count'], 5)
+
+
+# unit test for the quiz list:
+class QuizListTestCase(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create(username='teacher', national_code='1', is_teacher=True)
+        other_teacher = User.objects.create(username='other', national_code='2', is_teacher=True)
+        quiz_class = Classes.objects.create(name='Test Class')
+        quiz_class.teacher.add(self.teacher, other_teacher)
+        self.student = User.objects.create(username='student', national_code='3', is_student=True,
+                                           student_class=quiz_class)
+        book = Books.objects.create(name='Test Book', units=3)
+        self.quizzes = [
+            Quiz.objects.create(name=f'Quiz {index}', quiz_class=quiz_class, quiz_book=book, time=30)
+            for index in range(3)
+        ]
+        self.quizzes[0].students.add(self.student)
+        Quiz.objects.create(name='Other', quiz_class=Classes.objects.create(name='Other'), quiz_book=book, time=30)
+
+    def test_teacher_quizzes_are_not_repeated(self):
+        quizzes = views.visible_quizzes(self.teacher)
+        self.assertEqual(sorted(quiz.name for quiz in quizzes), ['Quiz 0', 'Quiz 1', 'Quiz 2'])
+
+    def test_already_taken_in_one_query(self):
+        with self.assertNumQueries(1):
+            rows = [(quiz.name, quiz.already_taken, quiz.quiz_class.name, quiz.quiz_book.name)
+                    for quiz in views.visible_quizzes(self.student)]
+        self.assertEqual(sorted(rows), [
+            ('Quiz 0', True, 'Test Class', 'Test Book'),
+            ('Quiz 1', False, 'Test Class', 'Test Book'),
+            ('Quiz 2', False, 'Test Class', 'Test Book'),
+        ])
+
+
+
+# unit test for question bank imports:
+class QuestionImportTestCase(TestCase):
+    def setUp(self):
+        self.quiz = Quiz.objects.create(
+            name='Import Quiz',
+            quiz_class=Classes.objects.create(name='Test Class'),
+            quiz_book=Books.objects.create(name='Test Book', units=3),
+            time=30,
+        )
+
+    def bank(self, name, content):
+        return importer.read_bank(BytesIO(content.encode('utf-8')), name)
+
+    def test_import_csv(self):
+        rows = self.bank('bank.csv', (
+            '\ufefftext,type,option_1,option_2,option_3,option_4,correct\n'
+            'Two plus two,,3,4,5,,2\n'
+            'Explain,تشریحی,,,,,\n'
+        ))
+        with self.assertNumQueries(8):
+            self.assertEqual(importer.import_questions(self.quiz, rows), 2)
+        multiple = QuizQuestion.objects.get(text='Two plus two')
+        self.assertEqual(list(multiple.answer_multi_question.order_by('id').values_list('text', 'correct')),
+                         [('3', False), ('4', True), ('5', False)])
+        self.assertEqual(QuizQuestion.objects.get(text='Explain').answer_desc_question.count(), 1)
+        self.assertEqual(multiple.pk, importer.IMPORTED_ID_START)
+
+    def test_import_json(self):
+        rows = self.bank('bank.json', json.dumps([
+            {'text': 'Capital', 'type': 'multiple', 'options': [
+                {'text': 'Tehran', 'correct': True}, {'text': 'Shiraz'}]},
+        ]))
+        self.assertEqual(importer.import_questions(self.quiz, rows), 1)
+        self.assertEqual(grading.answer_key(self.quiz.pk),
+                         {QuizQuestion.objects.get().pk: {QuizMultipleAnswers.objects.get(text='Tehran').pk}})
+
+    def test_invalid_rows_import_nothing(self):
+        rows = self.bank('bank.json', json.dumps([
+            {'text': 'Fine', 'options': [{'text': 'a', 'correct': True}, {'text': 'b'}]},
+            {'text': '', 'options': []},
+            {'text': 'No right option', 'options': [{'text': 'a'}, {'text': 'b'}]},
+            {'text': 'Unknown', 'type': 'essay'},
+        ]))
+        with self.assertRaises(importer.BankError) as raised:
+            importer.import_questions(self.quiz, rows)
+        self.assertEqual([row for row, _ in raised.exception.errors], [2, 3, 4])
+        self.assertFalse(QuizQuestion.objects.exists())
+
+    def test_ids_taken_meanwhile(self):
+        QuizQuestion.objects.create(id=importer.IMPORTED_ID_START, text='Taken', quiz=self.quiz)
+        content = 'text,type\nExplain,تشریحی\n'
+        with mock.patch.object(importer, 'next_question_id', return_value=importer.IMPORTED_ID_START):
+            with self.assertRaises(importer.BankError):
+                importer.import_questions(self.quiz, self.bank('bank.csv', content))
+        self.assertEqual(QuizQuestion.objects.count(), 1)
+        # The next import continues after the taken id
+        self.assertEqual(importer.import_questions(self.quiz, self.bank('bank.csv', content)), 1)
+        self.assertTrue(QuizQuestion.objects.filter(pk=importer.IMPORTED_ID_START + 1).exists())
+
+    def test_import_view(self):
+        self.client.force_login(User.objects.create(username='manager', national_code='1', is_manager=True))
+        url = reverse('quiz:question_import', args=[self.quiz.pk])
+        bank = BytesIO('text,option_1,option_2,correct\nTwo plus two,3,4,2\n'.encode('utf-8'))
+        bank.name = 'bank.csv'
+        response = self.client.post(url, {'file': bank})
+        self.assertRedirects(response, reverse('quiz:quiz_questions_list', args=[self.quiz.pk]),
+                             fetch_redirect_response=False)
+        self.assertEqual(QuizQuestion.objects.filter(quiz=self.quiz).count(), 1)
+        response = self.client.post(url, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unreadable_bank(self):
+        with self.assertRaises(importer.BankError):
+            importer.import_questions(self.quiz, self.bank('bank.json', '{not json'))
+        with self.assertRaises(importer.BankError):
+            self.bank('bank.xlsx', '')
 
 # unit tests for urls:
 class TestQuizUrls(SimpleTestCase):
@@ -81,6 +669,10 @@ class TestQuizUrls(SimpleTestCase):
         url = reverse('quiz:quiz_detail', args=[1])
         self.assertEqual(resolve(url).func, views.quiz_detail)
 
+    def test_quiz_analysis_url(self):
+        url = reverse('quiz:quiz_analysis', args=[1])
+        self.assertEqual(resolve(url).func, views.quiz_analysis)
+
     def test_quiz_start_url(self):
         url = reverse('quiz:quiz_start', args=[1, 'uuid'])
         self.assertEqual(resolve(url).func, views.quiz_start)
@@ -97,6 +689,10 @@ class TestQuizUrls(SimpleTestCase):
         url = reverse('quiz:quiz_questions_list', args=[1])
         self.assertEqual(resolve(url).func, views.quiz_questions_list)
 
+    def test_question_import_url(self):
+        url = reverse('quiz:question_import', args=[1])
+        self.assertEqual(resolve(url).func, views.question_import)
+
     def test_question_update_url(self):
         url = reverse('quiz:question_update', args=[1])
         self.assertEqual(resolve(url).func.view_class, views.UpdateQuestion)
@@ -125,6 +721,10 @@ class TestQuizUrls(SimpleTestCase):
         url = reverse('quiz:result_list')
         self.assertEqual(resolve(url).func, views.result_list)
 
+    def test_result_export_url(self):
+        url = reverse('quiz:result_export')
+        self.assertEqual(resolve(url).func, views.result_export)
+
     def test_result_detail_url(self):
         url = reverse('quiz:result_detail', args=[1, 1])
         self.assertEqual(resolve(url).func, views.result_detail)
@@ -1,8 +1,7 @@
-import random
 from django.views import generic
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef
 from django.http import (
     HttpResponse,
     JsonResponse,
@@ -10,15 +9,20 @@ from django.http import (
 from django.shortcuts import (
     render,
     get_object_or_404,
+    redirect,
 )
 from django.urls import reverse_lazy
 from django.views.decorators.http import require_POST
+from extensions import inline_images
+from extensions.export import stream_csv, yes_no
 from main.decorators import (
     allow_user,
     quiz_access,
 )
 from main.mixins import AllowUserMixin
 from manager.filters import QuizListFilter
+from manager.models import Classes
+from quiz import analysis, attempts, grading, importer, paper
 from quiz.filters import QuizResultFilter
 from quiz.forms import (
     CreateQuestionForm,
@@ -35,6 +39,37 @@ from quiz.models import (
 )
 
 
+def visible_quizzes(user):
+    """
+    Quizzes a user may list, with class and book joined and "already_taken"
+    read per row with EXISTS instead of loading every quiz's students
+    """
+    quizzes = Quiz.objects.select_related('quiz_class', 'quiz_book').annotate(already_taken=Exists(
+        Quiz.students.through.objects.filter(quiz_id=OuterRef('pk'), user_id=user.pk)))
+    if user.is_teacher:
+        # A semi-join, so a class with several teachers does not repeat its quizzes
+        return quizzes.filter(Exists(
+            Classes.teacher.through.objects.filter(classes_id=OuterRef('quiz_class_id'), user_id=user.pk)))
+    if user.is_student:
+        return quizzes.filter(quiz_class=user.student_class_id)
+    if user.is_superuser or user.is_manager:
+        return quizzes
+    return None
+
+
+def get_visible_quiz(user, pk):
+    """
+    Quiz of a pk sent by the page among the ones the user may see, None when pk
+    is missing or not a number; raises Http404 for any other quiz
+    """
+    if not (pk or '').isdigit():
+        return None
+    quizzes = visible_quizzes(user)
+    if quizzes is None:
+        quizzes = Quiz.objects.none()
+    return get_object_or_404(quizzes, pk=pk)
+
+
 @login_required()
 @allow_user(['is_superuser', 'is_manager', 'is_student', 'is_teacher'])
 def quiz_list(request):
@@ -47,14 +82,9 @@ def quiz_list(request):
     context = {
         'page_title': 'فهرست آزمون ها'
     }
-    if request.user.is_superuser or request.user.is_manager:
-        context['filter'] = QuizListFilter(request.GET, queryset=Quiz.objects.all())
-    if request.user.is_student:
-        context['filter'] = QuizListFilter(request.GET,
-                                           queryset=Quiz.objects.filter(quiz_class=request.user.student_class))
-    if request.user.is_teacher:
-        context['filter'] = QuizListFilter(request.GET,
-                                           queryset=Quiz.objects.filter(quiz_class__teacher__pk=request.user.pk))
+    queryset = visible_quizzes(request.user)
+    if queryset is not None:
+        context['filter'] = QuizListFilter(request.GET, queryset=queryset)
     return render(request, "quiz/quiz_list.html", context)
 
 
@@ -68,6 +98,20 @@ def quiz_detail(request, pk):
     return render(request, "quiz/quiz_detail.html", context)
 
 
+@allow_user(['is_superuser', 'is_manager', 'is_teacher'])
+def quiz_analysis(request, pk):
+    quiz = get_object_or_404(Quiz, pk=pk)
+    data = analysis.get_analysis(quiz)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(data)
+    context = {
+        'page_title': f"تحلیل آزمون {quiz.name}",
+        'quiz': quiz,
+        'analysis': data,
+    }
+    return render(request, "quiz/quiz_analysis.html", context)
+
+
 @allow_user(['is_superuser', 'is_manager'])
 def quiz_questions_list(request, pk):
     questions = QuizQuestion.objects.filter(quiz__pk=pk)
@@ -104,6 +148,34 @@ def quiz_questions_list(request, pk):
     return render(request, "quiz/quiz_list.html", context)
 
 
+@allow_user(['is_superuser', 'is_manager'])
+def question_import(request, pk):
+    """
+    Import a CSV or JSON question bank into a quiz in one go
+    """
+    quiz = get_object_or_404(Quiz, pk=pk)
+    context = {
+        'page_title': 'ورود سوالات از فایل',
+        'quiz': quiz,
+    }
+    if request.method == "POST":
+        bank = request.FILES.get('file')
+        try:
+            if bank is None:
+                raise importer.BankError([(0, "فایلی انتخاب نشده است")])
+            count = importer.import_questions(quiz, importer.read_bank(bank, bank.name))
+        except importer.BankError as error:
+            errors = [{'row': row, 'message': message} for row, message in error.errors]
+            if request.is_ajax():
+                return JsonResponse({"error": True, "message": "فایل سوالات نامعتبر است", "errors": errors}, status=400)
+            context['errors'] = errors
+        else:
+            if request.is_ajax():
+                return JsonResponse({"error": False, "created": count})
+            return redirect(reverse_lazy('quiz:quiz_questions_list', kwargs={'pk': quiz.pk}))
+    return render(request, "quiz/question_import.html", context)
+
+
 @allow_user(['is_superuser', 'is_manager'])
 def create_answers(request):
     input_value = {
@@ -117,9 +189,12 @@ def create_answers(request):
     else:
         correct = False
     print(input_value)
-    ans = QuizMultipleAnswers(text=input_value['answer_text'], correct=correct,
-                              question=QuizQuestion.objects.get(id=input_value['qus_id']))
+    question = QuizQuestion.objects.get(id=input_value['qus_id'])
+    old_correct = grading.correct_answers(question.pk)
+    ans = QuizMultipleAnswers(text=input_value['answer_text'], correct=correct, question=question)
     ans.save()
+    if correct:
+        grading.regrade_question(question.pk, old_correct)
     return HttpResponse(input_value)
 
 
@@ -144,7 +219,9 @@ def update_question(request):
         'question_text': request.POST['question_text'],
     }
     print(input_value)
-    QuizQuestion.objects.filter(id=input_value['qus_id']).update(text=input_value['question_text'])
+    text = inline_images.extract(input_value['question_text'])
+    QuizQuestion.objects.filter(id=input_value['qus_id']).update(text=text)
+    paper.touch_quiz(question_quiz=input_value['qus_id'])
     return HttpResponse(input_value)
 
 
@@ -160,8 +237,12 @@ def update_answers(request):
         correct = True
     else:
         correct = False
-    QuizMultipleAnswers.objects.filter(id=input_value['answer_id']).update(text=input_value['answer_text'],
-                                                                           correct=correct)
+    answer = get_object_or_404(QuizMultipleAnswers, id=input_value['answer_id'])
+    old_correct = grading.correct_answers(answer.question_id)
+    QuizMultipleAnswers.objects.filter(id=answer.id).update(text=input_value['answer_text'], correct=correct)
+    paper.touch_quiz(question_quiz=answer.question_id)
+    if answer.correct != correct:
+        grading.regrade_question(answer.question_id, old_correct)
     return HttpResponse(input_value)
 
 
@@ -192,111 +273,83 @@ class UpdateQuiz(AllowUserMixin, generic.UpdateView):
         return context
 
 
-qus_ids = []
-
-answers = []
+def answer_from_post(post, text_field='answer_text'):
+    """
+    Answer dict stored in the attempt, None for an unknown question type
+    """
+    qus_type = post['type']
+    if qus_type == "تشریحی":
+        return {
+            'id': post['id'],
+            'type': qus_type,
+            'answer_text': post[text_field],
+        }
+    elif qus_type == "چهار گزینه ای":
+        return {
+            'id': post['id'],
+            'type': qus_type,
+            'correct': post['correct'],
+        }
+    return None
 
 
 @quiz_access()
 @allow_user(['is_student'])
 def quiz_start(request, pk, uuid):
     quiz = get_object_or_404(Quiz, pk=pk, uuid=uuid)
-    questions = quiz.questions()
+    try:
+        started = attempts.start_attempt(quiz.pk, request.user.pk)
+    except attempts.AttemptFinished:
+        result = QuizResult.objects.filter(quiz=quiz, user=request.user).order_by('id').last()
+        if request.is_ajax() or result is None:
+            return JsonResponse({"error": True, "message": "این آزمون را قبلا داده اید"}, status=403)
+        return redirect('quiz:result_detail', result.pk, request.user.pk)
+    if started:
+        quiz.students.add(request.user)
     if request.method == "POST":
         if request.is_ajax():
-            qus_type = request.POST['type']
-            if qus_type == "تشریحی":
-                input_value = {
-                    'id': request.POST['id'],
-                    'type': request.POST['type'],
-                    'answer_text': request.POST['answer_test'],
-                }
-                qus_id = input_value['id']
-                if qus_id in qus_ids:
-                    print(qus_id)
-                else:
-                    qus_ids.append(qus_id)
-                    answers.append(input_value)
-            elif qus_type == "چهار گزینه ای":
-                input_value = {
-                    'id': request.POST['id'],
-                    'type': request.POST['type'],
-                    'correct': request.POST['correct'],
-                }
-                qus_id = input_value['id']
-                if qus_id in qus_ids:
-                    print(qus_id)
-                else:
-                    qus_ids.append(qus_id)
-                    answers.append(input_value)
-    print(qus_ids)
-    print(answers)
-    quiz.students.add(request.user)
-    quiz.save()
+            input_value = answer_from_post(request.POST, 'answer_test')
+            if input_value:
+                try:
+                    attempts.record_answer(quiz.pk, request.user.pk, input_value)
+                except attempts.AttemptExpired:
+                    return JsonResponse({"error": True, "message": "زمان آزمون به پایان رسیده است"}, status=403)
     context = {
         'quiz': quiz,
+        'remaining': attempts.remaining_seconds(quiz.pk, request.user.pk),
     }
 
+    object_list = attempts.attempt_questions(quiz, request.user.pk)
     if quiz.show_quiz:
-        if not request.session.get('random_exp'):
-            request.session['random_exp'] = random.randrange(0, 5)
-        object_list = cache.get('random_exp_%d' % request.session['random_exp'])
-        if not object_list:
-            object_list = list(quiz.questions().order_by('?'))
-            cache.set('random_exp_%d' % request.session['random_exp'], object_list, 6000)
         paginator = Paginator(object_list, 1)
         page_number = request.GET.get('qus')
         display_list = paginator.page(page_number)
         context['questions'] = display_list
     else:
-        display_list = questions.order_by('?')
-        context['questions'] = display_list
+        context['questions'] = object_list
 
     return render(request, "quiz/quiz_list.html", context)
 
 
+@login_required()
 @require_POST
 def get_questions(request):
     """
     Get Questions when quiz show answers True
     """
-    qus_type = request.POST['type']
-    if qus_type == "تشریحی":
-        input_value = {
-            'id': request.POST['id'],
-            'type': request.POST['type'],
-            'answer_text': request.POST['answer_text'],
-        }
-        qus_id = input_value['id']
-        if qus_id in qus_ids:
-            answers.append(input_value)
-            for i in range(len(answers)):
-                if answers[i]['id'] == qus_id:
-                    del answers[i]
-                    break
-        else:
-            qus_ids.append(qus_id)
-            answers.append(input_value)
-    elif qus_type == "چهار گزینه ای":
-        input_value = {
-            'id': request.POST['id'],
-            'type': request.POST['type'],
-            'correct': request.POST['correct'],
-        }
-        qus_id = input_value['id']
-        if qus_id in qus_ids:
-            answers.append(input_value)
-            for i in range(len(answers)):
-                if answers[i]['id'] == qus_id:
-                    del answers[i]
-                    break
-        else:
-            qus_ids.append(qus_id)
-            answers.append(input_value)
-    print(answers)
+    quiz = get_visible_quiz(request.user, request.POST.get('pk'))
+    if quiz is None:
+        return JsonResponse({"error": True, "message": "آزمون مشخص نشده است"}, status=400)
+    input_value = answer_from_post(request.POST)
+    if input_value:
+        try:
+            attempts.record_answer(quiz.pk, request.user.pk, input_value)
+        except attempts.AttemptExpired:
+            return JsonResponse({"error": True, "message": "زمان آزمون به پایان رسیده است"}, status=403)
     return HttpResponse("done")
 
 
+@login_required()
 @require_POST
 def create_result(request):
     """
@@ -307,37 +360,18 @@ def create_result(request):
         'pk': request.POST['pk'],
     }
     quiz = get_object_or_404(Quiz, pk=quiz_data['pk'], uuid=quiz_data['uuid'])
-    qus_type = request.POST['type']
-    if qus_type == "تشریحی":
-        input_value = {
-            'id': request.POST['id'],
-            'type': request.POST['type'],
-            'answer_text': request.POST['answer_test'],
-        }
-        qus_id = input_value['id']
-        if qus_id in qus_ids:
-            print(qus_id)
-        else:
-            qus_ids.append(qus_id)
-            answers.append(input_value)
-    elif qus_type == "چهار گزینه ای":
-        input_value = {
-            'id': request.POST['id'],
-            'type': request.POST['type'],
-            'correct': request.POST['correct'],
-        }
-        qus_id = input_value['id']
-        if qus_id in qus_ids:
-            print(qus_id)
-        else:
-            qus_ids.append(qus_id)
-            answers.append(input_value)
-    QuizResult.objects.create(quiz=quiz, user=request.user, data=answers)
-    qus_ids.clear()
-    answers.clear()
+    input_value = answer_from_post(request.POST, 'answer_test')
+    if input_value:
+        try:
+            attempts.record_answer(quiz.pk, request.user.pk, input_value)
+        except attempts.AttemptExpired:
+            # Too late for this answer, the ones saved in time are still submitted
+            pass
+    attempts.finish_attempt(quiz, request.user.pk)
     return HttpResponse("Done")
 
 
+@login_required()
 @require_POST
 def create_result_2(request):
     quiz_data = {
@@ -345,13 +379,16 @@ def create_result_2(request):
         'pk': request.POST['pk'],
     }
     quiz = get_object_or_404(Quiz, pk=quiz_data['pk'], uuid=quiz_data['uuid'])
-    QuizResult.objects.create(quiz=quiz, user=request.user, data=answers)
-    qus_ids.clear()
-    answers.clear()
+    attempts.finish_attempt(quiz, request.user.pk)
     return HttpResponse("Done")
 
 
+@login_required()
 def answers_data(request):
+    quiz = get_visible_quiz(request.user, request.GET.get('pk'))
+    if quiz is None:
+        return JsonResponse({"error": True, "message": "آزمون مشخص نشده است"}, status=400)
+    answers = attempts.get_answers(quiz.pk, request.user.pk)
     if answers:
         return JsonResponse(answers, safe=False)
     else:
@@ -374,6 +411,26 @@ def result_list(request):
     return render(request, "quiz/quiz_list.html", context)
 
 
+RESULT_EXPORT_COLUMNS = (
+    ('نام', 'user__first_name'),
+    ('نام خانوادگی', 'user__last_name'),
+    ('کد ملی', 'user__national_code'),
+    ('آزمون', 'quiz__name'),
+    ('کلاس', 'quiz__quiz_class__name'),
+    ('نمره', 'score'),
+    ('درصد', 'percent'),
+    ('قبول شده', 'passed', yes_no),
+)
+
+
+@allow_user(['is_superuser', 'is_manager', 'is_teacher'])
+def result_export(request):
+    results = QuizResult.objects.order_by('id')
+    if request.user.is_teacher and not (request.user.is_superuser or request.user.is_manager):
+        results = results.filter(quiz__quiz_class__teacher__pk=request.user.pk)
+    return stream_csv('quiz-results', RESULT_EXPORT_COLUMNS, QuizResultFilter(request.GET, queryset=results).qs)
+
+
 @allow_user(['is_superuser', 'is_manager', 'is_teacher', 'is_student'])
 def result_detail(request, pk, stu_pk):
     result = get_object_or_404(QuizResult, pk=pk, user__pk=stu_pk)
@@ -1,72 +1,33 @@
-$('.present').click(function(){
-    let AttendanceStatus1 = document.getElementsByName('AttendanceStatus'+this.name)[0];
-    let valAss = document.getElementsByName('val'+this.name)[0];
-    AttendanceStatus1.classList.remove('btn-light');
-    AttendanceStatus1.classList.remove('btn-success');
-    AttendanceStatus1.classList.remove('btn-danger');
-    AttendanceStatus1.classList.remove('btn-warning');
-    AttendanceStatus1.classList.add('btn-success');
-    AttendanceStatus1.innerText = this.innerText;
-    $.ajax({
-        method: 'POST',
-        url: '/manager/change-att-status/',
-        data: {
-            ass_id: valAss.value,
-            status: AttendanceStatus1.innerText,
-            csrfmiddlewaretoken: csrf,
-        },
-        beforeSend: function() {
-        },
-        success: function(data) {
-        },
-        error: function() {
-            alert("مشکلی پیش آمده");
-        },
-    });
-})
-$('.absent').click(function(){
-    let AttendanceStatus2 = document.getElementsByName('AttendanceStatus'+this.name)[0];
-    let valAss = document.getElementsByName('val'+this.name)[0];
-    AttendanceStatus2.classList.remove('btn-light');
-    AttendanceStatus2.classList.remove('btn-success');
-    AttendanceStatus2.classList.remove('btn-danger');
-    AttendanceStatus2.classList.remove('btn-warning');
-    AttendanceStatus2.classList.add('btn-danger');
-    AttendanceStatus2.innerText = this.innerText;
+// Roll call: status and note changes are queued and sent for the whole class at once
+var roll_call = {};
+var roll_call_timer;
+var status_classes = {present: 'btn-success', absent: 'btn-danger', pLate: 'btn-warning'};
+
+function queue_roll_call(student, values) {
+    roll_call[student] = $.extend(roll_call[student] || {student: student}, values);
+    clearTimeout(roll_call_timer);
+    roll_call_timer = setTimeout(send_roll_call, 1000);
+}
+
+function roll_call_data() {
+    var records = Object.values(roll_call);
+    roll_call = {};
+    clearTimeout(roll_call_timer);
+    return {
+        att_id: document.getElementById('hw_att').value,
+        records: JSON.stringify(records),
+        csrfmiddlewaretoken: csrf,
+    };
+}
+
+function send_roll_call() {
+    if (Object.keys(roll_call).length == 0) {
+        return;
+    }
     $.ajax({
         method: 'POST',
-        url: '/manager/change-att-status/',
-        data: {
-            ass_id: valAss.value,
-            status: AttendanceStatus2.innerText,
-            csrfmiddlewaretoken: csrf,
-        },
-        beforeSend: function() {
-        },
-        success: function(data) {
-        },
-        error: function() {
-            alert("مشکلی پیش آمده");
-        },
-    });
-})
-$('.pLate').click(function(){
-    let AttendanceStatus3 = document.getElementsByName('AttendanceStatus'+this.name)[0];
-    let valAss = document.getElementsByName('val'+this.name)[0];
-    AttendanceStatus3.classList.remove('btn-light');
-    AttendanceStatus3.classList.remove('btn-success');
-    AttendanceStatus3.classList.remove('btn-danger');
-    AttendanceStatus3.classList.remove('btn-warning');
-    AttendanceStatus3.classList.add('btn-warning');
-    AttendanceStatus3.innerText = this.innerText;
-     $.ajax({
-        method: 'POST',
-        url: '/manager/change-att-status/',
-        data: {
-            ass_id: valAss.value,
-            status: AttendanceStatus3.innerText,
-            csrfmiddlewaretoken: csrf,
-        },
+        url: '/manager/roll-call/',
+        data: roll_call_data(),
         beforeSend: function() {
         },
         success: function(data) {
@@ -75,88 +36,36 @@ $('.pLate').click(function(){
             alert("مشکلی پیش آمده");
         },
     });
-})
-//===================================
-$('.present_cr').click(function(){
-    let CrAttendanceStatus1 = document.getElementsByName('CrAttendanceStatus'+this.name)[0];
-    CrAttendanceStatus1.classList.remove('btn-light');
-    CrAttendanceStatus1.classList.remove('btn-success');
-    CrAttendanceStatus1.classList.remove('btn-danger');
-    CrAttendanceStatus1.classList.remove('btn-warning');
-    CrAttendanceStatus1.classList.add('btn-success');
-    CrAttendanceStatus1.innerText = this.innerText;
-    $.ajax({
-        method: 'POST',
-        url: '/manager/add-att-status/',
-        data: {
-            att_id: CrAttendanceStatus1.id,
-            stu_id: this.name,
-            status: CrAttendanceStatus1.innerText,
-            csrfmiddlewaretoken: csrf,
-        },
-        beforeSend: function() {
-        },
-        success: function(data) {
-            window.location.reload();
-        },
-        error: function() {
-            alert("مشکلی پیش آمده");
-        },
-    });
-})
-$('.absent_cr').click(function(){
-    let CrAttendanceStatus2 = document.getElementsByName('CrAttendanceStatus'+this.name)[0];
-    CrAttendanceStatus2.classList.remove('btn-light');
-    CrAttendanceStatus2.classList.remove('btn-success');
-    CrAttendanceStatus2.classList.remove('btn-danger');
-    CrAttendanceStatus2.classList.remove('btn-warning');
-    CrAttendanceStatus2.classList.add('btn-danger');
-    CrAttendanceStatus2.innerText = this.innerText;
-    $.ajax({
-        method: 'POST',
-        url: '/manager/add-att-status/',
-        data: {
-            att_id: CrAttendanceStatus2.id,
-            stu_id: this.name,
-            status: CrAttendanceStatus2.innerText,
-            csrfmiddlewaretoken: csrf,
-        },
-        beforeSend: function() {
-        },
-        success: function(data) {
-            window.location.reload();
-        },
-        error: function() {
-            alert("مشکلی پیش آمده");
-        },
+}
+
+$.each(status_classes, function(name, btn_class) {
+    $(document).on('click', '.' + name + ', .' + name + '_cr', function() {
+        let prefix = $(this).hasClass(name + '_cr') ? 'CrAttendanceStatus' : 'AttendanceStatus';
+        let AttendanceStatus = document.getElementsByName(prefix + this.name)[0];
+        AttendanceStatus.classList.remove('btn-light');
+        AttendanceStatus.classList.remove('btn-success');
+        AttendanceStatus.classList.remove('btn-danger');
+        AttendanceStatus.classList.remove('btn-warning');
+        AttendanceStatus.classList.add(btn_class);
+        AttendanceStatus.innerText = this.innerText;
+        queue_roll_call(this.name, {status: this.innerText.trim()});
     });
+});
+
+$('.SNote').change(function(){
+    queue_roll_call(this.name, {note: this.value});
 })
-$('.pLate_cr').click(function(){
-    let CrAttendanceStatus3 = document.getElementsByName('CrAttendanceStatus'+this.name)[0];
-    CrAttendanceStatus3.classList.remove('btn-light');
-    CrAttendanceStatus3.classList.remove('btn-success');
-    CrAttendanceStatus3.classList.remove('btn-danger');
-    CrAttendanceStatus3.classList.remove('btn-warning');
-    CrAttendanceStatus3.classList.add('btn-warning');
-    CrAttendanceStatus3.innerText = this.innerText;
-     $.ajax({
-        method: 'POST',
-        url: '/manager/add-att-status/',
-        data: {
-            att_id: CrAttendanceStatus3.id,
-            stu_id: this.name,
-            status: CrAttendanceStatus3.innerText,
-            csrfmiddlewaretoken: csrf,
-        },
-        beforeSend: function() {
-        },
-        success: function(data) {
-            window.location.reload();
-        },
-        error: function() {
-            alert("مشکلی پیش آمده");
-        },
+
+// Send what is left when the page is closed before the timer fires
+$(window).on('beforeunload', function() {
+    if (Object.keys(roll_call).length == 0) {
+        return;
+    }
+    let form = new FormData();
+    $.each(roll_call_data(), function(key, value) {
+        form.append(key, value);
     });
+    navigator.sendBeacon('/manager/roll-call/', form);
 })
 
 //==================================
@@ -209,24 +118,3 @@ function create_hw(){
         },
     });
 }
-
-$('.SNote').change(function(){
-        const ass_id = document.getElementsByName('ass'+this.name)[0];
-        $.ajax({
-        method: 'POST',
-        url: '/manager/change-att-note/',
-        data: {
-            ass_id: ass_id.value,
-            note: this.value,
-            csrfmiddlewaretoken: csrf,
-        },
-        beforeSend: function() {
-        },
-        success: function(data) {
-            window.location.reload();
-        },
-        error: function() {
-            alert("مشکلی پیش آمده");
-        },
-    });
-})
\ No newline at end of file
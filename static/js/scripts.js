@@ -65,25 +65,44 @@ function closeNav() {
 //=============================
 
 // Search in users name
-function search_users() {
-    var input, filter, ul, li, a, i;
-    input = document.getElementById("searchInput");
-    filter = input.value.toUpperCase();
-    div = document.getElementById("UsersDropdown");
-    button = div.getElementsByTagName("button");
-    for (i = 0; i < button.length; i++) {
-        txtValue = button[i].textContent || button[i].innerText;
-        if (txtValue.toUpperCase().indexOf(filter) > -1) {
-            button[i].style.display = "";
-        } else {
-            button[i].style.display = "none";
-        }
+var search_users_timer;
+function search_users(input) {
+    var results = $(input).siblings(".UsersResults");
+    clearTimeout(search_users_timer);
+    if (input.value.trim() == "") {
+        results.empty();
+        return;
     }
+    // Wait for the user to stop typing before asking the server
+    search_users_timer = setTimeout(function () {
+        $.ajax({
+            url: "/manager/users/autocomplete/",
+            method: "GET",
+            data: {
+                q: input.value,
+            },
+            success: function (data) {
+                results.empty();
+                $.each(data.results, function (i, user) {
+                    $("<button>", {
+                        "class": "dropdown-item noticeWr",
+                        type: "button",
+                        name: "user_name",
+                        id: "id" + user.id,
+                        text: user.id + " " + user.name,
+                    }).appendTo(results);
+                });
+            },
+            error: function (data) {
+                alert("مشکلی پیش آمده");
+            },
+        });
+    }, 250);
 }
 // Make new Notice
 var notice_writer_id = "";
 var notice_writer = document.getElementsByClassName("Notice_writer");
-$(".noticeWr").click(function () {
+$(document).on("click", ".noticeWr", function () {
     var id = this.id.slice(2);
     notice_writer[0].innerText = this.innerText;
     notice_writer[1].innerText = this.innerText;
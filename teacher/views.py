@@ -1,6 +1,6 @@
 from django.db.models import Count
 from django.shortcuts import render
-from account.models import User
+from main.counters import get_count
 from main.decorators import allow_user
 from manager.filters import ClassFilter
 from manager.models import (
@@ -24,7 +24,7 @@ def teacher_view(request):
         "notices": NoticeBox.objects.all().order_by('-publish')[:4],
         "filter": ClassFilter(request.GET, queryset=Classes.objects.filter(teacher__pk=request.user.pk)),
         "majors": Major.objects.all(),
-        "User_count": User.objects.first(),
+        "student_count": get_count('students'),
         "Quiz_count": all_count(),
         "page_title": "پنل دبیران"
     }